@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'modules'))
 
 from auth import require_auth, init_session_state, logout
 from db_connection import execute_query, execute_update
+from daily_storage import move_establecimiento_daily, delete_establecimientos_daily
 from format_utils import format_number_spanish, format_dataframe_for_display
 from config_manager import (
     get_filtros_defecto, set_filtros_defecto,
@@ -21,6 +22,7 @@ from config_manager import (
     is_nota_visible, set_nota_visible,
     get_orden_defecto, set_orden_defecto
 )
+from theme_manager import invalidate_theme_cache
 import bcrypt
 import json
 
@@ -63,7 +65,7 @@ with st.sidebar:
     
     menu = st.radio(
         "Navegación",
-        ["📤 Carga de Datos", "👥 Usuarios", "🏢 Empresas", "⚙️ Configuración", "📊 Logs"],
+        ["📤 Carga de Datos", "👥 Usuarios", "🏢 Empresas", "⚙️ Configuración", "📊 Logs", "⏱️ Rendimiento", "📦 Exportar"],
         label_visibility="collapsed"
     )
     
@@ -144,8 +146,7 @@ if menu == "📤 Carga de Datos":
                             # Obtener establecimiento_ids de este período para eliminar datos_diarios relacionados
                             est_ids = execute_query("SELECT DISTINCT establecimiento_id FROM datos_semanales WHERE fecha_inicio = %s AND fecha_fin = %s", (fecha_inicio, fecha_fin))
                             if est_ids:
-                                est_id_list = [e['establecimiento_id'] for e in est_ids]
-                                execute_update(f"DELETE FROM datos_diarios WHERE establecimiento_id IN ({','.join(['%s']*len(est_id_list))})", tuple(est_id_list))
+                                delete_establecimientos_daily(e['establecimiento_id'] for e in est_ids)
                             execute_update("DELETE FROM datos_semanales WHERE fecha_inicio = %s AND fecha_fin = %s", (fecha_inicio, fecha_fin))
                             st.success(f"Período {fecha_inicio} al {fecha_fin} eliminado correctamente")
                             st.rerun()
@@ -164,8 +165,7 @@ if menu == "📤 Carga de Datos":
                         try:
                             est_ids = execute_query("SELECT DISTINCT establecimiento_id FROM datos_semanales WHERE fecha_inicio = %s AND fecha_fin = %s", (ultimo['fecha_inicio'], ultimo['fecha_fin']))
                             if est_ids:
-                                est_id_list = [e['establecimiento_id'] for e in est_ids]
-                                execute_update(f"DELETE FROM datos_diarios WHERE establecimiento_id IN ({','.join(['%s']*len(est_id_list))})", tuple(est_id_list))
+                                delete_establecimientos_daily(e['establecimiento_id'] for e in est_ids)
                             execute_update("DELETE FROM datos_semanales WHERE fecha_inicio = %s AND fecha_fin = %s", (ultimo['fecha_inicio'], ultimo['fecha_fin']))
                             st.success(f"Último período {periodo_str} eliminado correctamente")
                             st.rerun()
@@ -196,6 +196,10 @@ if menu == "📤 Carga de Datos":
                 else:
                     st.warning("No se pudo generar preview de la matriz: " + ", ".join(preview.get('errors', [])))
 
+                if 'CONCEPTO' in df_semanal.columns:
+                    from admin.concepts import render_unmapped_concepts
+                    render_unmapped_concepts(df_semanal['CONCEPTO'], key_prefix="alias_semanal")
+
                 # Validación básica
                 required_cols = ['Empresa', 'Empresa_COD', 'Establecimiento', 'CONCEPTO', 'A. TOTAL']
                 missing_cols = [col for col in required_cols if col not in df_semanal.columns]
@@ -829,6 +833,7 @@ elif menu == "🏢 Empresas":
                                 "UPDATE empresas SET codigo = %s, nombre = %s, color_primario = %s, logo_url = %s WHERE id = %s",
                                 (new_codigo, new_nombre, color_to_save, logo_to_save, empresa_data['id'])
                             )
+                            invalidate_theme_cache(empresa_data['id'])
                             st.success("✅ Empresa actualizada!")
                             st.rerun()
                         except Exception as e:
@@ -942,15 +947,12 @@ elif menu == "🏢 Empresas":
                                     "UPDATE establecimientos SET empresa_id = %s WHERE id = %s",
                                     (target_empresa_data['id'], est_id)
                                 )
-                                # También actualizar datos_semanales y datos_diarios
+                                # También actualizar datos_semanales y los datos diarios
                                 execute_update(
                                     "UPDATE datos_semanales SET empresa_id = %s WHERE establecimiento_id = %s",
                                     (target_empresa_data['id'], est_id)
                                 )
-                                execute_update(
-                                    "UPDATE datos_diarios SET empresa_id = %s WHERE establecimiento_id = %s",
-                                    (target_empresa_data['id'], est_id)
-                                )
+                                move_establecimiento_daily(est_id, target_empresa_data['id'])
                                 st.success(f"✅ Establecimiento movido a {target_empresa_data['nombre']}")
                                 st.rerun()
                             except Exception as e:
@@ -1333,3 +1335,17 @@ elif menu == "📊 Logs":
         )
     else:
         st.info("No hay registros de actividad")
+
+# =====================
+# TAB: RENDIMIENTO
+# =====================
+elif menu == "⏱️ Rendimiento":
+    from admin.performance import render_performance_tab
+    render_performance_tab()
+
+# =====================
+# TAB: EXPORTAR
+# =====================
+elif menu == "📦 Exportar":
+    from admin.exports import render_exports_tab
+    render_exports_tab()
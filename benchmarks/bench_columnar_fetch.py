@@ -0,0 +1,119 @@
+"""Benchmark de la lectura columnar (db_connection.execute_frame).
+
+Carga ~500k filas de datos_diarios en la base de benchmarks
+(benchmarks/bench_db.py, mismos datos que bench_partitions.py) y lee el
+detalle diario completo (etl.DAILY_DETAIL_SQL) de tres formas:
+  dicts          → execute_query (RealDictCursor + fetchall, NUMERIC como
+                   Decimal) + pd.DataFrame(lista de dicts), como antes
+  dicts float    → lo mismo con numeric_as_float=True
+  execute_frame  → cursor de servidor + fetchmany, lotes de tuplas a
+                   columnas tipadas
+
+Para cada una mide el tiempo (mediana), el pico de memoria Python
+(tracemalloc, en una ejecución aparte) y la memoria del DataFrame final.
+También mide etl.load_daily_from_db completo.
+
+Uso:
+    python benchmarks/bench_columnar_fetch.py --filas 500000
+    python benchmarks/bench_columnar_fetch.py --chunk-size 50000 --output benchmarks/results/columnar.json
+"""
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'modules'))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd
+
+import bench_db
+from run import measure, _git_commit
+from bench_partitions import seed
+from synthetic_data import CONCEPTOS_SEMANALES
+
+
+def _peak_mb(fn: Callable) -> float:
+    """Pico de memoria asignada por Python durante fn()."""
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def lecturas(chunk_size: int) -> Dict[str, Callable[[], pd.DataFrame]]:
+    import etl
+    from db_connection import execute_query, execute_frame
+
+    where_clause, params = etl.daily_filters()
+    sql = etl.DAILY_DETAIL_SQL.format(where_clause=where_clause)
+    return {
+        'dicts': lambda: pd.DataFrame(execute_query(sql, params or None)),
+        'dicts float': lambda: pd.DataFrame(execute_query(sql, params or None, numeric_as_float=True)),
+        'execute_frame': lambda: execute_frame(sql, params, categories=['Establecimiento'],
+                                               floats=['valor'], dates=['fecha'],
+                                               chunk_size=chunk_size),
+        'load_daily_from_db': lambda: etl.load_daily_from_db(None, True, storage='filas'),
+    }
+
+
+def bench(args) -> List[Dict]:
+    from compact_frames import frame_bytes
+
+    results = []
+    for nombre, fn in lecturas(args.chunk_size).items():
+        entry = measure(f"{nombre}: detalle diario completo", fn, args.repeat, warmup=1)
+        df = fn()
+        entry['frame_mb'] = round(frame_bytes(df) / 1024 / 1024, 1)
+        del df
+        entry['pico_mb'] = _peak_mb(fn)
+        print(f"    frame={entry['frame_mb']} MB  pico={entry['pico_mb']} MB")
+        results.append(entry)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la lectura columnar")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--filas", type=int, default=500_000, help="Filas aproximadas de datos_diarios")
+    parser.add_argument("--chunk-size", type=int, default=20_000, help="Filas por fetchmany")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/columnar-<commit>.json)")
+    args = parser.parse_args()
+
+    git = _git_commit()
+    bench_db.use_bench_database()
+    bench_db.create_bench_database()
+    por_dia = args.empresas * args.establecimientos * len(CONCEPTOS_SEMANALES)
+    datos = seed(SimpleNamespace(empresas=args.empresas, establecimientos=args.establecimientos,
+                                 anios=args.filas / por_dia / 365))
+    print(f"datos_diarios: {datos['filas']:,} filas\n")
+
+    results = bench(args)
+
+    print(f"\n{'Lectura':<24}{'mediana':>12}{'pico':>12}{'frame':>12}")
+    for r in results:
+        print(f"{r['name'].split(':')[0]:<24}{r['median_ms']:>10.1f}ms"
+              f"{r['pico_mb']:>10.1f}MB{r['frame_mb']:>10.1f}MB")
+
+    report = {
+        'meta': git,
+        'params': {**vars(args), 'filas': datos['filas']},
+        'results': results,
+    }
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"columnar-{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
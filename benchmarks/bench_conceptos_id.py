@@ -0,0 +1,206 @@
+"""Benchmark de datos_diarios con concepto/categoría en texto vs SMALLINT.
+
+Crea la base de benchmarks sin db/migrations/datos_diarios_conceptos_id.sql
+(datos_diarios con categoria / concepto en texto), carga varios años de
+datos diarios sintéticos, mide tamaños y el upsert de una semana, aplica
+la migración (con su tiempo) y repite: mismo upsert con los ids de
+daily_dictionaries, más la lectura de Detalle de un establecimiento.
+
+Uso:
+    python benchmarks/bench_conceptos_id.py --establecimientos 30 --anios 3
+    python benchmarks/bench_conceptos_id.py --output benchmarks/results/conceptos-id.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date, timedelta
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'modules'))
+sys.path.insert(0, BENCH_DIR)
+
+from psycopg2 import extras
+
+import bench_db
+from run import measure, _git_commit, _entry
+from synthetic_data import CONCEPTOS_SEMANALES
+
+ID_MIGRATION = 'db/migrations/datos_diarios_conceptos_id.sql'
+
+UPSERT_SQL = {
+    'texto': """
+        INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria, concepto, valor)
+        VALUES %s
+        ON CONFLICT (establecimiento_id, fecha, concepto) DO UPDATE
+        SET valor = EXCLUDED.valor
+    """,
+    'ids': """
+        INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria_id, concepto_id, valor)
+        VALUES %s
+        ON CONFLICT (establecimiento_id, fecha, concepto_id) DO UPDATE
+        SET valor = EXCLUDED.valor
+    """,
+}
+
+
+def seed(args) -> Dict:
+    """Datos diarios con categoria / concepto en texto (esquema previo a la migración)."""
+    hasta = date.today() - timedelta(days=1)
+    desde = hasta - timedelta(days=365 * args.anios)
+    conceptos = [(cat, concepto) for cat, concepto, *_ in CONCEPTOS_SEMANALES]
+
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO empresas (codigo, nombre)
+                SELECT 'E' || lpad(e::text, 2, '0'), 'Empresa Lechera ' || lpad(e::text, 2, '0')
+                FROM generate_series(1, %s) e
+            """, (args.empresas,))
+            cur.execute("""
+                INSERT INTO establecimientos (empresa_id, nombre)
+                SELECT emp.id, 'Lechería ' || emp.codigo || '-' || lpad(i::text, 3, '0')
+                FROM empresas emp, generate_series(1, %s) i
+            """, (args.establecimientos,))
+            bench_db.seed_conceptos(cur, conceptos)
+            cur.execute("""
+                INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria, concepto, valor)
+                SELECT est.id, est.empresa_id, d::date, c.categoria, c.concepto,
+                       round((random() * 1000)::numeric, 2)
+                FROM establecimientos est
+                CROSS JOIN conceptos_bench c
+                CROSS JOIN generate_series(%s::date, %s::date, INTERVAL '1 day') d
+            """, (desde, hasta))
+            cur.execute("SELECT COUNT(*) FROM datos_diarios")
+            filas = cur.fetchone()[0]
+            cur.execute("VACUUM ANALYZE datos_diarios")
+            cur.execute("SELECT nombre FROM establecimientos ORDER BY id LIMIT 1")
+            establecimiento = cur.fetchone()[0]
+            cur.execute("SELECT id, empresa_id FROM establecimientos")
+            ests = cur.fetchall()
+    finally:
+        conn.close()
+
+    semana = [hasta + timedelta(days=i) for i in range(1, 8)]
+    batch = [(est_id, emp_id, fecha, cat, concepto, 1.0)
+             for est_id, emp_id in ests for fecha in semana for cat, concepto in conceptos]
+    return {'filas': filas, 'hasta': hasta, 'establecimiento': establecimiento,
+            'semana_nueva': semana, 'batch': batch}
+
+
+def _sizes() -> Dict:
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT pg_table_size('datos_diarios'), pg_indexes_size('datos_diarios'),
+                       (SELECT pg_relation_size(i.indexrelid) FROM pg_index i
+                        WHERE i.indrelid = 'datos_diarios'::regclass AND i.indisunique
+                          AND i.indnatts = 3)
+            """)
+            tabla, indices, unico = cur.fetchone()
+    finally:
+        conn.close()
+    mb = lambda b: round(b / 1024 / 1024, 1)
+    return {'tabla_mb': mb(tabla), 'indices_mb': mb(indices), 'indice_unico_mb': mb(unico)}
+
+
+def _upsert(sql: str, batch: List[tuple]):
+    from db_connection import get_connection
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            extras.execute_values(cur, sql, batch, page_size=1000)
+        conn.commit()
+
+
+def _borrar_semana_nueva(datos: Dict):
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM datos_diarios WHERE fecha >= %s", (datos['semana_nueva'][0],))
+            cur.execute("VACUUM ANALYZE datos_diarios")
+    finally:
+        conn.close()
+
+
+def bench_phase(label: str, datos: Dict, batch: List[tuple], repeat: int) -> List[Dict]:
+    sizes = _sizes()
+    print(f"\n[{label}] {sizes}")
+    sql = UPSERT_SQL[label]
+    results = [
+        measure(f"{label}: upsert semana nueva", lambda: _upsert(sql, batch), 1, filas=len(batch)),
+        measure(f"{label}: upsert semana existente", lambda: _upsert(sql, batch), repeat, filas=len(batch)),
+    ]
+    _borrar_semana_nueva(datos)
+    for r in results:
+        r.update(sizes)
+    return results
+
+
+def apply_migration() -> Dict:
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            start = time.perf_counter()
+            with open(os.path.join(bench_db.BASE_DIR, ID_MIGRATION), encoding='utf-8') as f:
+                cur.execute(f.read())
+            tiempo = (time.perf_counter() - start) * 1000
+            cur.execute("VACUUM ANALYZE datos_diarios")
+    finally:
+        conn.close()
+    return _entry("migración datos_diarios_conceptos_id.sql", [tiempo])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concepto/categoría como SMALLINT")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--anios", type=int, default=3, help="Años de datos diarios")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/conceptos-id-<commit>.json)")
+    args = parser.parse_args()
+
+    git = _git_commit()
+    bench_db.use_bench_database()
+    bench_db.create_bench_database(schema_files=[f for f in bench_db.SCHEMA_FILES if f != ID_MIGRATION])
+    datos = seed(args)
+    print(f"datos_diarios: {datos['filas']:,} filas")
+
+    results = bench_phase('texto', datos, datos['batch'], args.repeat)
+    from db_connection import close_pool
+    close_pool()
+    results.append(apply_migration())
+
+    import daily_dictionaries
+    from etl import load_daily_from_db
+    results += bench_phase('ids', datos, daily_dictionaries.encode_batch(datos['batch']), args.repeat)
+    results.append(measure("ids: load_daily_from_db completo (un establecimiento)",
+                           lambda: load_daily_from_db(None, True, establecimiento=datos['establecimiento'],
+                                                      storage='filas'),
+                           args.repeat, warmup=3))
+
+    antes, despues = results[0], results[3]
+    print(f"\n{'':<28}{'texto':>12}{'ids':>12}")
+    for key in ('tabla_mb', 'indices_mb', 'indice_unico_mb'):
+        print(f"{key:<28}{antes[key]:>10.1f}MB{despues[key]:>10.1f}MB")
+    for base, ids in ((results[0], results[3]), (results[1], results[4])):
+        nombre = base['name'].split(': ', 1)[1]
+        print(f"{nombre:<28}{base['median_ms']:>10.1f}ms{ids['median_ms']:>10.1f}ms")
+
+    report = {
+        'meta': git,
+        'params': {**vars(args), 'filas': datos['filas']},
+        'results': results,
+    }
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"conceptos-id-{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
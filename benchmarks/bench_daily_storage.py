@@ -0,0 +1,165 @@
+"""Benchmark de almacenamiento de datos diarios: filas vs arreglos semanales.
+
+Carga varios años de datos diarios sintéticos en la base de benchmarks
+(benchmarks/bench_db.py, mismos datos que bench_partitions.py), aplica
+db/migrations/datos_diarios_semana.sql (que copia datos_diarios a
+datos_diarios_semana) y compara:
+  - tamaño de tabla e índices de datos_diarios vs datos_diarios_semana
+  - lecturas de Detalle (etl.load_daily_from_db con storage='filas' /
+    'semana'), verificando que los dos DataFrames sean iguales
+  - upsert de una semana (el de process_semanal en cada modo)
+
+Uso:
+    python benchmarks/bench_daily_storage.py --establecimientos 30 --anios 3
+    python benchmarks/bench_daily_storage.py --output benchmarks/results/almacenamiento.json
+"""
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'modules'))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd
+
+import bench_db
+from run import measure, _git_commit
+from bench_partitions import seed, _upsert
+
+STORAGE_MIGRATION = 'db/migrations/datos_diarios_semana.sql'
+TABLES = {'filas': 'datos_diarios', 'semana': 'datos_diarios_semana'}
+
+
+def _sizes(tabla: str) -> Dict:
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT COUNT(*), pg_table_size(%s), pg_indexes_size(%s) FROM {tabla}",
+                        (tabla, tabla))
+            filas, heap, indexes = cur.fetchone()
+    finally:
+        conn.close()
+    return {'filas': filas, 'tabla_mb': round(heap / 1024 / 1024, 1),
+            'indices_mb': round(indexes / 1024 / 1024, 1)}
+
+
+def _same_frame(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Mismas filas, columnas y valores (NUMERIC vs FLOAT8 comparados como float)."""
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    keys = ['Establecimiento', 'CATEGORIA', 'CONCEPTO']
+    a = a.sort_values(keys).reset_index(drop=True)
+    b = b.sort_values(keys).reset_index(drop=True)
+    valores = [c for c in a.columns if c not in keys]
+    return (a[keys].equals(b[keys])
+            and ((a[valores].astype(float) - b[valores].astype(float)).abs().fillna(0) < 1e-6).all().all())
+
+
+def apply_migration():
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            with open(os.path.join(bench_db.BASE_DIR, STORAGE_MIGRATION), encoding='utf-8') as f:
+                cur.execute(f.read())
+            cur.execute("VACUUM ANALYZE datos_diarios")
+            cur.execute("VACUUM ANALYZE datos_diarios_semana")
+    finally:
+        conn.close()
+
+
+def bench_reads(datos: Dict, repeat: int) -> List[Dict]:
+    from etl import load_daily_from_db
+
+    desde, hasta = datos['semana_lectura']
+    est = datos['establecimiento']
+    lecturas = {
+        'semana (todos)': dict(fecha_desde=desde, fecha_hasta=hasta),
+        'semana (un establecimiento)': dict(establecimiento=est, fecha_desde=desde, fecha_hasta=hasta),
+        'completo (un establecimiento)': dict(establecimiento=est),
+    }
+    results = []
+    for nombre, filtros in lecturas.items():
+        frames = {}
+        for storage in TABLES:
+            entry = measure(f"{storage}: load_daily_from_db {nombre}",
+                            lambda: load_daily_from_db(None, True, storage=storage, **filtros),
+                            repeat, warmup=3)
+            frames[storage] = load_daily_from_db(None, True, storage=storage, **filtros)
+            results.append(entry)
+        iguales = _same_frame(frames['filas'], frames['semana'])
+        print(f"  → mismo DataFrame en los dos modos: {'sí' if iguales else 'NO'}")
+        results[-1]['igual_a_filas'] = iguales
+    return results
+
+
+def bench_upserts(datos: Dict, repeat: int) -> List[Dict]:
+    from excel_processor import ExcelProcessor
+    processor = ExcelProcessor()
+    batch = datos['batch']
+    escribir = {
+        'filas': lambda: _upsert(batch, multirow=True),
+        'semana': lambda: processor._upsert_diarios_semana(batch),
+    }
+    results = []
+    for nombre, veces in (('semana nueva', 1), ('semana existente', repeat)):
+        for storage, fn in escribir.items():
+            results.append(measure(f"{storage}: upsert {nombre}", fn, veces, filas=len(batch)))
+
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM datos_diarios WHERE fecha >= %s", (datos['semana_nueva'][0],))
+            cur.execute("DELETE FROM datos_diarios_semana WHERE semana_inicio + 6 >= %s",
+                        (datos['semana_nueva'][0],))
+    finally:
+        conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de almacenamiento de datos diarios")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--anios", type=int, default=3, help="Años de datos diarios")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/almacenamiento-<commit>.json)")
+    args = parser.parse_args()
+
+    git = _git_commit()
+    bench_db.use_bench_database()
+    bench_db.create_bench_database()
+    datos = seed(args)
+    apply_migration()
+
+    tamanos = {storage: _sizes(tabla) for storage, tabla in TABLES.items()}
+    print(f"\n{'Tabla':<24}{'filas':>12}{'tabla':>12}{'índices':>12}")
+    for storage, tabla in TABLES.items():
+        t = tamanos[storage]
+        print(f"{tabla:<24}{t['filas']:>12,}{t['tabla_mb']:>10.1f}MB{t['indices_mb']:>10.1f}MB")
+    print()
+
+    results = bench_reads(datos, args.repeat) + bench_upserts(datos, args.repeat)
+
+    print(f"\n{'Medición':<44}{'filas':>12}{'semana':>12}")
+    for base, semana in zip(results[0::2], results[1::2]):
+        nombre = base['name'].split(': ', 1)[1]
+        print(f"{nombre:<44}{base['median_ms']:>10.1f}ms{semana['median_ms']:>10.1f}ms")
+
+    report = {
+        'meta': git,
+        'params': {**vars(args), 'filas': datos['filas']},
+        'sizes': tamanos,
+        'results': results,
+    }
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"almacenamiento-{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Base de datos PostgreSQL local para los benchmarks.
+
+Crea (o recrea) una base dedicada, por defecto 'integra_bench', con el
+esquema de db/schema y las migraciones que usan los loaders. Usa el
+host/usuario/clave de DB_CONFIG (variables DB_*), pero NUNCA la base de
+DB_NAME: los benchmarks escriben datos y no deben tocar la base real.
+use_bench_database() redirige DB_CONFIG (y con él db_connection) a la
+base de benchmarks.
+
+Uso:
+    python benchmarks/bench_db.py            # recrea integra_bench
+    BENCH_DB_NAME=otra python benchmarks/bench_db.py
+"""
+import os
+import sys
+
+import psycopg2
+from psycopg2 import sql
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+from config import DB_CONFIG
+
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', 'integra_bench')
+# Base real de la aplicación (la de DB_NAME), capturada antes de redirigir
+MAIN_DB_NAME = DB_CONFIG['database']
+
+# Orden de aplicación (rutas relativas a la raíz del repo)
+SCHEMA_FILES = [
+    'db/schema/schema.sql',
+    'db/schema/create_historico_table.sql',
+    'db/schema/add_logs_table.sql',
+    'db/migrations/add_superficie_to_semanal.sql',
+    'db/migrations/upgrade_columns_with_view.sql',
+    'db/migrations/create_config_table.sql',
+    'db/migrations/add_theme_columns.sql',
+    'db/migrations/create_query_stats_table.sql',
+    'db/migrations/create_data_version_table.sql',
+    'db/migrations/create_concepto_alias_table.sql',
+    'db/migrations/historico_establecimiento_id.sql',
+    'db/migrations/datos_diarios_semana.sql',
+    'db/migrations/datos_diarios_conceptos_id.sql',
+]
+
+# Columnas y restricciones que ExcelProcessor / HistoricoProcessor
+# esperan y que en producción se agregaron fuera de db/schema.
+SCHEMA_FIXUPS = [
+    "ALTER TABLE datos_semanales ADD COLUMN IF NOT EXISTS fecha_inicio DATE",
+    "ALTER TABLE datos_semanales ADD COLUMN IF NOT EXISTS fecha_fin DATE",
+    "ALTER TABLE datos_historicos ALTER COLUMN empresa DROP NOT NULL",
+]
+
+
+def _connect(database: str):
+    params = dict(DB_CONFIG)
+    params['database'] = database
+    conn = psycopg2.connect(**params)
+    conn.autocommit = True
+    return conn
+
+
+def _check_not_main(name: str):
+    if name == MAIN_DB_NAME:
+        raise RuntimeError(
+            f"La base de benchmarks '{name}' coincide con DB_NAME; "
+            "usa BENCH_DB_NAME para apuntar a una base dedicada."
+        )
+
+
+def use_bench_database(name: str = BENCH_DB_NAME):
+    """Hace que db_connection / async_db se conecten a la base de benchmarks."""
+    _check_not_main(name)
+    DB_CONFIG['database'] = name
+    # Si el pool ya se abrió contra la base real (p. ej. el catálogo de
+    # conceptos la consulta al construir la matriz), cerrarlo para reabrirlo
+    # y descartar lo que se haya cacheado de ella
+    import db_connection
+    import data_version
+    import concept_catalog
+    db_connection.close_pool()
+    data_version.invalidate_data_versions()
+    concept_catalog.invalidate_index()
+
+
+def create_bench_database(name: str = BENCH_DB_NAME, drop: bool = True, schema_files=None):
+    """Crea la base de benchmarks y le aplica el esquema (SCHEMA_FILES por defecto)."""
+    _check_not_main(name)
+
+    admin = _connect('postgres')
+    try:
+        with admin.cursor() as cur:
+            if drop:
+                cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(name)))
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+            if cur.fetchone() is None:
+                cur.execute(sql.SQL("CREATE DATABASE {} ENCODING 'UTF8' TEMPLATE template0")
+                            .format(sql.Identifier(name)))
+    finally:
+        admin.close()
+
+    conn = _connect(name)
+    try:
+        with conn.cursor() as cur:
+            for rel_path in (SCHEMA_FILES if schema_files is None else schema_files):
+                with open(os.path.join(BASE_DIR, rel_path), encoding='utf-8') as f:
+                    cur.execute(f.read())
+            for stmt in SCHEMA_FIXUPS:
+                cur.execute(stmt)
+    finally:
+        conn.close()
+
+
+def truncate_data(name: str = BENCH_DB_NAME):
+    """Vacía las tablas de datos (mantiene esquema y configuración)."""
+    _check_not_main(name)
+    conn = _connect(name)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                TRUNCATE datos_diarios, datos_diarios_semana, datos_semanales, datos_historicos,
+                         establecimientos, empresas RESTART IDENTITY CASCADE
+            """)
+    finally:
+        conn.close()
+
+
+def seed_conceptos(cur, conceptos):
+    """
+    Carga (categoria, concepto) en los diccionarios y deja la tabla
+    temporal conceptos_bench (categoria_id, concepto_id) para generar
+    datos_diarios con generate_series.
+    """
+    from psycopg2 import extras
+    cur.execute("INSERT INTO categorias (nombre) SELECT DISTINCT unnest(%s::text[]) ON CONFLICT DO NOTHING",
+                ([cat for cat, _ in conceptos],))
+    cur.execute("INSERT INTO conceptos (nombre) SELECT DISTINCT unnest(%s::text[]) ON CONFLICT DO NOTHING",
+                ([concepto for _, concepto in conceptos],))
+    cur.execute("CREATE TEMP TABLE conceptos_bench (categoria TEXT, concepto TEXT)")
+    extras.execute_values(cur, "INSERT INTO conceptos_bench VALUES %s", conceptos)
+    cur.execute("""
+        ALTER TABLE conceptos_bench
+            ADD COLUMN categoria_id SMALLINT, ADD COLUMN concepto_id SMALLINT
+    """)
+    cur.execute("""
+        UPDATE conceptos_bench cb
+        SET categoria_id = (SELECT id FROM categorias WHERE nombre = cb.categoria),
+            concepto_id = (SELECT id FROM conceptos WHERE nombre = cb.concepto)
+    """)
+
+
+if __name__ == '__main__':
+    create_bench_database()
+    print(f"Base '{BENCH_DB_NAME}' creada en {DB_CONFIG['host']}:{DB_CONFIG['port']}")
@@ -0,0 +1,147 @@
+"""Benchmark de memoria por sesión de la página principal (app_rls).
+
+Carga histórico y reportes semanales sintéticos en la base de benchmarks
+(benchmarks/bench_db.py, como run.py --db) y arma los frames que la
+página mantiene en cada rerun de una sesión:
+  df_long, df_hist, la matriz y el detalle diario (todos + uno)
+
+en dos variantes:
+  objeto   → pd.DataFrame(filas del driver) tal cual (Decimal y textos
+             por fila en columnas object) más las .copy() que hacía la página
+  compacto → etl.week_frame / historic_frame / load_daily_from_db
+             (compact_frames: float64 + category), sin las copias
+
+y reporta la memoria (deep) con compact_frames.memory_report.
+
+Uso:
+    python benchmarks/bench_page_memory.py --empresas 5 --establecimientos 20 --semanas 4
+    python benchmarks/bench_page_memory.py --output benchmarks/results/memoria.json
+"""
+import io
+import os
+import sys
+import json
+import argparse
+from typing import Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'modules'))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd
+
+import bench_db
+from run import _git_commit, generar_datos
+
+
+def seed(datos: Dict):
+    from excel_processor import ExcelProcessor
+    from historico_processor import HistoricoProcessor
+
+    df_hist_excel = pd.read_excel(io.BytesIO(datos['hist_xlsx']), sheet_name="SIC PROM")
+    result = HistoricoProcessor().process_historico(df_hist_excel)
+    if not result['success']:
+        raise RuntimeError("process_historico falló: " + "\n".join(result['errors']))
+    for week_xlsx in datos['week_xlsx']:
+        result = ExcelProcessor().process_semanal(pd.read_excel(io.BytesIO(week_xlsx)))
+        if not result['success']:
+            raise RuntimeError("process_semanal falló: " + "\n".join(result['errors']))
+
+
+def _daily_objeto(rows) -> pd.DataFrame:
+    """Pivot del detalle diario sobre los Decimal del driver (como antes de compact_frames)."""
+    import daily_dictionaries
+    df = pd.DataFrame(rows)
+    df['CATEGORIA'] = daily_dictionaries.decode('categorias', df.pop('categoria_id'))
+    df['CONCEPTO'] = daily_dictionaries.decode('conceptos', df.pop('concepto_id'))
+    df = df.pivot_table(index=['Establecimiento', 'CATEGORIA', 'CONCEPTO'], columns='fecha',
+                        values='valor', aggfunc='first').reset_index()
+    df = df.rename(columns={c: c.strftime('%d-%m-%Y') for c in df.columns if hasattr(c, 'strftime')})
+    df['A. TOTAL'] = df.iloc[:, 3:].sum(axis=1, skipna=True)
+    return df
+
+
+def page_frames(variante: str) -> Dict[str, pd.DataFrame]:
+    import etl
+    from db_connection import execute_query
+    from matrix_builder import build_matrix
+
+    semana = execute_query(etl.WEEK_MAX_SQL, fetch_one=True)
+    week_rows = execute_query(etl.WEEK_UNPIVOT_SQL, etl.week_params(semana['semana'], semana['anio']))
+    hist_rows = execute_query(etl.HISTORIC_SQL)
+
+    if variante == 'compacto':
+        df_long = etl.week_frame(week_rows)
+        df_hist = etl.historic_frame(hist_rows)
+        df_daily_all = etl.load_daily_from_db(None, True)
+    else:
+        df_long = pd.DataFrame(week_rows)
+        df_hist = pd.DataFrame(hist_rows)
+        for col in ["MDAT", "Vacas en ordeña"]:
+            df_hist[col] = pd.to_numeric(df_hist[col], errors="coerce")
+        where_clause, params = etl.daily_filters()
+        df_daily_all = _daily_objeto(execute_query(etl.DAILY_DETAIL_SQL.format(where_clause=where_clause),
+                                                   params or None))
+
+    est = sorted(df_long["Establecimiento"].unique())[0]
+    frames = {'df_long': df_long, 'df_hist': df_hist}
+    if variante == 'compacto':
+        frames['df_matrix'] = build_matrix(df_long, df_hist=df_hist)
+        frames['df_daily_all'] = df_daily_all
+        frames['df_daily'] = df_daily_all[df_daily_all["Establecimiento"] == est]
+    else:
+        frames['df_long_filtered'] = df_long[df_long["Establecimiento"].isin(df_long["Establecimiento"])].copy()
+        frames['df_matrix'] = build_matrix(frames['df_long_filtered'], df_hist=df_hist).copy()
+        frames['df_daily_all'] = df_daily_all
+        frames['df_daily'] = df_daily_all[df_daily_all["Establecimiento"] == est].copy()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria de la página principal")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--semanas", type=int, default=4, help="Reportes semanales a cargar")
+    parser.add_argument("--semanas-historico", type=int, default=40)
+    parser.add_argument("--anio", type=int, default=2025)
+    parser.add_argument("--conceptos-extra", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/memoria-<commit>.json)")
+    args = parser.parse_args()
+
+    if args.semanas_historico + args.semanas > 52:
+        parser.error("--semanas-historico + --semanas debe ser <= 52 (semanas ISO de un año)")
+
+    git = _git_commit()
+    datos = generar_datos(args)
+    bench_db.use_bench_database()
+    bench_db.create_bench_database()
+    seed(datos)
+
+    from compact_frames import memory_report
+
+    reportes = {}
+    for variante in ('objeto', 'compacto'):
+        reportes[variante] = memory_report(page_frames(variante))
+        print(f"\n[{variante}]")
+        print(reportes[variante].to_string(index=False))
+
+    antes = reportes['objeto']['MB'].iloc[-1]
+    despues = reportes['compacto']['MB'].iloc[-1]
+    print(f"\nMemoria por sesión: {antes:.2f} MB → {despues:.2f} MB "
+          f"({(despues / antes - 1) * 100:+.1f}%)")
+
+    report = {
+        'meta': git,
+        'params': vars(args),
+        'results': {variante: df.to_dict(orient='records') for variante, df in reportes.items()},
+    }
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"memoria-{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""Benchmark de datos_diarios con y sin particionado por fecha.
+
+Carga varios años de datos diarios sintéticos en la base de benchmarks
+(benchmarks/bench_db.py), mide las lecturas de load_daily_from_db y el
+upsert de una semana (el mismo INSERT ... ON CONFLICT de process_semanal),
+aplica db/migrations/partition_datos_diarios.sql y repite las mediciones.
+
+Uso:
+    python benchmarks/bench_partitions.py --establecimientos 30 --anios 3
+    python benchmarks/bench_partitions.py --output benchmarks/results/particiones.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import date, timedelta
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'modules'))
+sys.path.insert(0, BENCH_DIR)
+
+from psycopg2 import extras
+
+import bench_db
+from run import measure, _git_commit
+from synthetic_data import CONCEPTOS_SEMANALES
+
+PARTITION_MIGRATION = 'db/migrations/partition_datos_diarios.sql'
+
+UPSERT_SQL = """
+    INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria_id, concepto_id, valor)
+    VALUES {}
+    ON CONFLICT (establecimiento_id, fecha, concepto_id) DO UPDATE
+    SET valor = EXCLUDED.valor
+"""
+
+RE_SCANS = re.compile(r"on (datos_diarios\w*)")
+
+
+def seed(args) -> Dict:
+    """Empresas, establecimientos y `anios` de datos diarios hasta ayer."""
+    hasta = date.today() - timedelta(days=1)
+    desde = hasta - timedelta(days=365 * args.anios)
+    conceptos = [(cat, concepto) for cat, concepto, *_ in CONCEPTOS_SEMANALES]
+
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO empresas (codigo, nombre)
+                SELECT 'E' || lpad(e::text, 2, '0'), 'Empresa Lechera ' || lpad(e::text, 2, '0')
+                FROM generate_series(1, %s) e
+            """, (args.empresas,))
+            cur.execute("""
+                INSERT INTO establecimientos (empresa_id, nombre)
+                SELECT emp.id, 'Lechería ' || emp.codigo || '-' || lpad(i::text, 3, '0')
+                FROM empresas emp, generate_series(1, %s) i
+            """, (args.establecimientos,))
+            bench_db.seed_conceptos(cur, conceptos)
+            cur.execute("""
+                INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria_id, concepto_id, valor)
+                SELECT est.id, est.empresa_id, d::date, c.categoria_id, c.concepto_id,
+                       round((random() * 1000)::numeric, 2)
+                FROM establecimientos est
+                CROSS JOIN conceptos_bench c
+                CROSS JOIN generate_series(%s::date, %s::date, INTERVAL '1 day') d
+            """, (desde, hasta))
+            cur.execute("SELECT COUNT(*) FROM datos_diarios")
+            filas = cur.fetchone()[0]
+            cur.execute("ANALYZE")
+            cur.execute("SELECT nombre FROM establecimientos ORDER BY id LIMIT 1")
+            establecimiento = cur.fetchone()[0]
+            cur.execute("SELECT id, empresa_id FROM establecimientos")
+            ests = cur.fetchall()
+    finally:
+        conn.close()
+
+    # Semana nueva (siguiente a la última cargada) para medir el upsert,
+    # con concepto / categoría como ids (igual que en process_semanal)
+    import daily_dictionaries
+    semana = [hasta + timedelta(days=i) for i in range(1, 8)]
+    batch = daily_dictionaries.encode_batch([
+        (est_id, emp_id, fecha, cat, concepto, 1.0)
+        for est_id, emp_id in ests for fecha in semana for cat, concepto in conceptos
+    ])
+    return {
+        'filas': filas,
+        'desde': desde,
+        'hasta': hasta,
+        'establecimiento': establecimiento,
+        'semana_lectura': (hasta - timedelta(days=6), hasta),
+        'semana_nueva': semana,
+        'batch': batch,
+    }
+
+
+def _upsert(batch: List[tuple], multirow: bool = False):
+    """Una sentencia por fila (execute_batch) o por página (execute_values)."""
+    from db_connection import get_connection
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if multirow:
+                extras.execute_values(cur, UPSERT_SQL.format('%s'), batch, page_size=1000)
+            else:
+                extras.execute_batch(cur, UPSERT_SQL.format('(%s, %s, %s, %s, %s, %s)'), batch,
+                                     page_size=1000)
+        conn.commit()
+
+
+def _explain_scans(query: str, params: tuple) -> List[str]:
+    """Tablas/particiones de datos_diarios que recorre el plan."""
+    from db_connection import get_connection
+    with get_connection(None, True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN " + query, params)
+            plan = "\n".join(r[0] for r in cur.fetchall())
+    return sorted(set(RE_SCANS.findall(plan)))
+
+
+def _unique_index_mb(fecha: date) -> float:
+    """Tamaño del índice único que recorre el ON CONFLICT de una semana de `fecha`."""
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT pg_relation_size(i.indexrelid)
+                FROM pg_index i
+                WHERE i.indisunique AND i.indnatts = 3
+                  AND i.indrelid = COALESCE(
+                      (SELECT c.oid FROM pg_inherits h JOIN pg_class c ON c.oid = h.inhrelid
+                       WHERE h.inhparent = 'datos_diarios'::regclass
+                         AND c.relname = 'datos_diarios_' || to_char(%s::date, 'YYYY_MM')),
+                      'datos_diarios'::regclass)
+            """, (fecha,))
+            return round(cur.fetchone()[0] / 1024 / 1024, 2)
+    finally:
+        conn.close()
+
+
+def _sizes() -> Dict:
+    row = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with row.cursor() as cur:
+            cur.execute("""
+                SELECT COALESCE(SUM(pg_relation_size(c.oid)), pg_relation_size('datos_diarios')),
+                       COALESCE(SUM(pg_indexes_size(c.oid)), pg_indexes_size('datos_diarios'))
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'datos_diarios'::regclass
+            """)
+            heap, indexes = cur.fetchone()
+    finally:
+        row.close()
+    return {'heap_mb': round(heap / 1024 / 1024, 1), 'indices_mb': round(indexes / 1024 / 1024, 1)}
+
+
+def _retencion_heap(cutoff: date):
+    """DELETE del período antiguo (revertido para no alterar los datos)."""
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM datos_diarios WHERE fecha < %s", (cutoff,))
+            return cur.rowcount
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def _retencion_particionada(cutoff: date):
+    import partition_manager
+    return len(partition_manager.detach_partitions(cutoff, mode='drop'))
+
+
+def bench_phase(label: str, datos: Dict, repeat: int) -> List[Dict]:
+    from etl import load_daily_from_db
+
+    desde, hasta = datos['semana_lectura']
+    est = datos['establecimiento']
+    results = []
+    print(f"\n[{label}] {_sizes()}")
+
+    results.append(measure(f"{label}: load_daily_from_db semana (todos)",
+                           lambda: load_daily_from_db(None, True, fecha_desde=desde, fecha_hasta=hasta),
+                           repeat, warmup=3))
+    results.append(measure(f"{label}: load_daily_from_db semana (un establecimiento)",
+                           lambda: load_daily_from_db(None, True, establecimiento=est,
+                                                      fecha_desde=desde, fecha_hasta=hasta),
+                           repeat, warmup=3))
+    results.append(measure(f"{label}: load_daily_from_db completo (un establecimiento)",
+                           lambda: load_daily_from_db(None, True, establecimiento=est),
+                           repeat, warmup=3))
+
+    # Upsert de una semana nueva (INSERT) y repetido (ON CONFLICT UPDATE)
+    results.append(measure(f"{label}: upsert semana nueva", lambda: _upsert(datos['batch']), 1,
+                           filas=len(datos['batch'])))
+    results.append(measure(f"{label}: upsert semana existente", lambda: _upsert(datos['batch']), repeat,
+                           filas=len(datos['batch'])))
+    results.append(measure(f"{label}: upsert semana existente (multi-fila)",
+                           lambda: _upsert(datos['batch'], multirow=True), repeat,
+                           filas=len(datos['batch'])))
+
+    scans = _explain_scans(
+        "SELECT dd.fecha, dd.valor FROM datos_diarios dd "
+        "JOIN establecimientos est ON dd.establecimiento_id = est.id "
+        "WHERE dd.fecha >= %s AND dd.fecha <= %s", (desde, hasta))
+    print(f"  Tablas recorridas por la lectura semanal: {', '.join(scans)}")
+    indice_mb = _unique_index_mb(hasta)
+    print(f"  Índice único que recorre el upsert: {indice_mb} MB")
+    for r in results:
+        r.update(_sizes())
+    results[0]['tablas_recorridas'] = scans
+    results[0]['indice_unico_mb'] = indice_mb
+
+    # Dejar los datos como estaban para la fase siguiente
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM datos_diarios WHERE fecha >= %s", (datos['semana_nueva'][0],))
+            cur.execute("VACUUM ANALYZE datos_diarios")
+    finally:
+        conn.close()
+    return results
+
+
+def apply_partitioning():
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            with open(os.path.join(bench_db.BASE_DIR, PARTITION_MIGRATION), encoding='utf-8') as f:
+                cur.execute(f.read())
+            cur.execute("VACUUM ANALYZE datos_diarios")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de particionado de datos_diarios")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--anios", type=int, default=3, help="Años de datos diarios")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/particiones-<commit>.json)")
+    args = parser.parse_args()
+
+    git = _git_commit()
+    bench_db.use_bench_database()
+    bench_db.create_bench_database()
+    datos = seed(args)
+    print(f"datos_diarios: {datos['filas']:,} filas ({datos['desde']} → {datos['hasta']})")
+
+    # Retención: eliminar el primer año de datos
+    cutoff = date(datos['desde'].year + 1, datos['desde'].month, 1)
+
+    results = bench_phase("heap", datos, args.repeat)
+    results.append(measure("heap: retención (DELETE primer año)", lambda: _retencion_heap(cutoff), 1))
+    from db_connection import close_pool
+    close_pool()
+    apply_partitioning()
+    results += bench_phase("particionada", datos, args.repeat)
+    results.append(measure("particionada: retención (DROP particiones primer año)",
+                           lambda: _retencion_particionada(cutoff), 1))
+
+    print(f"\n{'Medición':<52}{'heap':>12}{'particionada':>14}")
+    n = len(results) // 2
+    for base, part in zip(results[:n], results[n:]):
+        nombre = base['name'].split(': ', 1)[1].split(' (DELETE')[0]
+        print(f"{nombre:<52}{base['median_ms']:>10.1f}ms{part['median_ms']:>12.1f}ms")
+
+    report = {
+        'meta': git,
+        'params': {**vars(args), 'filas': datos['filas']},
+        'results': results,
+    }
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"particiones-{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
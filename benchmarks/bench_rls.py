@@ -0,0 +1,209 @@
+"""Benchmark de las políticas RLS: subconsulta a usuario_empresa vs app.empresa_ids.
+
+Carga ~1M filas de datos_diarios en la base de benchmarks
+(benchmarks/bench_db.py), y con un rol sin BYPASSRLS corre
+EXPLAIN (ANALYZE, BUFFERS) de las consultas de Detalle con las políticas
+de db/schema/schema.sql; luego aplica db/migrations/rls_empresa_ids.sql
+y repite. Reporta el Execution Time (mediana) y si el plan evalúa la
+política con SubPlan (por fila) o InitPlan (una vez por consulta).
+
+Uso:
+    python benchmarks/bench_rls.py --empresas 20 --establecimientos 5 --dias 400
+    python benchmarks/bench_rls.py --output benchmarks/results/rls.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+from datetime import date, timedelta
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'modules'))
+sys.path.insert(0, BENCH_DIR)
+
+import bench_db
+from run import _git_commit
+from synthetic_data import CONCEPTOS_SEMANALES
+
+RLS_MIGRATION = 'db/migrations/rls_empresa_ids.sql'
+READER_ROLE = 'bench_rls_reader'
+
+
+def seed(args) -> Dict:
+    """Empresas, establecimientos, `dias` de datos diarios y un usuario con `empresas_usuario` empresas."""
+    hasta = date.today() - timedelta(days=1)
+    desde = hasta - timedelta(days=args.dias - 1)
+    conceptos = [(cat, concepto) for cat, concepto, *_ in CONCEPTOS_SEMANALES]
+
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO empresas (codigo, nombre)
+                SELECT 'E' || lpad(e::text, 2, '0'), 'Empresa Lechera ' || lpad(e::text, 2, '0')
+                FROM generate_series(1, %s) e
+            """, (args.empresas,))
+            cur.execute("""
+                INSERT INTO establecimientos (empresa_id, nombre)
+                SELECT emp.id, 'Lechería ' || emp.codigo || '-' || lpad(i::text, 3, '0')
+                FROM empresas emp, generate_series(1, %s) i
+            """, (args.establecimientos,))
+            bench_db.seed_conceptos(cur, conceptos)
+            cur.execute("""
+                INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria_id, concepto_id, valor)
+                SELECT est.id, est.empresa_id, d::date, c.categoria_id, c.concepto_id,
+                       round((random() * 1000)::numeric, 2)
+                FROM establecimientos est
+                CROSS JOIN conceptos_bench c
+                CROSS JOIN generate_series(%s::date, %s::date, INTERVAL '1 day') d
+            """, (desde, hasta))
+            cur.execute("SELECT COUNT(*) FROM datos_diarios")
+            filas = cur.fetchone()[0]
+
+            cur.execute("""
+                INSERT INTO usuarios (username, password_hash)
+                VALUES ('bench_rls', 'x') RETURNING id
+            """)
+            usuario_id = cur.fetchone()[0]
+            cur.execute("""
+                INSERT INTO usuario_empresa (usuario_id, empresa_id)
+                SELECT %s, id FROM empresas ORDER BY id LIMIT %s
+            """, (usuario_id, args.empresas_usuario))
+            cur.execute("""
+                SELECT est.nombre FROM establecimientos est
+                JOIN usuario_empresa ue ON ue.empresa_id = est.empresa_id
+                WHERE ue.usuario_id = %s ORDER BY est.id LIMIT 1
+            """, (usuario_id,))
+            establecimiento = cur.fetchone()[0]
+
+            # El dueño de las tablas (y un superusuario) no pasa por RLS
+            cur.execute(f"DROP ROLE IF EXISTS {READER_ROLE}")
+            cur.execute(f"CREATE ROLE {READER_ROLE} NOLOGIN")
+            cur.execute(f"GRANT SELECT ON ALL TABLES IN SCHEMA public TO {READER_ROLE}")
+            cur.execute("VACUUM ANALYZE")
+    finally:
+        conn.close()
+
+    return {
+        'filas': filas,
+        'usuario_id': usuario_id,
+        'establecimiento': establecimiento,
+        'semana': (hasta - timedelta(days=6), hasta),
+    }
+
+
+def queries(datos: Dict) -> List[tuple]:
+    """(nombre, sql, params) de las consultas de Detalle (etl.load_daily_from_db)."""
+    from etl import DAILY_DETAIL_SQL, daily_filters
+
+    desde, hasta = datos['semana']
+    result = [("conteo completo", "SELECT COUNT(*) FROM datos_diarios", ())]
+    for nombre, filtros in (
+        ("detalle completo", {}),
+        ("detalle semana", {'fecha_desde': desde, 'fecha_hasta': hasta}),
+        ("detalle un establecimiento", {'establecimiento': datos['establecimiento']}),
+    ):
+        where_clause, params = daily_filters(**filtros)
+        result.append((nombre, DAILY_DETAIL_SQL.format(where_clause=where_clause), params))
+    return result
+
+
+def _plan_nodes(plan: Dict) -> List[str]:
+    """Tipos de subplan del árbol (SubPlan / InitPlan)."""
+    found = []
+    rel = plan.get('Parent Relationship')
+    if rel in ('SubPlan', 'InitPlan'):
+        found.append(f"{rel}{' (hashed)' if 'hashed' in plan.get('Subplan Name', '') else ''}")
+    for child in plan.get('Plans', []):
+        found.extend(_plan_nodes(child))
+    return found
+
+
+def explain(datos: Dict, is_admin: bool, repeat: int) -> List[Dict]:
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    results = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_user_context(%s, %s)", (datos['usuario_id'], is_admin))
+            cur.execute(f"SET ROLE {READER_ROLE}")
+            for nombre, query, params in queries(datos):
+                tiempos = []
+                plan = None
+                for _ in range(repeat + 1):  # la primera calienta el cache
+                    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+                    plan = cur.fetchone()[0][0]
+                    tiempos.append(plan['Execution Time'])
+                tiempos = tiempos[1:]
+                entry = {
+                    'name': nombre,
+                    'is_admin': is_admin,
+                    'execution_ms': round(statistics.median(tiempos), 3),
+                    'planning_ms': round(plan['Planning Time'], 3),
+                    'rows': plan['Plan'].get('Actual Rows'),
+                    'subplans': sorted(set(_plan_nodes(plan['Plan']))),
+                }
+                print(f"  {nombre:<30} {'admin' if is_admin else 'usuario':<8}"
+                      f"{entry['execution_ms']:>10.1f} ms  {', '.join(entry['subplans']) or '-'}")
+                results.append(entry)
+            cur.execute("RESET ROLE")
+    finally:
+        conn.close()
+    return results
+
+
+def apply_migration():
+    conn = bench_db._connect(bench_db.BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cur:
+            with open(os.path.join(bench_db.BASE_DIR, RLS_MIGRATION), encoding='utf-8') as f:
+                cur.execute(f.read())
+            cur.execute(f"GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public TO {READER_ROLE}")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de políticas RLS")
+    parser.add_argument("--empresas", type=int, default=20)
+    parser.add_argument("--establecimientos", type=int, default=5, help="Por empresa")
+    parser.add_argument("--dias", type=int, default=400, help="Días de datos diarios")
+    parser.add_argument("--empresas-usuario", type=int, default=3, help="Empresas visibles del usuario")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/rls-<commit>.json)")
+    args = parser.parse_args()
+
+    git = _git_commit()
+    bench_db.use_bench_database()
+    bench_db.create_bench_database()
+    datos = seed(args)
+    print(f"datos_diarios: {datos['filas']:,} filas; usuario con {args.empresas_usuario} "
+          f"de {args.empresas} empresas")
+
+    fases = {}
+    print("\n[subconsulta usuario_empresa (schema.sql)]")
+    fases['subconsulta'] = explain(datos, False, args.repeat) + explain(datos, True, args.repeat)
+    apply_migration()
+    print("\n[app.empresa_ids (rls_empresa_ids.sql)]")
+    fases['empresa_ids'] = explain(datos, False, args.repeat) + explain(datos, True, args.repeat)
+
+    print(f"\n{'Consulta':<40}{'subconsulta':>14}{'empresa_ids':>14}")
+    for antes, despues in zip(fases['subconsulta'], fases['empresa_ids']):
+        nombre = f"{antes['name']} ({'admin' if antes['is_admin'] else 'usuario'})"
+        print(f"{nombre:<40}{antes['execution_ms']:>12.1f}ms{despues['execution_ms']:>12.1f}ms")
+
+    report = {
+        'meta': git,
+        'params': {**vars(args), 'filas': datos['filas']},
+        'results': fases,
+    }
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"rls-{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
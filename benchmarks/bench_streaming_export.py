@@ -0,0 +1,137 @@
+"""Benchmark de la exportación en streaming (data_export / iter_query).
+
+Carga ~500k filas de datos_diarios en la base de benchmarks
+(benchmarks/bench_db.py, mismos datos que bench_partitions.py) y exporta
+la tabla completa (data_export.DAILY_EXPORT_SQL) de dos formas:
+  materializado → execute_query (todas las filas) + pd.DataFrame + to_csv /
+                  dataframe_to_excel_bytes, como se exportaba en la app
+  streaming     → data_export.export_csv / export_excel (iter_query por
+                  lotes, escritura directa al archivo)
+
+Para cada una mide el tiempo y, en una ejecución aparte, el pico de
+memoria Python (tracemalloc; con tracemalloc activo todo corre varias
+veces más lento). Excel sólo con --excel: openpyxl escribe ~10k filas/s.
+
+Uso:
+    python benchmarks/bench_streaming_export.py --filas 500000
+    python benchmarks/bench_streaming_export.py --filas 100000 --excel
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'modules'))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd
+
+import bench_db
+from run import _git_commit, _entry
+from bench_partitions import seed
+from synthetic_data import CONCEPTOS_SEMANALES
+
+
+def _peak_mb(fn: Callable) -> float:
+    """Pico de memoria asignada por Python durante fn()."""
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def exportaciones(path: str, excel: bool, chunk_size: int) -> Dict[str, Callable[[], object]]:
+    from db_connection import execute_query
+    from export_cache import dataframe_to_excel_bytes
+    from data_export import daily_export_query, export_csv, export_excel
+
+    sql, params = daily_export_query(storage='filas')
+
+    def materializado_csv():
+        pd.DataFrame(execute_query(sql, params or None)).to_csv(path, index=False, encoding='utf-8-sig')
+
+    def materializado_xlsx():
+        data = dataframe_to_excel_bytes(pd.DataFrame(execute_query(sql, params or None)), "datos_diarios")
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    casos = {
+        'materializado csv': materializado_csv,
+        'streaming csv': lambda: export_csv(sql, params, path, chunk_size=chunk_size),
+    }
+    if excel:
+        casos['materializado xlsx'] = materializado_xlsx
+        casos['streaming xlsx'] = lambda: export_excel(sql, params, path, "datos_diarios",
+                                                       chunk_size=chunk_size)
+    return casos
+
+
+def bench(args) -> List[Dict]:
+    fd, path = tempfile.mkstemp(suffix='.export')
+    os.close(fd)
+    results = []
+    try:
+        for nombre, fn in exportaciones(path, args.excel, args.chunk_size).items():
+            tiempos = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                fn()
+                tiempos.append((time.perf_counter() - start) * 1000)
+            entry = _entry(f"{nombre}: datos_diarios completo", tiempos)
+            entry['archivo_mb'] = round(os.path.getsize(path) / 1024 / 1024, 1)
+            entry['pico_mb'] = _peak_mb(fn)
+            print(f"    pico={entry['pico_mb']} MB  archivo={entry['archivo_mb']} MB")
+            results.append(entry)
+    finally:
+        os.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la exportación en streaming")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--filas", type=int, default=500_000, help="Filas aproximadas de datos_diarios")
+    parser.add_argument("--chunk-size", type=int, default=20_000, help="Filas por lote")
+    parser.add_argument("--excel", action="store_true", help="Incluir la exportación a Excel (lenta)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/export-<commit>.json)")
+    args = parser.parse_args()
+
+    git = _git_commit()
+    bench_db.use_bench_database()
+    bench_db.create_bench_database()
+    por_dia = args.empresas * args.establecimientos * len(CONCEPTOS_SEMANALES)
+    datos = seed(SimpleNamespace(empresas=args.empresas, establecimientos=args.establecimientos,
+                                 anios=args.filas / por_dia / 365))
+    print(f"datos_diarios: {datos['filas']:,} filas\n")
+
+    results = bench(args)
+
+    print(f"\n{'Exportación':<24}{'mediana':>12}{'pico':>12}{'archivo':>12}")
+    for r in results:
+        print(f"{r['name'].split(':')[0]:<24}{r['median_ms']:>10.1f}ms"
+              f"{r['pico_mb']:>10.1f}MB{r['archivo_mb']:>10.1f}MB")
+
+    report = {
+        'meta': git,
+        'params': {**vars(args), 'filas': datos['filas']},
+        'results': results,
+    }
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"export-{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Compara dos resultados JSON de benchmarks/run.py (por ejemplo, antes y después de un commit).
+
+Uso:
+    python benchmarks/compare.py benchmarks/results/antes.json benchmarks/results/despues.json
+"""
+import sys
+import json
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base: dict, new: dict):
+    if base.get('params') != new.get('params'):
+        print("Atención: los parámetros de escala difieren entre ambas ejecuciones.\n")
+
+    print(f"{'Benchmark':<46}{base['meta'].get('commit') or 'base':>12}"
+          f"{new['meta'].get('commit') or 'nuevo':>12}{'cambio':>10}")
+    base_by_name = {r['name']: r for r in base['results']}
+    for r in new['results']:
+        old = base_by_name.get(r['name'])
+        if old is None:
+            print(f"{r['name']:<46}{'-':>12}{r['median_ms']:>10.1f}ms{'':>10}")
+            continue
+        ratio = r['median_ms'] / old['median_ms'] if old['median_ms'] else float('nan')
+        print(f"{r['name']:<46}{old['median_ms']:>10.1f}ms{r['median_ms']:>10.1f}ms"
+              f"{(ratio - 1) * 100:>+9.1f}%")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    compare(_load(sys.argv[1]), _load(sys.argv[2]))
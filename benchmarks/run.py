@@ -0,0 +1,295 @@
+"""Suite de benchmarks del pipeline de datos.
+
+Mide, sobre datos sintéticos (benchmarks/synthetic_data.py) a la escala
+pedida:
+
+  Sin base de datos
+    - read_excel (sólo openpyxl, referencia)
+    - etl.load_week_excel / etl.load_historic_excel
+    - matrix_builder.build_matrix
+    - matrix_builder.subset_matrix (filtro a la mitad de los establecimientos)
+  Con --db (base dedicada, ver benchmarks/bench_db.py)
+    - HistoricoProcessor.process_historico
+    - ExcelProcessor.process_semanal (una medición por semana cargada)
+    - etl.load_week_from_db / load_historic_from_db / load_daily_from_db
+
+Los resultados se imprimen y se guardan como JSON (con commit, versiones
+y parámetros) para comparar entre commits con benchmarks/compare.py.
+
+Uso:
+    python benchmarks/run.py --empresas 5 --establecimientos 20 --semanas 4
+    python benchmarks/run.py --db --output benchmarks/results/antes.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+import numpy as np
+import pandas as pd
+
+import bench_db
+from synthetic_data import (
+    generate_week_frame, generate_historic_frame, historic_matrix_frame,
+    week_excel_bytes, historic_excel_bytes,
+)
+
+
+def measure(name: str, fn: Callable, repeat: int, warmup: int = 0, **info) -> Dict:
+    """Ejecuta fn() warmup + repeat veces y devuelve los tiempos en ms."""
+    for _ in range(warmup):
+        fn()
+    tiempos = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        tiempos.append((time.perf_counter() - start) * 1000)
+    if isinstance(result, pd.DataFrame):
+        info.setdefault('rows', len(result))
+    return _entry(name, tiempos, **info)
+
+
+def _entry(name: str, tiempos: List[float], **info) -> Dict:
+    entry = {
+        'name': name,
+        'repeat': len(tiempos),
+        'times_ms': [round(t, 3) for t in tiempos],
+        'median_ms': round(statistics.median(tiempos), 3),
+        'mean_ms': round(statistics.mean(tiempos), 3),
+        'min_ms': round(min(tiempos), 3),
+    }
+    entry.update(info)
+    print(f"  {name:<46} mediana={entry['median_ms']:10.1f} ms  "
+          f"min={entry['min_ms']:10.1f} ms  {_fmt_info(info)}")
+    return entry
+
+
+def _fmt_info(info: Dict) -> str:
+    return " ".join(f"{k}={v}" for k, v in info.items())
+
+
+def _git_commit() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=BASE_DIR, capture_output=True, text=True).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except Exception:
+        return {'commit': None, 'dirty': None}
+
+
+# =====================================================
+# BENCHMARKS SIN BASE DE DATOS
+# =====================================================
+
+def bench_offline(datos: Dict, args) -> List[Dict]:
+    import concept_catalog
+    from etl import load_week_excel, load_historic_excel
+    from matrix_builder import build_matrix, subset_matrix
+
+    # Catálogo sólo con los alias base: nada de estas mediciones toca la BD
+    concept_catalog.set_offline()
+
+    week_xlsx = datos['week_xlsx'][-1]
+    hist_xlsx = datos['hist_xlsx']
+    results = []
+
+    results.append(measure("read_excel semanal (openpyxl)",
+                           lambda: pd.read_excel(io.BytesIO(week_xlsx), dtype=str), args.repeat))
+    results.append(measure("etl.load_week_excel",
+                           lambda: load_week_excel(io.BytesIO(week_xlsx)), args.repeat))
+    results.append(measure("etl.load_historic_excel",
+                           lambda: load_historic_excel(io.BytesIO(hist_xlsx)), args.repeat))
+
+    df_long = load_week_excel(io.BytesIO(week_xlsx))
+    df_hist = historic_matrix_frame(datos['hist_frame'])
+    semana = int(df_long["N° Semana"].max())
+    results.append(measure("matrix_builder.build_matrix",
+                           lambda: build_matrix(df_long, df_hist=df_hist, current_week=semana),
+                           args.repeat, establecimientos=df_long["Establecimiento"].nunique()))
+
+    df_matrix = build_matrix(df_long, df_hist=df_hist, current_week=semana)
+    ests = sorted(df_long["Establecimiento"].unique())
+    mitad = ests[:max(1, len(ests) // 2)]
+    results.append(measure("matrix_builder.subset_matrix",
+                           lambda: subset_matrix(df_matrix, mitad),
+                           args.repeat, establecimientos=len(mitad)))
+    return results
+
+
+# =====================================================
+# BENCHMARKS CON BASE DE DATOS
+# =====================================================
+
+def bench_db_pipeline(datos: Dict, args) -> List[Dict]:
+    from excel_processor import ExcelProcessor
+    from historico_processor import HistoricoProcessor
+    from etl import load_week_from_db, load_historic_from_db, load_daily_from_db
+
+    results = []
+
+    # Histórico completo (upsert: las repeticiones reescriben las mismas filas)
+    df_hist_excel = pd.read_excel(io.BytesIO(datos['hist_xlsx']), sheet_name="SIC PROM")
+
+    def cargar_historico():
+        result = HistoricoProcessor().process_historico(df_hist_excel)
+        if not result['success']:
+            raise RuntimeError("process_historico falló: " + "\n".join(result['errors']))
+        return result
+
+    results.append(measure("HistoricoProcessor.process_historico", cargar_historico,
+                           args.repeat, rows=len(df_hist_excel)))
+
+    # Reportes semanales: una medición por semana (cada una inserta datos nuevos)
+    tiempos, filas = [], 0
+    for week_xlsx in datos['week_xlsx']:
+        df_semanal = pd.read_excel(io.BytesIO(week_xlsx))
+        start = time.perf_counter()
+        result = ExcelProcessor().process_semanal(df_semanal)
+        tiempos.append((time.perf_counter() - start) * 1000)
+        if not result['success']:
+            raise RuntimeError("process_semanal falló: " + "\n".join(result['errors']))
+        filas += result['stats']['registros_diarios']
+    results.append(_entry("ExcelProcessor.process_semanal", tiempos,
+                          semanas=len(tiempos), registros_diarios=filas))
+
+    # Loaders (con una ejecución previa para calentar pool y sentencias preparadas)
+    results.append(measure("etl.load_week_from_db",
+                           lambda: load_week_from_db(user_id=None, is_admin=True),
+                           args.repeat, warmup=1))
+    results.append(measure("etl.load_historic_from_db",
+                           lambda: load_historic_from_db(user_id=None, is_admin=True),
+                           args.repeat, warmup=1))
+    results.append(measure("etl.load_daily_from_db (todos)",
+                           lambda: load_daily_from_db(user_id=None, is_admin=True),
+                           args.repeat, warmup=1))
+    establecimiento = load_week_from_db(user_id=None, is_admin=True)["Establecimiento"].iloc[0]
+    results.append(measure("etl.load_daily_from_db (un establecimiento)",
+                           lambda: load_daily_from_db(user_id=None, is_admin=True,
+                                                      establecimiento=establecimiento),
+                           args.repeat, warmup=1))
+    return results
+
+
+def _postgres_version() -> Optional[str]:
+    from db_connection import execute_query
+    try:
+        return execute_query("SHOW server_version", fetch_one=True)['server_version']
+    except Exception:
+        return None
+
+
+# =====================================================
+# MAIN
+# =====================================================
+
+def generar_datos(args) -> Dict:
+    """Genera los Excels sintéticos en memoria."""
+    primera = args.semanas_historico + 1
+    semanas = list(range(primera, primera + args.semanas))
+    week_frames = [
+        generate_week_frame(args.empresas, args.establecimientos, s, args.anio,
+                            args.conceptos_extra, seed=args.seed)
+        for s in semanas
+    ]
+    hist_frame = generate_historic_frame(args.empresas, args.establecimientos,
+                                         args.semanas_historico, args.anio, seed=args.seed)
+    return {
+        'semanas': semanas,
+        'week_rows': len(week_frames[-1]),
+        'week_xlsx': [week_excel_bytes(df) for df in week_frames],
+        'hist_frame': hist_frame,
+        'hist_xlsx': historic_excel_bytes(hist_frame),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de datos")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--semanas", type=int, default=2, help="Reportes semanales a cargar")
+    parser.add_argument("--semanas-historico", type=int, default=40)
+    parser.add_argument("--anio", type=int, default=2025)
+    parser.add_argument("--conceptos-extra", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", action="store_true",
+                        help=f"Incluir benchmarks de BD (recrea '{bench_db.BENCH_DB_NAME}')")
+    parser.add_argument("--no-reset", action="store_true",
+                        help="No recrear la base de benchmarks (sólo vaciar datos)")
+    parser.add_argument("--output", help="Archivo JSON (por defecto benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    if args.semanas_historico + args.semanas > 52:
+        parser.error("--semanas-historico + --semanas debe ser <= 52 (semanas ISO de un año)")
+
+    git = _git_commit()
+    print(f"Generando datos: {args.empresas} empresas × {args.establecimientos} establecimientos, "
+          f"{args.semanas} semanas + {args.semanas_historico} de histórico")
+    datos = generar_datos(args)
+    print(f"  {datos['week_rows']} filas por reporte semanal, "
+          f"{len(datos['hist_frame'])} filas de histórico\n")
+
+    results = bench_offline(datos, args)
+
+    postgres = None
+    if args.db:
+        import concept_catalog
+        concept_catalog.set_offline(False)
+        bench_db.use_bench_database()
+        if args.no_reset:
+            bench_db.truncate_data()
+        else:
+            bench_db.create_bench_database()
+        print()
+        results.extend(bench_db_pipeline(datos, args))
+        postgres = _postgres_version()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            **git,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'postgres': postgres,
+            'platform': platform.platform(),
+        },
+        'params': {
+            'empresas': args.empresas,
+            'establecimientos': args.establecimientos,
+            'semanas': args.semanas,
+            'semanas_historico': args.semanas_historico,
+            'anio': args.anio,
+            'conceptos_extra': args.conceptos_extra,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'db': args.db,
+            'filas_semanal': datos['week_rows'],
+            'filas_historico': len(datos['hist_frame']),
+        },
+        'results': results,
+    }
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"{git['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
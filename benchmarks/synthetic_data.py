@@ -0,0 +1,254 @@
+"""Generador de datos lecheros sintéticos para los benchmarks.
+
+Produce, a escala configurable (empresas × establecimientos × semanas ×
+conceptos), los dos formatos de Excel que carga la aplicación:
+
+- Reporte semanal consolidado (lo que leen etl.load_week_excel y
+  ExcelProcessor.process_semanal):
+      Empresa | Empresa_COD | Establecimiento | CATEGORIA | CONCEPTO |
+      dd-mm-yyyy × 7 | A. TOTAL | Semana
+- HISTORICO PERSISTENTE, hoja 'SIC PROM' (lo que leen
+  etl.load_historic_excel y HistoricoProcessor.process_historico):
+      N° Semana | Fecha | Establecimiento | Vacas en ordeña | ... | (I) MDAT
+
+Los valores son aleatorios pero con rangos realistas y una semilla fija,
+así que dos ejecuciones con los mismos parámetros generan los mismos datos.
+
+Uso (escribe los .xlsx en un directorio):
+    python benchmarks/synthetic_data.py --out data/synthetic --empresas 5 --establecimientos 20
+"""
+import io
+import os
+import sys
+import argparse
+from datetime import date, timedelta
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+from etl import normalize_est_name
+
+# Conceptos del reporte semanal: (categoría, concepto con prefijo, mínimo, máximo, entero)
+# Cubren todas las claves de concept_engine.CONCEPT_MAP y del mapeo de
+# ExcelProcessor, para que build_matrix no tenga que ir a la BD.
+CONCEPTOS_SEMANALES: List[Tuple[str, str, float, float, bool]] = [
+    ("PRODUCCION", "(A) Vacas en ordeña", 150, 900, True),
+    ("PRODUCCION", "(B) Vacas masa", 200, 1100, True),
+    ("PRADERAS", "(C) Superficie Praderas", 80, 600, False),
+    ("PRODUCCION", "(D) Producción promedio", 18, 32, False),
+    ("PRODUCCION", "(E) Producción total", 3000, 25000, False),
+    ("COMERCIAL", "(F) Precio de la leche", 380, 520, False),
+    ("CALIDAD", "(G) Porcentaje de grasa", 3.4, 4.6, False),
+    ("CALIDAD", "(H) Proteinas", 3.1, 3.8, False),
+    ("ALIMENTACION", "(I) Kg MS Pradera / vaca", 4, 12, False),
+    ("ALIMENTACION", "(J) Kg MS Verde / vaca", 0, 3, False),
+    ("ALIMENTACION", "(K) Kg MS Conservado / vaca", 2, 8, False),
+    ("ALIMENTACION", "(L) Kg MS Concentrado / vaca", 3, 9, False),
+    ("ALIMENTACION", "(M) Praderas y otros verdes", 4, 15, False),
+    ("ALIMENTACION", "(N) Total MS", 12, 26, False),
+    ("ALIMENTACION", "(O) Consumo de mat. seca", 15, 25, False),
+    ("ALIMENTACION", "(P) Mat. Seca por Ha", 20, 80, False),
+    ("COSTOS", "(Q) Costo ración vaca", 2500, 6000, False),
+    ("COSTOS", "(R) Costo promedio concentrado", 250, 400, False),
+    ("COSTOS", "(S) Grms concentrado / ltr leche", 150, 400, False),
+    ("COSTOS", "(T) Porcentaje costo alimentos", 30, 60, False),
+    ("RESULTADO", "(U) MDAT", 4000, 9000, False),
+    ("RESULTADO", "(V) MDAT (L/vaca/día)", 8, 20, False),
+    ("REPRODUCCION", "(W) Días de lactancia promedio", 120, 220, True),
+    ("CALIDAD", "(X) Porcentaje leche no vendible", 0.5, 4, False),
+    ("PRODUCCION", "(Y) Relación vaca ordeña / vaca masa", 70, 95, False),
+]
+
+# Columnas del HISTORICO PERSISTENTE: (columna Excel, mínimo, máximo, entero)
+COLUMNAS_HISTORICO: List[Tuple[str, float, float, bool]] = [
+    ("Vacas en ordeña", 150, 900, True),
+    ("Vacas masa", 200, 1100, True),
+    ("Vacas en producción", 150, 900, True),
+    ("Leche enviada", 3000, 25000, False),
+    ("Producción total", 3000, 26000, False),
+    ("Precio de la leche", 380, 520, False),
+    ("Días lactancia", 120, 220, True),
+    ("% Grasa", 3.4, 4.6, False),
+    ("% Proteína", 3.1, 3.8, False),
+    ("Kg MS pradera", 4, 12, False),
+    ("Kg MS conservado", 2, 8, False),
+    ("Kg MS concentrado", 3, 9, False),
+    ("Costo ración vaca", 2500, 6000, False),
+    ("(I) MDAT", 4000, 9000, False),
+    ("Eficiencia", 0.8, 1.6, False),
+    ("Superficie praderas", 80, 600, False),
+]
+
+PREFIJOS_EST = ["Fundo", "Agricola", "Soc. Agricola", ""]
+
+
+def nombres_establecimientos(empresas: int, establecimientos: int) -> List[Tuple[str, str, str]]:
+    """
+    Lista de (empresa, empresa_cod, establecimiento) con nombres únicos.
+    Algunos llevan prefijos ("Fundo", "Agricola") que normalize_est_name quita.
+    """
+    filas = []
+    for e in range(1, empresas + 1):
+        empresa = f"Empresa Lechera {e:02d}"
+        codigo = f"E{e:02d}"
+        for i in range(1, establecimientos + 1):
+            prefijo = PREFIJOS_EST[(e + i) % len(PREFIJOS_EST)]
+            nombre = f"{prefijo} Lechería {e:02d}-{i:03d}".strip()
+            filas.append((empresa, codigo, nombre))
+    return filas
+
+
+def fechas_semana(anio: int, semana: int) -> List[date]:
+    """Los 7 días (lunes a domingo) de una semana ISO."""
+    lunes = date.fromisocalendar(anio, semana, 1)
+    return [lunes + timedelta(days=d) for d in range(7)]
+
+
+def _conceptos(conceptos_extra: int) -> List[Tuple[str, str, float, float, bool]]:
+    extra = [
+        ("OTROS", f"(Z{n:02d}) Indicador adicional {n:02d}", 0, 1000, False)
+        for n in range(1, conceptos_extra + 1)
+    ]
+    return CONCEPTOS_SEMANALES + extra
+
+
+def generate_week_frame(empresas: int = 3, establecimientos: int = 10, semana: int = 40,
+                        anio: int = 2025, conceptos_extra: int = 10,
+                        missing_ratio: float = 0.01, seed: int = 0) -> pd.DataFrame:
+    """
+    Reporte semanal consolidado de una semana.
+
+    Args:
+        empresas: Cantidad de empresas
+        establecimientos: Establecimientos por empresa
+        semana, anio: Semana ISO del reporte (define las 7 columnas de fecha)
+        conceptos_extra: Conceptos adicionales no mapeados (como en los Excel reales)
+        missing_ratio: Fracción de celdas diarias vacías
+        seed: Semilla del generador
+
+    Returns:
+        DataFrame con una fila por establecimiento × concepto
+    """
+    rng = np.random.default_rng([seed, anio, semana])
+    ests = nombres_establecimientos(empresas, establecimientos)
+    conceptos = _conceptos(conceptos_extra)
+    dias = [d.strftime("%d-%m-%Y") for d in fechas_semana(anio, semana)]
+
+    n_est, n_con = len(ests), len(conceptos)
+    lo = np.array([c[2] for c in conceptos])
+    hi = np.array([c[3] for c in conceptos])
+    es_entero = np.array([c[4] for c in conceptos])
+
+    # Nivel base por establecimiento × concepto y ruido diario de ±5 %
+    base = lo + (hi - lo) * rng.random((n_est, n_con))
+    diarios = base[:, :, None] * (1 + 0.05 * rng.standard_normal((n_est, n_con, 7)))
+    diarios = np.where(es_entero[None, :, None], np.round(diarios), np.round(diarios, 2))
+    diarios[rng.random(diarios.shape) < missing_ratio] = np.nan
+
+    valores = diarios.reshape(n_est * n_con, 7)
+    df = pd.DataFrame({
+        "Empresa": np.repeat([e[0] for e in ests], n_con),
+        "Empresa_COD": np.repeat([e[1] for e in ests], n_con),
+        "Establecimiento": np.repeat([e[2] for e in ests], n_con),
+        "CATEGORIA": np.tile([c[0] for c in conceptos], n_est),
+        "CONCEPTO": np.tile([c[1] for c in conceptos], n_est),
+    })
+    for j, dia in enumerate(dias):
+        df[dia] = valores[:, j]
+    with np.errstate(invalid="ignore"):
+        df["A. TOTAL"] = np.round(np.nanmean(valores, axis=1), 2)
+    df["Semana"] = semana
+    return df
+
+
+def generate_historic_frame(empresas: int = 3, establecimientos: int = 10, semanas: int = 40,
+                            anio: int = 2025, seed: int = 0) -> pd.DataFrame:
+    """
+    HISTORICO PERSISTENTE: una fila por establecimiento × semana, semanas
+    1..semanas de un mismo año (datos_historicos es único por
+    establecimiento + año + semana).
+    """
+    semanas = min(semanas, 52)
+    rng = np.random.default_rng([seed, anio, 9999])
+    ests = nombres_establecimientos(empresas, establecimientos)
+    n_est = len(ests)
+
+    semana_col = np.tile(np.arange(1, semanas + 1), n_est)
+    df = pd.DataFrame({
+        "N° Semana": semana_col,
+        "Fecha": [date.fromisocalendar(anio, int(s), 7) for s in semana_col],
+        "Establecimiento": np.repeat([e[2] for e in ests], semanas),
+    })
+    for columna, lo, hi, entero in COLUMNAS_HISTORICO:
+        base = lo + (hi - lo) * rng.random(n_est)
+        valores = np.repeat(base, semanas) * (1 + 0.08 * rng.standard_normal(n_est * semanas))
+        df[columna] = np.round(valores) if entero else np.round(valores, 2)
+    return df
+
+
+def historic_matrix_frame(df_hist_excel: pd.DataFrame) -> pd.DataFrame:
+    """
+    Histórico con las columnas que usa build_matrix (como etl.historic_frame):
+    N° Semana | Establecimiento | MDAT | Vacas en ordeña.
+    """
+    return pd.DataFrame({
+        "N° Semana": df_hist_excel["N° Semana"].astype("Int64"),
+        "Establecimiento": df_hist_excel["Establecimiento"].map(normalize_est_name),
+        "MDAT": df_hist_excel["(I) MDAT"].astype(float),
+        "Vacas en ordeña": df_hist_excel["Vacas en ordeña"].astype(float),
+    })
+
+
+def to_excel_bytes(df: pd.DataFrame, sheet_name: str = "Sheet1") -> bytes:
+    """Serializa el DataFrame a .xlsx en memoria (openpyxl)."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffer.getvalue()
+
+
+def week_excel_bytes(df_week: pd.DataFrame) -> bytes:
+    return to_excel_bytes(df_week, "Consolidado")
+
+
+def historic_excel_bytes(df_hist: pd.DataFrame) -> bytes:
+    # load_historic_excel lee la hoja 'SIC PROM'
+    return to_excel_bytes(df_hist, "SIC PROM")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera Excels lecheros sintéticos")
+    parser.add_argument("--out", default="data/synthetic", help="Directorio de salida")
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--establecimientos", type=int, default=10, help="Por empresa")
+    parser.add_argument("--semanas", type=int, default=4, help="Semanas de reporte semanal")
+    parser.add_argument("--semanas-historico", type=int, default=40)
+    parser.add_argument("--anio", type=int, default=2025)
+    parser.add_argument("--conceptos-extra", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    primera = args.semanas_historico + 1
+    for semana in range(primera, primera + args.semanas):
+        df = generate_week_frame(args.empresas, args.establecimientos, semana, args.anio,
+                                 args.conceptos_extra, seed=args.seed)
+        path = os.path.join(args.out, f"semanal_{args.anio}_S{semana:02d}.xlsx")
+        with open(path, "wb") as f:
+            f.write(week_excel_bytes(df))
+        print(f"{path}: {len(df)} filas")
+
+    df_hist = generate_historic_frame(args.empresas, args.establecimientos,
+                                      args.semanas_historico, args.anio, seed=args.seed)
+    path = os.path.join(args.out, "HISTORICO PERSISTENTE.xlsx")
+    with open(path, "wb") as f:
+        f.write(historic_excel_bytes(df_hist))
+    print(f"{path}: {len(df_hist)} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+-- =====================================================
+-- MIGRACIÓN: Catálogo de alias de conceptos
+-- Descripción: Textos de concepto (normalizados) confirmados por los
+--              administradores → clave interna del concepto. Se suman
+--              a los alias base de modules/concept_catalog.py en un
+--              índice en memoria; el trigger incrementa la versión de
+--              datos 'conceptos' para que cada proceso lo recargue.
+-- Requiere: create_data_version_table.sql
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS concepto_alias (
+    alias_norm VARCHAR(255) PRIMARY KEY,      -- texto normalizado (concept_catalog.normalize_alias)
+    alias VARCHAR(255) NOT NULL,              -- texto tal como venía en el Excel (sin prefijo)
+    concepto_key VARCHAR(50) NOT NULL,        -- clave de concept_catalog.CONCEPTOS
+    origen VARCHAR(20) NOT NULL DEFAULT 'admin',
+    confirmado_por INTEGER REFERENCES usuarios(id) ON DELETE SET NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version (scope) VALUES ('conceptos')
+ON CONFLICT (scope) DO NOTHING;
+
+DROP TRIGGER IF EXISTS trg_version_conceptos ON concepto_alias;
+CREATE TRIGGER trg_version_conceptos
+    AFTER INSERT OR UPDATE OR DELETE ON concepto_alias
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('conceptos');
+
+COMMENT ON TABLE concepto_alias IS 'Alias de conceptos confirmados por administradores (texto normalizado → concepto)';
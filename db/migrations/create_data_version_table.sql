@@ -0,0 +1,52 @@
+-- =====================================================
+-- MIGRACIÓN: Versiones de datos por ámbito
+-- Descripción: Contador que se incrementa (por trigger) cada vez que
+--              cambian las tablas de un ámbito. La app lo consulta
+--              (ver modules/data_version.py) para saber cuándo
+--              refrescar lo que tiene cacheado en memoria/sesión.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS data_version (
+    scope VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version (scope) VALUES ('permisos')
+ON CONFLICT (scope) DO NOTHING;
+
+-- Incrementa la versión del ámbito recibido como argumento del trigger
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO data_version (scope, version, updated_at)
+    VALUES (TG_ARGV[0], 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (scope) DO UPDATE SET
+        version = data_version.version + 1,
+        updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ámbito 'permisos': empresas, establecimientos y asignaciones de usuarios
+DROP TRIGGER IF EXISTS trg_version_permisos ON empresas;
+CREATE TRIGGER trg_version_permisos
+    AFTER INSERT OR UPDATE OR DELETE ON empresas
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('permisos');
+
+DROP TRIGGER IF EXISTS trg_version_permisos ON establecimientos;
+CREATE TRIGGER trg_version_permisos
+    AFTER INSERT OR UPDATE OR DELETE ON establecimientos
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('permisos');
+
+DROP TRIGGER IF EXISTS trg_version_permisos ON usuario_empresa;
+CREATE TRIGGER trg_version_permisos
+    AFTER INSERT OR UPDATE OR DELETE ON usuario_empresa
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('permisos');
+
+DROP TRIGGER IF EXISTS trg_version_permisos ON usuarios;
+CREATE TRIGGER trg_version_permisos
+    AFTER INSERT OR UPDATE OR DELETE ON usuarios
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('permisos');
+
+COMMENT ON TABLE data_version IS 'Versión de datos por ámbito, incrementada por triggers; invalida caches de la app';
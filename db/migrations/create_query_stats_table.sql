@@ -0,0 +1,27 @@
+-- =====================================================
+-- MIGRACIÓN: Tabla de estadísticas de queries lentas
+-- Descripción: Acumula las queries que superan SLOW_QUERY_MS
+--              (ver modules/query_stats.py) y el último plan
+--              EXPLAIN (ANALYZE, BUFFERS) capturado por muestreo.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS query_stats (
+    id SERIAL PRIMARY KEY,
+    query_hash VARCHAR(32) NOT NULL UNIQUE,   -- md5 del SQL normalizado
+    query_text TEXT NOT NULL,                 -- SQL normalizado (literales → ?)
+    llamadas INTEGER NOT NULL DEFAULT 0,
+    total_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    max_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    filas BIGINT NOT NULL DEFAULT 0,
+    params_fingerprint VARCHAR(16),           -- huella del último set de parámetros
+    plan TEXT,                                -- último EXPLAIN (ANALYZE, BUFFERS)
+    plan_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Ranking por tiempo total (vista del admin)
+CREATE INDEX IF NOT EXISTS idx_query_stats_total
+    ON query_stats(total_ms DESC);
+
+COMMENT ON TABLE query_stats IS 'Queries lentas agrupadas por SQL normalizado, con último plan EXPLAIN';
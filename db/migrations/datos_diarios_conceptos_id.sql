@@ -0,0 +1,112 @@
+-- =====================================================
+-- MIGRACIÓN: datos_diarios con concepto / categoría como SMALLINT
+-- Descripción: Cada fila diaria repetía concepto VARCHAR(255) y
+--              categoria VARCHAR(100), y el UNIQUE (establecimiento_id,
+--              fecha, concepto), idx_datos_diarios_concepto y el índice
+--              cubriente de Detalle indexaban esos textos. Ahora
+--              datos_diarios guarda concepto_id / categoria_id de los
+--              diccionarios conceptos / categorias.
+--
+--              Los textos se convierten en su lugar con
+--              ALTER COLUMN ... TYPE SMALLINT USING (búsqueda en el
+--              diccionario) y luego se renombran: una sola reescritura de
+--              la tabla (sin tuplas muertas ni columnas borradas que
+--              sigan ocupando espacio) que reconstruye los índices sobre
+--              los SMALLINT. Funciona también con datos_diarios particionada.
+--
+-- La app sigue devolviendo texto: etl.load_daily_from_db traduce los ids
+-- con modules/daily_dictionaries.py (cache en el proceso) y
+-- v_detalle_diario se recrea con JOIN a los diccionarios.
+--
+-- Obligatoria desde que la app lee y escribe concepto_id / categoria_id
+-- (en todos los modos de DAILY_STORAGE_MODE). Crea los diccionarios si
+-- no existen; datos_diarios_semana.sql es opcional y usa los mismos.
+-- Idempotente: en una base creada con el schema.sql actual (que ya trae
+-- concepto_id) no hace nada.
+-- Bloquea datos_diarios mientras reescribe: aplicar en una ventana sin cargas.
+--   psql -d integra_rls -f db/migrations/datos_diarios_conceptos_id.sql
+-- =====================================================
+
+BEGIN;
+
+-- Diccionarios (una fila por texto distinto), los mismos que usa
+-- datos_diarios_semana.sql
+CREATE TABLE IF NOT EXISTS categorias (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS conceptos (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE FUNCTION pg_temp.concepto_id(p_nombre TEXT) RETURNS SMALLINT AS $$
+    SELECT id FROM conceptos WHERE nombre = p_nombre;
+$$ LANGUAGE sql STABLE;
+
+CREATE FUNCTION pg_temp.categoria_id(p_nombre TEXT) RETURNS SMALLINT AS $$
+    SELECT id FROM categorias WHERE nombre = p_nombre;
+$$ LANGUAGE sql STABLE;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_attribute
+               WHERE attrelid = 'datos_diarios'::regclass AND attname = 'concepto_id'
+                 AND NOT attisdropped) THEN
+        RAISE NOTICE 'datos_diarios ya usa concepto_id: nada que migrar';
+        RETURN;
+    END IF;
+
+    -- Textos que aún no estén en los diccionarios
+    INSERT INTO categorias (nombre)
+    SELECT DISTINCT categoria FROM datos_diarios WHERE categoria IS NOT NULL
+    ON CONFLICT (nombre) DO NOTHING;
+
+    INSERT INTO conceptos (nombre)
+    SELECT DISTINCT concepto FROM datos_diarios
+    ON CONFLICT (nombre) DO NOTHING;
+
+    -- La vista depende de las columnas: se recrea al final
+    DROP VIEW IF EXISTS v_detalle_diario;
+
+    -- Ningún filtro usa concepto sin establecimiento: el índice sobra
+    DROP INDEX IF EXISTS idx_datos_diarios_concepto;
+
+    ALTER TABLE datos_diarios
+        ALTER COLUMN concepto TYPE SMALLINT USING pg_temp.concepto_id(concepto),
+        ALTER COLUMN categoria TYPE SMALLINT USING pg_temp.categoria_id(categoria);
+
+    ALTER TABLE datos_diarios RENAME COLUMN concepto TO concepto_id;
+    ALTER TABLE datos_diarios RENAME COLUMN categoria TO categoria_id;
+
+    ALTER TABLE datos_diarios
+        ADD CONSTRAINT datos_diarios_concepto_id_fkey
+            FOREIGN KEY (concepto_id) REFERENCES conceptos(id),
+        ADD CONSTRAINT datos_diarios_categoria_id_fkey
+            FOREIGN KEY (categoria_id) REFERENCES categorias(id);
+
+    CREATE OR REPLACE VIEW v_detalle_diario AS
+    SELECT
+        e.nombre as establecimiento,
+        emp.nombre as empresa,
+        dd.fecha,
+        cat.nombre as categoria,
+        c.nombre as concepto,
+        dd.valor,
+        dd.empresa_id
+    FROM datos_diarios dd
+    JOIN establecimientos e ON dd.establecimiento_id = e.id
+    JOIN empresas emp ON dd.empresa_id = emp.id
+    JOIN conceptos c ON dd.concepto_id = c.id
+    LEFT JOIN categorias cat ON dd.categoria_id = cat.id;
+
+    ALTER VIEW v_detalle_diario SET (security_barrier = true);
+
+    COMMENT ON COLUMN datos_diarios.concepto_id IS 'Concepto (diccionario conceptos)';
+    COMMENT ON COLUMN datos_diarios.categoria_id IS 'Categoría (diccionario categorias)';
+END $$;
+
+COMMIT;
+
+ANALYZE datos_diarios;
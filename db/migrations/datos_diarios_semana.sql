@@ -0,0 +1,140 @@
+-- =====================================================
+-- MIGRACIÓN: Almacenamiento semanal compacto de los datos diarios
+-- Descripción: datos_diarios guarda una fila por (establecimiento, fecha,
+--              concepto) con categoria/concepto en texto, id SERIAL y
+--              created_at: ~60 bytes de sobrecarga por cada valor.
+--              datos_diarios_semana guarda una fila por (establecimiento,
+--              concepto, semana) con los 7 días en un FLOAT8[7]
+--              (lunes..domingo, NULL = día sin dato) y concepto/categoría
+--              como SMALLINT de los diccionarios conceptos / categorias.
+--
+-- El modo lo elige DAILY_STORAGE_CONFIG (config.py, DAILY_STORAGE_MODE):
+--   filas  → datos_diarios (por defecto)
+--   semana → datos_diarios_semana
+--   ambos  → escribe en las dos, lee de datos_diarios (transición)
+-- etl.load_daily_from_db devuelve el mismo DataFrame en los dos modos.
+--
+-- Copia lo que ya haya en datos_diarios y las políticas RLS vigentes
+-- de datos_diarios (schema.sql o rls_empresa_ids.sql). Idempotente.
+-- Benchmark: benchmarks/bench_daily_storage.py
+-- =====================================================
+
+BEGIN;
+
+-- Diccionarios (una fila por texto distinto; también los crea
+-- datos_diarios_conceptos_id.sql y schema.sql)
+CREATE TABLE IF NOT EXISTS categorias (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS conceptos (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre VARCHAR(255) NOT NULL UNIQUE
+);
+
+-- Columnas de ancho fijo primero (sin relleno de alineación)
+CREATE TABLE IF NOT EXISTS datos_diarios_semana (
+    semana_inicio DATE NOT NULL,              -- lunes de la semana ISO
+    establecimiento_id INTEGER NOT NULL REFERENCES establecimientos(id) ON DELETE CASCADE,
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    concepto_id SMALLINT NOT NULL REFERENCES conceptos(id),
+    categoria_id SMALLINT NOT NULL REFERENCES categorias(id),
+    valores FLOAT8[] NOT NULL CHECK (array_length(valores, 1) = 7),
+    PRIMARY KEY (establecimiento_id, semana_inicio, concepto_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_datos_diarios_semana_inicio_brin
+    ON datos_diarios_semana USING brin (semana_inicio);
+
+-- Datos existentes, con datos_diarios en texto o ya con concepto_id /
+-- categoria_id (datos_diarios_conceptos_id.sql). En orden de semana, como
+-- llegan las cargas: el BRIN sobre semana_inicio sólo sirve si el orden
+-- físico sigue a la fecha.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_attribute
+               WHERE attrelid = 'datos_diarios'::regclass AND attname = 'concepto'
+                 AND NOT attisdropped) THEN
+        INSERT INTO categorias (nombre)
+        SELECT DISTINCT COALESCE(categoria, '') FROM datos_diarios
+        ON CONFLICT (nombre) DO NOTHING;
+
+        INSERT INTO conceptos (nombre)
+        SELECT DISTINCT concepto FROM datos_diarios
+        ON CONFLICT (nombre) DO NOTHING;
+
+        CREATE TEMP VIEW datos_diarios_ids AS
+        SELECT dd.establecimiento_id, dd.empresa_id, dd.fecha, c.id AS concepto_id,
+               cat.id AS categoria_id, dd.valor
+        FROM datos_diarios dd
+        JOIN conceptos c ON c.nombre = dd.concepto
+        JOIN categorias cat ON cat.nombre = COALESCE(dd.categoria, '');
+    ELSE
+        INSERT INTO categorias (nombre) VALUES ('')
+        ON CONFLICT (nombre) DO NOTHING;
+
+        CREATE TEMP VIEW datos_diarios_ids AS
+        SELECT dd.establecimiento_id, dd.empresa_id, dd.fecha, dd.concepto_id,
+               COALESCE(dd.categoria_id, (SELECT id FROM categorias WHERE nombre = '')) AS categoria_id,
+               dd.valor
+        FROM datos_diarios dd;
+    END IF;
+END $$;
+
+INSERT INTO datos_diarios_semana
+    (semana_inicio, establecimiento_id, empresa_id, concepto_id, categoria_id, valores)
+SELECT date_trunc('week', fecha)::date AS semana_inicio,
+       establecimiento_id,
+       MAX(empresa_id),
+       concepto_id,
+       MAX(categoria_id),
+       ARRAY[
+           MAX(valor) FILTER (WHERE EXTRACT(ISODOW FROM fecha) = 1),
+           MAX(valor) FILTER (WHERE EXTRACT(ISODOW FROM fecha) = 2),
+           MAX(valor) FILTER (WHERE EXTRACT(ISODOW FROM fecha) = 3),
+           MAX(valor) FILTER (WHERE EXTRACT(ISODOW FROM fecha) = 4),
+           MAX(valor) FILTER (WHERE EXTRACT(ISODOW FROM fecha) = 5),
+           MAX(valor) FILTER (WHERE EXTRACT(ISODOW FROM fecha) = 6),
+           MAX(valor) FILTER (WHERE EXTRACT(ISODOW FROM fecha) = 7)
+       ]::FLOAT8[]
+FROM datos_diarios_ids
+GROUP BY 1, establecimiento_id, concepto_id
+ORDER BY 1, establecimiento_id, concepto_id
+ON CONFLICT (establecimiento_id, semana_inicio, concepto_id) DO NOTHING;
+
+DROP VIEW datos_diarios_ids;
+
+-- RLS: mismas políticas que datos_diarios
+ALTER TABLE datos_diarios_semana ENABLE ROW LEVEL SECURITY;
+
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT replace(polname, 'datos_diarios', 'datos_diarios_semana') AS polname,
+               CASE polcmd WHEN 'r' THEN 'SELECT' WHEN 'a' THEN 'INSERT'
+                           WHEN 'w' THEN 'UPDATE' WHEN 'd' THEN 'DELETE' ELSE 'ALL' END AS cmd,
+               pg_get_expr(polqual, polrelid) AS qual,
+               pg_get_expr(polwithcheck, polrelid) AS withcheck
+        FROM pg_policy
+        WHERE polrelid = 'datos_diarios'::regclass
+    LOOP
+        EXECUTE format('DROP POLICY IF EXISTS %I ON datos_diarios_semana', r.polname);
+        EXECUTE format('CREATE POLICY %I ON datos_diarios_semana FOR %s', r.polname, r.cmd)
+            || COALESCE(' USING (' || r.qual || ')', '')
+            || COALESCE(' WITH CHECK (' || r.withcheck || ')', '');
+    END LOOP;
+END $$;
+
+COMMENT ON TABLE categorias IS 'Diccionario de categorías de datos diarios';
+COMMENT ON TABLE conceptos IS 'Diccionario de conceptos de datos diarios';
+COMMENT ON TABLE datos_diarios_semana IS 'Datos diarios en arreglos semanales (lunes..domingo) - CON RLS (filtrado por empresa)';
+COMMENT ON COLUMN datos_diarios_semana.valores IS 'Valor de cada día lunes..domingo; NULL = sin dato';
+
+COMMIT;
+
+ANALYZE categorias;
+ANALYZE conceptos;
+ANALYZE datos_diarios_semana;
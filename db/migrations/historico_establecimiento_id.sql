@@ -0,0 +1,71 @@
+-- =====================================================
+-- MIGRACIÓN: datos_historicos con establecimiento_id y anio
+-- Descripción: El histórico estaba identificado por el texto libre
+--              `establecimiento` y por `semana` sin año, así que se
+--              cruzaba por nombre (LOWER(establecimiento) = LOWER(%s))
+--              y dos años con la misma semana chocaban en el UNIQUE.
+--              Agrega la FK establecimiento_id y la columna anio, pasa
+--              la clave única a (establecimiento, anio, semana) y crea el
+--              índice (establecimiento_id, anio, semana) para los cruces
+--              por entero de etl / matrix_builder / HistoricoProcessor.
+--
+-- Después de aplicarla, resolver establecimiento_id con:
+--   python scripts/backfill_historico.py
+-- (usa etl.normalize_est_name, la misma regla de cruce de la app)
+-- =====================================================
+
+BEGIN;
+
+ALTER TABLE datos_historicos
+    ADD COLUMN IF NOT EXISTS establecimiento_id INTEGER REFERENCES establecimientos(id) ON DELETE SET NULL,
+    ADD COLUMN IF NOT EXISTS anio INTEGER;
+
+-- Año de la semana: el de la fecha de cierre, salvo las semanas que
+-- cruzan el cambio de año (misma regla que historico_processor.anio_de_semana)
+UPDATE datos_historicos
+SET anio = EXTRACT(YEAR FROM fecha)::INTEGER
+    + CASE
+        WHEN semana >= 50 AND EXTRACT(MONTH FROM fecha) = 1 THEN -1
+        WHEN semana <= 2 AND EXTRACT(MONTH FROM fecha) = 12 THEN 1
+        ELSE 0
+      END
+WHERE anio IS NULL AND fecha IS NOT NULL;
+
+-- Clave única sin año (semana, establecimiento): se reemplaza
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT i.indexrelid::regclass AS indice, c.conname
+        FROM pg_index i
+        LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid
+        WHERE i.indrelid = 'datos_historicos'::regclass
+          AND i.indisunique AND NOT i.indisprimary
+          AND i.indnatts = 2
+          AND (SELECT array_agg(a.attname::text ORDER BY a.attname)
+               FROM pg_attribute a
+               WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey))
+              = ARRAY['establecimiento', 'semana']
+    LOOP
+        IF r.conname IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE datos_historicos DROP CONSTRAINT %I', r.conname);
+        ELSE
+            EXECUTE format('DROP INDEX %s', r.indice);
+        END IF;
+    END LOOP;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_historico_establecimiento_anio_semana_uniq
+    ON datos_historicos(establecimiento, anio, semana);
+
+-- Cruces por entero (promedios 4/52 semanas)
+CREATE INDEX IF NOT EXISTS idx_historico_est_id_anio_semana
+    ON datos_historicos(establecimiento_id, anio, semana);
+
+COMMENT ON COLUMN datos_historicos.establecimiento_id IS 'Establecimiento resuelto desde el nombre (etl.normalize_est_name)';
+COMMENT ON COLUMN datos_historicos.anio IS 'Año de la semana (semanas del cruce de año asignadas a su año)';
+
+COMMIT;
+
+ANALYZE datos_historicos;
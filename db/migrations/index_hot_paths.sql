@@ -0,0 +1,66 @@
+-- =====================================================
+-- MIGRACIÓN: Índices para las lecturas de Detalle diario y semanal
+-- Descripción: Alinea los índices con las consultas de modules/etl.py
+--   - load_daily_from_db: filtra por est.nombre y ordena por
+--     (establecimiento, categoria, concepto, fecha) → índice cubriente
+--     por establecimiento con INCLUDE (valor, empresa_id): index-only
+--     scan (empresa_id lo necesita la política RLS).
+--   - Rango de fechas de Detalle: BRIN sobre fecha (los datos entran
+--     por semana, en orden de fecha). Reemplaza al B-tree
+--     idx_datos_diarios_fecha (1M filas: 24 kB vs 6,4 MB).
+--   - load_week_from_db: la última semana (ORDER BY anio DESC, semana
+--     DESC LIMIT 1) y el unpivot por (semana, anio) → índice
+--     (anio, semana) en datos_semanales.
+--   - establecimientos(nombre): sólo si no hay ya un índice que empiece
+--     por nombre (schema.sql tiene UNIQUE (nombre, empresa_id)).
+--
+-- Crea los índices sin CONCURRENTLY (datos_diarios puede estar
+-- particionada): aplicar en una ventana sin cargas. Si después se aplica
+-- partition_datos_diarios.sql (recrea la tabla y sus índices), volver a
+-- correr esta migración. Idempotente.
+--   psql -d integra_rls -f db/migrations/index_hot_paths.sql
+-- Verificación: python scripts/verify_index_plans.py
+-- =====================================================
+
+-- Detalle diario: index-only scan por establecimiento, ya ordenado
+-- (categoria_id / concepto_id si ya se aplicó datos_diarios_conceptos_id.sql)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_attribute
+               WHERE attrelid = 'datos_diarios'::regclass AND attname = 'concepto_id'
+                 AND NOT attisdropped) THEN
+        CREATE INDEX IF NOT EXISTS idx_datos_diarios_detalle
+            ON datos_diarios(establecimiento_id, categoria_id, concepto_id, fecha)
+            INCLUDE (valor, empresa_id);
+    ELSE
+        CREATE INDEX IF NOT EXISTS idx_datos_diarios_detalle
+            ON datos_diarios(establecimiento_id, categoria, concepto, fecha)
+            INCLUDE (valor, empresa_id);
+    END IF;
+END $$;
+
+-- Rango de fechas: BRIN en lugar del B-tree
+CREATE INDEX IF NOT EXISTS idx_datos_diarios_fecha_brin
+    ON datos_diarios USING brin (fecha) WITH (pages_per_range = 32);
+DROP INDEX IF EXISTS idx_datos_diarios_fecha;
+
+-- Semana más reciente y filtro (semana, anio)
+CREATE INDEX IF NOT EXISTS idx_datos_semanales_anio_semana
+    ON datos_semanales(anio DESC, semana DESC);
+
+-- Filtro por nombre de establecimiento
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = 'establecimientos'::regclass AND a.attname = 'nombre'
+    ) THEN
+        CREATE INDEX idx_establecimientos_nombre ON establecimientos(nombre);
+    END IF;
+END $$;
+
+ANALYZE datos_diarios;
+ANALYZE datos_semanales;
+ANALYZE establecimientos;
@@ -28,9 +28,8 @@ CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_datos_semanales_est_periodo
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_usuarios_activos 
     ON usuarios(id) WHERE activo = true;
 
--- Índice para búsqueda de conceptos (datos diarios)
-CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_datos_diarios_concepto 
-    ON datos_diarios(concepto);
+-- (idx_datos_diarios_concepto ya no se crea: datos_diarios guarda
+-- concepto_id y el índice cubriente de index_hot_paths.sql lo incluye)
 
 -- =====================================================
 -- 2. TABLA DE LOGS DE CARGA (si no existe)
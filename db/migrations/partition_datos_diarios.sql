@@ -0,0 +1,215 @@
+-- =====================================================
+-- MIGRACIÓN: Particionado de datos_diarios por fecha
+-- Descripción: Convierte datos_diarios en una tabla particionada por
+--              rango de fecha (particiones mensuales o anuales). Las
+--              consultas con filtro de fecha (load_daily_from_db) y los
+--              upserts de process_semanal sólo tocan las particiones
+--              del período. Las particiones futuras las crea
+--              modules/partition_manager.py (scripts/manage_partitions.py),
+--              que también desacopla o archiva las antiguas.
+--
+-- Ejecutar una sola vez, en una ventana sin cargas:
+--   psql -d integra_rls -f db/migrations/partition_datos_diarios.sql
+--
+-- Notas:
+--   - La PK pasa a ser (id, fecha): en una tabla particionada toda
+--     restricción única debe incluir la clave de partición. El UNIQUE
+--     (establecimiento_id, fecha, concepto) del ON CONFLICT se mantiene
+--     (concepto_id si ya se aplicó datos_diarios_conceptos_id.sql).
+--   - v_detalle_diario se recrea con la definición que tenía.
+--   - Los parámetros de autovacuum (maintenance_config.sql) se aplican
+--     por partición, no sobre la tabla padre.
+-- =====================================================
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'datos_diarios'::regclass) = 'p' THEN
+        RAISE EXCEPTION 'datos_diarios ya está particionada';
+    END IF;
+END $$;
+
+-- La vista depende de la tabla: se recrea al final con su definición
+CREATE TEMP TABLE vista_detalle_diario ON COMMIT DROP AS
+SELECT pg_get_viewdef(to_regclass('v_detalle_diario')) AS definicion;
+DROP VIEW IF EXISTS v_detalle_diario;
+
+ALTER TABLE datos_diarios RENAME TO datos_diarios_old;
+ALTER TABLE datos_diarios_old RENAME CONSTRAINT datos_diarios_pkey TO datos_diarios_old_pkey;
+-- Libera los nombres de índice (la tabla vieja se elimina al final)
+DROP INDEX IF EXISTS idx_datos_diarios_establecimiento;
+DROP INDEX IF EXISTS idx_datos_diarios_empresa;
+DROP INDEX IF EXISTS idx_datos_diarios_fecha;
+DROP INDEX IF EXISTS idx_datos_diarios_empresa_fecha;
+DROP INDEX IF EXISTS idx_datos_diarios_concepto;
+
+-- Mismas columnas (incluida updated_at si existe) y defaults
+CREATE TABLE datos_diarios (LIKE datos_diarios_old INCLUDING DEFAULTS)
+    PARTITION BY RANGE (fecha);
+
+ALTER SEQUENCE datos_diarios_id_seq OWNED BY datos_diarios.id;
+
+ALTER TABLE datos_diarios
+    ADD PRIMARY KEY (id, fecha),
+    ADD CONSTRAINT datos_diarios_establecimiento_id_fkey
+        FOREIGN KEY (establecimiento_id) REFERENCES establecimientos(id) ON DELETE CASCADE,
+    ADD CONSTRAINT datos_diarios_empresa_id_fkey
+        FOREIGN KEY (empresa_id) REFERENCES empresas(id) ON DELETE CASCADE;
+
+-- Índices en la tabla padre (se propagan a cada partición)
+CREATE INDEX idx_datos_diarios_establecimiento ON datos_diarios(establecimiento_id);
+CREATE INDEX idx_datos_diarios_empresa ON datos_diarios(empresa_id);
+CREATE INDEX idx_datos_diarios_fecha ON datos_diarios(fecha);
+CREATE INDEX idx_datos_diarios_empresa_fecha ON datos_diarios(empresa_id, fecha DESC);
+
+-- Clave del ON CONFLICT: concepto en texto o concepto_id (y sus FK)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_attribute
+               WHERE attrelid = 'datos_diarios'::regclass AND attname = 'concepto_id'
+                 AND NOT attisdropped) THEN
+        ALTER TABLE datos_diarios
+            ADD CONSTRAINT datos_diarios_establecimiento_fecha_concepto_key
+                UNIQUE (establecimiento_id, fecha, concepto_id),
+            ADD CONSTRAINT datos_diarios_concepto_id_fkey
+                FOREIGN KEY (concepto_id) REFERENCES conceptos(id),
+            ADD CONSTRAINT datos_diarios_categoria_id_fkey
+                FOREIGN KEY (categoria_id) REFERENCES categorias(id);
+    ELSE
+        ALTER TABLE datos_diarios
+            ADD CONSTRAINT datos_diarios_establecimiento_fecha_concepto_key
+                UNIQUE (establecimiento_id, fecha, concepto);
+        CREATE INDEX idx_datos_diarios_concepto ON datos_diarios(concepto);
+    END IF;
+END $$;
+
+-- Red de seguridad: filas fuera de las particiones creadas
+CREATE TABLE datos_diarios_default PARTITION OF datos_diarios DEFAULT;
+
+-- =====================================================
+-- Crea las particiones que falten entre dos fechas.
+-- Cada partición se crea como tabla suelta, recibe las filas que hayan
+-- caído en datos_diarios_default para su rango y se agrega con ATTACH
+-- (bloqueo SHARE UPDATE EXCLUSIVE: no bloquea lecturas ni cargas).
+-- Devuelve cuántas particiones creó.
+-- =====================================================
+CREATE OR REPLACE FUNCTION crear_particiones_datos_diarios(
+    p_desde DATE,
+    p_hasta DATE,
+    p_granularidad TEXT DEFAULT 'mensual'
+) RETURNS INTEGER AS $$
+DECLARE
+    v_paso INTERVAL;
+    v_inicio DATE;
+    v_fin DATE;
+    v_nombre TEXT;
+    v_creadas INTEGER := 0;
+BEGIN
+    IF p_granularidad = 'mensual' THEN
+        v_paso := INTERVAL '1 month';
+        v_inicio := date_trunc('month', p_desde)::date;
+    ELSIF p_granularidad = 'anual' THEN
+        v_paso := INTERVAL '1 year';
+        v_inicio := date_trunc('year', p_desde)::date;
+    ELSE
+        RAISE EXCEPTION 'Granularidad inválida: % (mensual | anual)', p_granularidad;
+    END IF;
+
+    WHILE v_inicio <= p_hasta LOOP
+        v_fin := (v_inicio + v_paso)::date;
+        v_nombre := 'datos_diarios_' || CASE p_granularidad
+            WHEN 'anual' THEN to_char(v_inicio, 'YYYY')
+            ELSE to_char(v_inicio, 'YYYY_MM')
+        END;
+
+        IF to_regclass(v_nombre) IS NULL THEN
+            BEGIN
+                EXECUTE format('CREATE TABLE %I (LIKE datos_diarios INCLUDING DEFAULTS)', v_nombre);
+                EXECUTE format(
+                    'WITH movidas AS (DELETE FROM datos_diarios_default '
+                    'WHERE fecha >= %L AND fecha < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM movidas',
+                    v_inicio, v_fin, v_nombre);
+                -- El CHECK evita que ATTACH vuelva a recorrer la tabla
+                EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (fecha >= %L AND fecha < %L)',
+                               v_nombre, v_nombre || '_rango', v_inicio, v_fin);
+                EXECUTE format('ALTER TABLE datos_diarios ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               v_nombre, v_inicio, v_fin);
+                EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', v_nombre, v_nombre || '_rango');
+                v_creadas := v_creadas + 1;
+            EXCEPTION WHEN invalid_object_definition THEN
+                -- Rango ya cubierto por una partición de otra granularidad
+                RAISE NOTICE 'Rango % - % ya cubierto; se omite %', v_inicio, v_fin, v_nombre;
+            END;
+        END IF;
+
+        v_inicio := v_fin;
+    END LOOP;
+
+    RETURN v_creadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Particiones mensuales para los datos existentes y los próximos 3 meses
+SELECT crear_particiones_datos_diarios(
+    COALESCE((SELECT MIN(fecha) FROM datos_diarios_old), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date,
+    'mensual'
+);
+
+INSERT INTO datos_diarios SELECT * FROM datos_diarios_old;
+
+-- Trigger de updated_at (optimize_for_vps.sql), si la columna existe
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'datos_diarios' AND column_name = 'updated_at') THEN
+        CREATE TRIGGER trg_datos_diarios_updated
+            BEFORE UPDATE ON datos_diarios
+            FOR EACH ROW
+            EXECUTE FUNCTION update_updated_at_column();
+    END IF;
+END $$;
+
+-- RLS: la política de la tabla padre aplica a todas las particiones.
+-- Se copian las políticas vigentes de la tabla vieja (las de schema.sql
+-- o las de rls_empresa_ids.sql, según cuál se haya aplicado)
+ALTER TABLE datos_diarios ENABLE ROW LEVEL SECURITY;
+
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT polname,
+               CASE polcmd WHEN 'r' THEN 'SELECT' WHEN 'a' THEN 'INSERT'
+                           WHEN 'w' THEN 'UPDATE' WHEN 'd' THEN 'DELETE' ELSE 'ALL' END AS cmd,
+               pg_get_expr(polqual, polrelid) AS qual,
+               pg_get_expr(polwithcheck, polrelid) AS withcheck
+        FROM pg_policy
+        WHERE polrelid = 'datos_diarios_old'::regclass
+    LOOP
+        EXECUTE format('CREATE POLICY %I ON datos_diarios FOR %s', r.polname, r.cmd)
+            || COALESCE(' USING (' || r.qual || ')', '')
+            || COALESCE(' WITH CHECK (' || r.withcheck || ')', '');
+    END LOOP;
+END $$;
+
+DROP TABLE datos_diarios_old;
+
+DO $$
+DECLARE
+    v_definicion TEXT := (SELECT definicion FROM vista_detalle_diario);
+BEGIN
+    IF v_definicion IS NOT NULL THEN
+        EXECUTE 'CREATE VIEW v_detalle_diario AS ' || v_definicion;
+        ALTER VIEW v_detalle_diario SET (security_barrier = true);
+    END IF;
+END $$;
+
+COMMENT ON TABLE datos_diarios IS 'Datos diarios para Detalle - CON RLS (filtrado por empresa), particionada por fecha';
+
+COMMIT;
+
+ANALYZE datos_diarios;
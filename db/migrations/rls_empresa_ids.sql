@@ -0,0 +1,79 @@
+-- =====================================================
+-- MIGRACIÓN: Políticas RLS con las empresas del usuario en un GUC
+-- Descripción: Las políticas de schema.sql evaluaban
+--                empresa_id IN (SELECT empresa_id FROM usuario_empresa
+--                               WHERE usuario_id = current_setting(...))
+--                OR current_setting('app.is_admin')::boolean
+--              en cada consulta, y en scans grandes el plan puede
+--              terminar en un SubPlan por fila. Ahora set_user_context
+--              resuelve una sola vez las empresas del usuario en el GUC
+--              app.empresa_ids ('{1,4,7}') y las políticas comparan
+--                empresa_id = ANY ((SELECT app_empresa_ids())::INTEGER[])
+--              El (SELECT ...) convierte la llamada en un InitPlan: se
+--              evalúa una vez por consulta, no por fila (el cast evita
+--              que ANY lo tome como subconsulta de filas).
+--
+-- db_connection.set_user_context no cambia: sigue llamando a
+-- set_user_context(user_id, is_admin) al tomar la conexión.
+-- Idempotente (puede volver a ejecutarse).
+-- Benchmark: benchmarks/bench_rls.py
+-- =====================================================
+
+BEGIN;
+
+-- Empresas visibles del usuario actual (vacío si no hay contexto)
+CREATE OR REPLACE FUNCTION app_empresa_ids()
+RETURNS INTEGER[] AS $$
+    SELECT COALESCE(NULLIF(current_setting('app.empresa_ids', true), ''), '{}')::INTEGER[];
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION app_is_admin()
+RETURNS BOOLEAN AS $$
+    SELECT COALESCE(NULLIF(current_setting('app.is_admin', true), '')::BOOLEAN, false);
+$$ LANGUAGE sql STABLE;
+
+-- Contexto de usuario: además de usuario/admin guarda sus empresas.
+-- SECURITY DEFINER: lee usuario_empresa aunque el rol de la app no tenga
+-- permiso directo sobre esa tabla.
+CREATE OR REPLACE FUNCTION set_user_context(p_user_id INTEGER, p_is_admin BOOLEAN)
+RETURNS VOID AS $$
+DECLARE
+    v_empresas INTEGER[];
+BEGIN
+    SELECT COALESCE(array_agg(empresa_id ORDER BY empresa_id), '{}')
+    INTO v_empresas
+    FROM usuario_empresa
+    WHERE usuario_id = p_user_id;
+
+    PERFORM set_config('app.current_user_id', p_user_id::text, false);
+    PERFORM set_config('app.is_admin', p_is_admin::text, false);
+    PERFORM set_config('app.empresa_ids', v_empresas::text, false);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Políticas: misma semántica, evaluación una vez por consulta
+DROP POLICY IF EXISTS establecimientos_user_policy ON establecimientos;
+CREATE POLICY establecimientos_user_policy ON establecimientos
+    FOR SELECT
+    USING (
+        empresa_id = ANY ((SELECT app_empresa_ids())::INTEGER[])
+        OR (SELECT app_is_admin())
+    );
+
+DROP POLICY IF EXISTS datos_diarios_user_policy ON datos_diarios;
+CREATE POLICY datos_diarios_user_policy ON datos_diarios
+    FOR SELECT
+    USING (
+        empresa_id = ANY ((SELECT app_empresa_ids())::INTEGER[])
+        OR (SELECT app_is_admin())
+    );
+
+DROP POLICY IF EXISTS historico_mdat_user_policy ON historico_mdat;
+CREATE POLICY historico_mdat_user_policy ON historico_mdat
+    FOR SELECT
+    USING (
+        empresa_id = ANY ((SELECT app_empresa_ids())::INTEGER[])
+        OR (SELECT app_is_admin())
+    );
+
+COMMIT;
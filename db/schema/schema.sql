@@ -83,18 +83,30 @@ CREATE TABLE datos_semanales (
     UNIQUE(establecimiento_id, semana, anio)
 );
 
+-- Diccionarios de conceptos / categorías de los datos diarios
+-- (texto ↔ SMALLINT, ver modules/daily_dictionaries.py)
+CREATE TABLE categorias (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL UNIQUE
+);
+
+CREATE TABLE conceptos (
+    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre VARCHAR(255) NOT NULL UNIQUE
+);
+
 -- Tabla de Datos Diarios (para Detalle Diario - CON RLS por empresa)
 CREATE TABLE datos_diarios (
     id SERIAL PRIMARY KEY,
     establecimiento_id INTEGER NOT NULL REFERENCES establecimientos(id) ON DELETE CASCADE,
     empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
     fecha DATE NOT NULL,
-    categoria VARCHAR(100),
-    concepto VARCHAR(255) NOT NULL,
+    categoria_id SMALLINT REFERENCES categorias(id),
+    concepto_id SMALLINT NOT NULL REFERENCES conceptos(id),
     valor DECIMAL(15,2),
     
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(establecimiento_id, fecha, concepto)
+    UNIQUE(establecimiento_id, fecha, concepto_id)
 );
 
 -- Tabla de Histórico MDAT (para comparativos 4 sem y 52 sem)
@@ -245,13 +257,15 @@ SELECT
     e.nombre as establecimiento,
     emp.nombre as empresa,
     dd.fecha,
-    dd.categoria,
-    dd.concepto,
+    cat.nombre as categoria,
+    c.nombre as concepto,
     dd.valor,
     dd.empresa_id
 FROM datos_diarios dd
 JOIN establecimientos e ON dd.establecimiento_id = e.id
-JOIN empresas emp ON dd.empresa_id = emp.id;
+JOIN empresas emp ON dd.empresa_id = emp.id
+JOIN conceptos c ON dd.concepto_id = c.id
+LEFT JOIN categorias cat ON dd.categoria_id = cat.id;
 
 -- Habilitar RLS en la vista de detalle diario
 ALTER VIEW v_detalle_diario SET (security_barrier = true);
@@ -265,4 +279,6 @@ COMMENT ON TABLE usuarios IS 'Usuarios del sistema con autenticación';
 COMMENT ON TABLE usuario_empresa IS 'Relación N:M entre usuarios y empresas para RLS';
 COMMENT ON TABLE datos_semanales IS 'Datos semanales para Ranking - SIN RLS (público)';
 COMMENT ON TABLE datos_diarios IS 'Datos diarios para Detalle - CON RLS (filtrado por empresa)';
+COMMENT ON COLUMN datos_diarios.concepto_id IS 'Concepto (diccionario conceptos)';
+COMMENT ON COLUMN datos_diarios.categoria_id IS 'Categoría (diccionario categorias)';
 COMMENT ON TABLE historico_mdat IS 'Histórico MDAT para comparativos 4 sem y 52 sem';
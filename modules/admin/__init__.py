@@ -11,10 +11,16 @@ from .data_upload import render_data_upload_tab
 from .users import render_users_tab
 from .companies import render_companies_tab
 from .logs import render_logs_tab
+from .performance import render_performance_tab
+from .exports import render_exports_tab
+from .concepts import render_unmapped_concepts
 
 __all__ = [
     'render_data_upload_tab',
     'render_users_tab',
     'render_companies_tab',
     'render_logs_tab',
+    'render_performance_tab',
+    'render_exports_tab',
+    'render_unmapped_concepts',
 ]
@@ -9,6 +9,8 @@ import streamlit as st
 import pandas as pd
 
 from db_connection import execute_query, execute_update
+from daily_storage import move_establecimiento_daily
+from theme_manager import invalidate_theme_cache
 
 
 def render_companies_tab():
@@ -169,6 +171,7 @@ def _render_edit_company_form():
                             "UPDATE empresas SET codigo = %s, nombre = %s, color_primario = %s, logo_url = %s WHERE id = %s",
                             (new_codigo, new_nombre, color_to_save, logo_to_save, empresa_data['id'])
                         )
+                        invalidate_theme_cache(empresa_data['id'])
                         st.success("✅ Empresa actualizada!")
                         st.rerun()
                     except Exception as e:
@@ -289,10 +292,7 @@ def _render_establishments_tab():
                             "UPDATE datos_semanales SET empresa_id = %s WHERE establecimiento_id = %s",
                             (target_empresa_data['id'], est_id)
                         )
-                        execute_update(
-                            "UPDATE datos_diarios SET empresa_id = %s WHERE establecimiento_id = %s",
-                            (target_empresa_data['id'], est_id)
-                        )
+                        move_establecimiento_daily(est_id, target_empresa_data['id'])
                         st.success(f"✅ Establecimiento movido a {target_empresa_data['nombre']}")
                         st.rerun()
                     except Exception as e:
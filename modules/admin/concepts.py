@@ -0,0 +1,54 @@
+# =====================================================
+# MÓDULO: Conceptos no reconocidos
+# =====================================================
+"""
+Confirmación de alias de conceptos (ver modules/concept_catalog.py).
+Los conceptos del Excel que el catálogo no reconoce se listan aquí; al
+confirmarlos quedan en concepto_alias y se reconocen en todas las cargas.
+"""
+
+from typing import Iterable
+
+import streamlit as st
+
+import concept_catalog
+
+
+def render_unmapped_concepts(conceptos: Iterable, key_prefix: str = "alias"):
+    """
+    Muestra los conceptos no reconocidos y permite asignarles un concepto.
+
+    Args:
+        conceptos: Columna CONCEPTO del archivo subido
+        key_prefix: Prefijo de las keys de los widgets
+    """
+    pendientes = concept_catalog.unmapped_concepts(conceptos, contexto='semanal')
+    if not pendientes:
+        return
+
+    opciones = [None] + sorted(concept_catalog.CONCEPTOS,
+                               key=lambda k: concept_catalog.CONCEPTOS[k].nombre)
+
+    with st.expander(f"🏷️ Conceptos no reconocidos ({len(pendientes)})"):
+        st.caption("No se guardan en datos_semanales. Asigna el concepto que corresponde "
+                   "para reconocerlos en esta y las próximas cargas.")
+        for i, concepto in enumerate(pendientes):
+            col1, col2, col3 = st.columns([3, 3, 1])
+            col1.write(concepto)
+            key = col2.selectbox(
+                "Concepto", opciones,
+                format_func=lambda k: "— Sin asignar —" if k is None else concept_catalog.CONCEPTOS[k].nombre,
+                key=f"{key_prefix}_sel_{i}",
+                label_visibility="collapsed",
+            )
+            if col3.button("Confirmar", key=f"{key_prefix}_btn_{i}", disabled=key is None):
+                try:
+                    concept_catalog.confirm_alias(concepto, key, st.session_state.get('user_id'))
+                    st.success(f"'{concepto}' → {concept_catalog.CONCEPTOS[key].nombre}")
+                    st.rerun()
+                except Exception as e:
+                    if 'concepto_alias' in str(e):
+                        st.warning("Tabla 'concepto_alias' no existe. "
+                                   "Ejecuta db/migrations/create_concepto_alias_table.sql")
+                    else:
+                        st.error(f"Error guardando alias: {e}")
@@ -11,6 +11,7 @@ import pandas as pd
 import os
 
 from db_connection import execute_query, execute_update
+from .concepts import render_unmapped_concepts
 
 
 def render_data_upload_tab():
@@ -87,6 +88,9 @@ def _render_semanal_upload():
             with st.expander("👁️ Vista previa del archivo subido"):
                 st.dataframe(df_semanal.head(10))
             
+            if 'CONCEPTO' in df_semanal.columns:
+                render_unmapped_concepts(df_semanal['CONCEPTO'], key_prefix="alias_semanal_module")
+            
             # Validación básica
             required_cols = ['Empresa', 'Empresa_COD', 'Establecimiento', 'CONCEPTO', 'A. TOTAL']
             missing_cols = [col for col in required_cols if col not in df_semanal.columns]
@@ -0,0 +1,92 @@
+# =====================================================
+# MÓDULO: Exportación de Datos
+# =====================================================
+"""
+Exportación completa de datos_diarios y datos_historicos a CSV / Excel
+con data_export (lectura por lotes, memoria constante).
+"""
+
+import os
+import tempfile
+
+import streamlit as st
+
+from data_export import export_table
+
+TABLAS = {
+    'datos_diarios': "Datos diarios",
+    'datos_historicos': "Histórico MDAT",
+}
+
+FORMATOS = {
+    'csv': ("CSV", "text/csv"),
+    'xlsx': ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def render_exports_tab():
+    """Renderiza la pestaña de exportación de tablas completas."""
+    st.header("📦 Exportar Datos")
+    st.caption(
+        "Las filas se leen por lotes desde la base y se escriben directo al archivo: "
+        "la memoria no crece con el tamaño de la tabla."
+    )
+
+    tabla = st.selectbox("Tabla", list(TABLAS), format_func=TABLAS.get, key="export_tabla")
+    formato = st.radio("Formato", list(FORMATOS), format_func=lambda f: FORMATOS[f][0],
+                       horizontal=True, key="export_formato")
+
+    filtros = {}
+    if tabla == 'datos_diarios':
+        col1, col2 = st.columns(2)
+        filtros['fecha_desde'] = col1.date_input("Desde", value=None, key="export_desde")
+        filtros['fecha_hasta'] = col2.date_input("Hasta", value=None, key="export_hasta")
+    if formato == 'xlsx':
+        st.caption("Excel tarda bastante más que CSV en tablas grandes y pasa a otra hoja "
+                   "cada 1.048.575 filas.")
+
+    if st.button("⚙️ Generar archivo", type="primary", key="export_generar"):
+        st.session_state.pop('export_file', None)
+        with st.spinner("Exportando..."):
+            try:
+                filas, data = _export_bytes(tabla, formato, **filtros)
+            except Exception as e:
+                st.error(f"Error exportando {TABLAS[tabla]}: {e}")
+                return
+        st.session_state.export_file = {
+            'data': data,
+            'file_name': f"{tabla}.{formato}",
+            'mime': FORMATOS[formato][1],
+            'filas': filas,
+        }
+
+    export = st.session_state.get('export_file')
+    if export:
+        size_mb = len(export['data']) / 1024 / 1024
+        st.success(f"✅ {export['file_name']}: {export['filas']:,} filas ({size_mb:.1f} MB)")
+        st.download_button(
+            label="📥 Descargar",
+            data=export['data'],
+            file_name=export['file_name'],
+            mime=export['mime'],
+            key="download_export",
+        )
+
+
+def _export_bytes(tabla: str, formato: str, **filtros) -> tuple:
+    """
+    Exporta a un archivo temporal y devuelve (filas, contenido).
+
+    El archivo se borra apenas se lee: st.download_button sirve el
+    contenido desde memoria, así que no queda nada en /tmp aunque la
+    sesión se abandone o expire.
+    """
+    fd, path = tempfile.mkstemp(prefix=f"{tabla}_", suffix=f".{formato}")
+    os.close(fd)
+    try:
+        filas = export_table(tabla, formato, path, user_id=st.session_state.user_id,
+                             is_admin=True, **filtros)
+        with open(path, 'rb') as f:
+            return filas, f.read()
+    finally:
+        os.remove(path)
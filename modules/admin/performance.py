@@ -0,0 +1,80 @@
+# =====================================================
+# MÓDULO: Rendimiento (Queries Lentas)
+# =====================================================
+"""
+Funciones para visualizar las queries lentas registradas en query_stats.
+"""
+
+import streamlit as st
+import pandas as pd
+
+from config import QUERY_STATS_CONFIG
+from query_stats import get_top_statements, get_statement_plan, reset_stats
+
+
+def render_performance_tab():
+    """Renderiza la pestaña de queries lentas ordenadas por tiempo total."""
+    st.header("⏱️ Rendimiento de Queries")
+    st.caption(
+        f"Umbral: {QUERY_STATS_CONFIG['slow_query_ms']:.0f} ms · "
+        f"Muestreo EXPLAIN: {QUERY_STATS_CONFIG['explain_sample_rate']:.0%}"
+    )
+
+    if not QUERY_STATS_CONFIG['enabled']:
+        st.info("El log de queries lentas está deshabilitado (SLOW_QUERY_LOG=false).")
+
+    limit = st.slider("Sentencias a mostrar", min_value=10, max_value=200, value=50, step=10)
+
+    try:
+        stats = get_top_statements(limit)
+    except Exception as e:
+        if 'query_stats' in str(e):
+            st.warning("Tabla 'query_stats' no existe. Ejecuta db/migrations/create_query_stats_table.sql")
+        else:
+            st.error(f"Error obteniendo estadísticas: {e}")
+        return
+
+    if not stats:
+        st.info("No hay queries lentas registradas")
+        return
+
+    df_stats = pd.DataFrame(stats)
+
+    # Métricas generales
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sentencias", len(df_stats))
+    col2.metric("Ejecuciones lentas", int(df_stats['llamadas'].sum()))
+    col3.metric("Tiempo total", f"{float(df_stats['total_ms'].sum()) / 1000:.1f} s")
+
+    for col in ['total_ms', 'media_ms', 'max_ms']:
+        df_stats[col] = pd.to_numeric(df_stats[col], errors='coerce').round(1)
+    df_stats['updated_at'] = pd.to_datetime(df_stats['updated_at']).dt.strftime('%d-%m-%Y %H:%M')
+
+    st.dataframe(
+        df_stats[['query_text', 'llamadas', 'total_ms', 'media_ms', 'max_ms',
+                  'filas', 'params_fingerprint', 'tiene_plan', 'updated_at']],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    # Plan EXPLAIN de una sentencia
+    st.divider()
+    con_plan = df_stats[df_stats['tiene_plan']]
+    if not con_plan.empty:
+        opciones = dict(zip(con_plan['query_hash'], con_plan['query_text'].str.slice(0, 120)))
+        qhash = st.selectbox(
+            "Ver plan EXPLAIN",
+            options=list(opciones.keys()),
+            format_func=lambda h: opciones[h]
+        )
+        detalle = get_statement_plan(qhash)
+        if detalle and detalle.get('plan'):
+            st.caption(f"Capturado: {detalle['plan_at']}")
+            st.code(detalle['plan'], language="text")
+    else:
+        st.caption("Aún no hay planes EXPLAIN capturados.")
+
+    if st.button("🗑️ Reiniciar estadísticas"):
+        reset_stats()
+        st.success("Estadísticas reiniciadas")
+        st.rerun()
@@ -21,6 +21,10 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 from auth import require_auth, show_user_info, init_session_state
 from etl import load_week_from_db, load_daily_from_db, load_historic_from_db
 from matrix_builder import build_matrix, MATRIX_COLUMNS
+from matrix_style import (
+    build_styler, row_averages
+)
+from format_utils import value_formatter
 from pdf_config import (
     get_wkhtmltopdf_path,
     get_wkhtmltopdf_version,
@@ -74,24 +78,6 @@ with st.spinner('Cargando datos desde la base de datos...'):
         st.exception(e)
         st.stop()
 
-# ===============================
-# Helpers de formato numérico
-# ===============================
-def fmt_miles(x: float) -> str:
-    if pd.isna(x):
-        return ""
-    return f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-def fmt_pesos(x: float) -> str:
-    if pd.isna(x):
-        return ""
-    return "$" + fmt_miles(x)
-
-def fmt_pct(x: float) -> str:
-    if pd.isna(x):
-        return ""
-    return fmt_miles(x) + "%"
-
 # ===============================
 # Lógica principal
 # ===============================
@@ -139,7 +125,6 @@ with tab_matrix:
     df_body = df_matrix[mask_body].copy()
     df_total = df_matrix[~mask_body].copy()
     if "MDAT" in df_body.columns:
-        df_body["MDAT"] = pd.to_numeric(df_body["MDAT"], errors="coerce")
         df_body["Ranking MDAT"] = (
             df_body["MDAT"]
             .rank(ascending=False, method="min")
@@ -148,7 +133,7 @@ with tab_matrix:
     else:
         df_body["Ranking MDAT"] = pd.NA
     if not df_total.empty:
-        df_total["Ranking MDAT"] = ""
+        df_total["Ranking MDAT"] = pd.NA
     def insert_ranking_col(df: pd.DataFrame) -> pd.DataFrame:
         cols = list(df.columns)
         if "Ranking MDAT" in cols and "MDAT" in cols:
@@ -160,53 +145,9 @@ with tab_matrix:
     df_body = insert_ranking_col(df_body)
     if not df_total.empty:
         df_total = insert_ranking_col(df_total)
-    money_cols = [
-        "Costo promedio concentrado", "Costo ración vaca", "Precio de la leche",
-        "MDAT", "MDAT 4 sem", "MDAT 52 sem"
-    ]
-    pct_cols = ["Porcentaje de grasa", "Proteinas", "Porcentaje costo alimentos"]
-    int_cols = [
-        "Ranking MDAT", "Ranking 4 sem", "Ranking 52 sem",
-        "Vacas masa", "Vacas en ordeña", "Vacas 4 sem", "Vacas 52 sem",
-        "Grms concentrado / ltr leche"
-    ]
-    float_cols = [
-        "Superficie Praderas", "Carga animal", "Kg MS Concentrado / vaca",
-        "Kg MS Conservado / vaca", "Praderas y otros verdes", "Total MS",
-        "Producción promedio", "MDAT (L/vaca/día)"
-    ]
-    def clean_and_convert(df):
-        df = df.fillna(np.nan)
-        for c in df.columns:
-            if c in money_cols or c in pct_cols or c in float_cols:
-                df[c] = pd.to_numeric(df[c], errors='coerce')
-            elif c in int_cols:
-                df[c] = pd.to_numeric(df[c], errors='coerce')
-        return df
-    df_body = clean_and_convert(df_body)
-    if not df_total.empty:
-        df_total = clean_and_convert(df_total)
-    high_is_good = [
-        "Porcentaje de grasa", "Proteinas", 
-        "Producción promedio", "Precio de la leche", 
-        "MDAT", "MDAT (L/vaca/día)", 
-        "MDAT 4 sem", "MDAT 52 sem"
-    ]
-    low_is_good = [
-        "Costo promedio concentrado", 
-        "Grms concentrado / ltr leche", 
-        "Costo ración vaca", 
-        "Porcentaje costo alimentos", 
-        "Ranking MDAT", "Ranking 4 sem", "Ranking 52 sem"
-    ]
-    avg_values = {}
-    if not df_total.empty:
-        for col in df_total.columns:
-            val = df_total.iloc[0][col]
-            try:
-                avg_values[col] = float(val)
-            except:
-                avg_values[col] = np.nan
+    # La matriz ya viene tipada (float64 / Int64, ver matrix_builder): sin
+    # pasada de pd.to_numeric por columna antes de ordenar y dar formato
+    avg_values = row_averages(df_total)
     col_structure = {
         "Establecimiento": ("", "Establecimiento"),
         "Superficie Praderas": ("", "Superficie de uso ganadero (ha)"),
@@ -243,68 +184,10 @@ with tab_matrix:
         return df
     df_body_mi = apply_multiindex(df_body)
     df_total_mi = apply_multiindex(df_total) if not df_total.empty else None
-    def style_df(styler):
-        styler.set_table_styles([
-            {'selector': 'th', 'props': [
-                ('background-color', '#E2EFDA'), 
-                ('color', 'black'),
-                ('font-weight', 'bold'),
-                ('text-align', 'center'),
-                ('border', '3px solid #00C853')  # Verde saturado y más grueso
-            ]},
-            {'selector': 'td', 'props': [
-                ('text-align', 'center'),
-                ('border', '3px solid #00C853')  # Verde saturado y más grueso
-            ]},
-        ])
-        # Asegurar bordes verdes aplicados a todo el cuerpo (compatibilidad Streamlit)
-        try:
-            styler.set_properties(**{'border': '3px solid #00C853'})
-        except Exception:
-            pass
-        def safe_fmt_int(x):
-            return f"{int(x)}" if pd.notna(x) else ""
-        for internal_col, mi_tuple in col_structure.items():
-            if internal_col not in df_body.columns:
-                continue
-            if internal_col in money_cols:
-                styler.format(fmt_pesos, subset=[mi_tuple])
-            elif internal_col in pct_cols:
-                styler.format(fmt_pct, subset=[mi_tuple])
-            elif internal_col in int_cols:
-                styler.format(safe_fmt_int, subset=[mi_tuple])
-            elif internal_col in float_cols:
-                styler.format(fmt_miles, subset=[mi_tuple])
-            if internal_col in high_is_good or internal_col in low_is_good:
-                def color_logic(s, col_name=internal_col):
-                    avg = avg_values.get(col_name, np.nan)
-                    if pd.isna(avg):
-                        return ["" for _ in s]
-                    styles = []
-                    is_high = col_name in high_is_good
-                    for val in s:
-                        try:
-                            v = float(val)
-                            if pd.isna(v):
-                                styles.append("")
-                                continue
-                            c = ""
-                            # Azul si bueno, Rojo si malo
-                            if is_high:
-                                if v > avg: c = "#0000FF"  # azul
-                                elif v < avg: c = "#FF0000"  # rojo
-                            else:
-                                if v < avg: c = "#0000FF"  # azul
-                                elif v > avg: c = "#FF0000"  # rojo
-                            if c:
-                                styles.append(f"color: {c}; font-weight: bold;")
-                            else:
-                                styles.append("")
-                        except:
-                            styles.append("")
-                    return styles
-                styler.apply(color_logic, subset=[mi_tuple], axis=0)
-        return styler
+    internal_by_tuple = {mi_tuple: col for col, mi_tuple in col_structure.items()}
+    def style_df(df_mi):
+        internal_cols = [internal_by_tuple[t] for t in df_mi.columns]
+        return build_styler(df_mi, internal_cols, avg_values, border='3px solid #00C853')
     
     # CSS para scroll horizontal con columna congelada
     st.markdown("""
@@ -362,7 +245,7 @@ with tab_matrix:
         df_full = df_body_sorted.copy()
     
     df_full_mi = apply_multiindex(df_full)
-    styled_full = style_df(df_full_mi.style)
+    styled_full = style_df(df_full_mi)
     
     # Calcular altura dinámica: 35px por fila + 100px para headers
     n_rows = len(df_full)
@@ -414,8 +297,8 @@ with tab_matrix:
     def df_to_html(df):
         # Si es MultiIndex, renderizar MultiIndex como múltiples header rows
         # Usar pandas Styler para formato visual idéntico
-        if hasattr(df, 'render'):  # Si es un Styler
-            html = df.render()
+        if hasattr(df, 'to_html') and hasattr(df, 'data'):  # Si es un Styler
+            html = df.to_html()
         else:
             html = df.to_html(index=False, border=0, escape=False)
         template = Template('''
@@ -593,9 +476,10 @@ with tab_daily:
             if c in df_view.columns:
                 df_view[c] = df_view[c].fillna(0)
         styler_daily = df_view.style
-        for c in numeric_cols:
-            if c in df_view.columns:
-                styler_daily.format(fmt_miles, subset=[c])
+        styler_daily.format({
+            c: value_formatter(df_view[c])
+            for c in numeric_cols if c in df_view.columns
+        })
         styler_daily.set_table_styles([
             {'selector': 'th', 'props': [
                 ('background-color', '#f0f2f6'),
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
+from pandas.io.formats.style import Styler
 import numpy as np
-import io
 try:
     import pdfkit
     PDFKIT_AVAILABLE = True
@@ -18,16 +18,27 @@ import sys
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 # Importar nuevos módulos de autenticación y DB
-from auth import require_auth, show_user_info, init_session_state
-from etl import load_week_from_db, load_daily_from_db, load_historic_from_db
-from matrix_builder import build_matrix, MATRIX_COLUMNS
+from auth import require_auth, show_user_info, init_session_state, get_user_permissions
+from etl import load_daily_from_db, daily_establishments, daily_window
+from config import DAILY_STORAGE_CONFIG
+from async_db import load_page_data
+from matrix_builder import build_matrix, subset_matrix, MATRIX_COLUMNS
+from matrix_style import (
+    build_styler, row_averages, styled_html
+)
+from format_utils import value_formatter
+from export_cache import (
+    frame_hash, export_key, export_cache_get, get_or_build_export, dataframe_to_excel_bytes
+)
+from data_version import get_data_version
+from concept_catalog import CONCEPTOS_SCOPE
+from pdf_renderer import render_pdf, PdfRenderBusy, MATRIX_PDF_OPTIONS
 from pdf_config import (
     get_wkhtmltopdf_path,
     get_wkhtmltopdf_version,
     is_wkhtmltopdf_available,
     get_pdfkit_config
 )
-from config_manager import get_filtros_defecto, get_nota_semanal, is_nota_visible, get_orden_defecto
 
 # ===============================
 # Configuración básica de página
@@ -46,11 +57,8 @@ if not require_auth():
     st.stop()
 
 # Si llegamos aquí, el usuario está autenticado
-# Mostrar info del usuario en sidebar
-show_user_info()
-
-st.title("Matriz Semanal — Integra SpA")
-st.caption(f"👤 Sesión activa: {st.session_state.nombre_completo}")
+# Permisos en sesión (empresas/establecimientos); sólo se recalculan si cambian
+permisos = get_user_permissions()
 
 # ===============================
 # Cargar datos desde PostgreSQL
@@ -59,52 +67,56 @@ st.caption(f"👤 Sesión activa: {st.session_state.nombre_completo}")
 # Indicador de carga
 with st.spinner('Cargando datos desde la base de datos...'):
     try:
-        # Cargar datos semanales (SIN RLS - todas las empresas para ranking)
-        df_long = load_week_from_db(
+        # Semana (SIN RLS - todas las empresas para ranking), histórico (MDAT 4/52 sem),
+        # configuración, tema y establecimientos del usuario: todo en paralelo
+        page_data = load_page_data(
             user_id=st.session_state.user_id,
-            is_admin=st.session_state.is_admin
+            is_admin=st.session_state.is_admin,
+            empresa_ids=permisos.empresa_ids
         )
-        
-        # Cargar histórico (para MDAT 4 sem y 52 sem)
-        df_hist = load_historic_from_db(
-            user_id=st.session_state.user_id,
-            is_admin=st.session_state.is_admin
-        )
-        
-        if df_long.empty:
-            st.error("No hay datos disponibles en la base de datos.")
-            st.stop()
-            
-        st.success("Datos cargados correctamente desde PostgreSQL.")
+        df_long = page_data['df_long']
+        df_hist = page_data['df_hist']
         
     except Exception as e:
         st.error(f"Error al cargar datos: {e}")
         st.exception(e)
         st.stop()
 
-# ===============================
-# Helpers de formato numérico
-# ===============================
+# Mostrar info del usuario en sidebar
+show_user_info(theme_config=page_data['empresa_theme'])
 
-def fmt_miles(x: float) -> str:
-    """Número con separador de miles y coma decimal: 12.345,67"""
-    if pd.isna(x):
-        return ""
-    return f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+st.title("Matriz Semanal — Integra SpA")
+st.caption(f"👤 Sesión activa: {st.session_state.nombre_completo}")
 
+if df_long.empty:
+    st.error("No hay datos disponibles en la base de datos.")
+    st.stop()
 
-def fmt_pesos(x: float) -> str:
-    """Igual que arriba, pero con símbolo $ delante."""
-    if pd.isna(x):
-        return ""
-    return "$" + fmt_miles(x)
+st.success("Datos cargados correctamente desde PostgreSQL.")
 
+# ===============================
+# Descargas bajo demanda
+# ===============================
 
-def fmt_pct(x: float) -> str:
-    """Para % que ya vienen como número (no lo dividimos por 100)."""
-    if pd.isna(x):
-        return ""
-    return fmt_miles(x) + "%"
+def lazy_download_button(label, prepare_label, key, builder, file_name, mime):
+    """
+    Botón de descarga que sólo genera el archivo cuando se pide.
+    El resultado queda en el cache de exportaciones (por hash del contenido),
+    así que si la misma matriz ya se exportó se ofrece la descarga directa.
+    """
+    data = export_cache_get(key)
+    if data is None:
+        if not st.button(prepare_label, key=f"prepare_{key}"):
+            return
+        with st.spinner("Generando archivo..."):
+            data = get_or_build_export(key, builder)
+    st.download_button(
+        label=label,
+        data=data,
+        file_name=file_name,
+        mime=mime,
+        key=f"download_{key}",
+    )
 
 
 # ===============================
@@ -115,7 +127,7 @@ def fmt_pct(x: float) -> str:
 all_est = sorted(df_long["Establecimiento"].unique())
 
 # Obtener filtros por defecto configurados por admin
-filtros_defecto = get_filtros_defecto()
+filtros_defecto = page_data['filtros_defecto']
 # Si hay filtros configurados, usarlos; si no, usar todos
 if filtros_defecto:
     default_est = [e for e in filtros_defecto if e in all_est]
@@ -134,8 +146,6 @@ if not selected_est:
     st.warning("Selecciona al menos un establecimiento.")
     st.stop()
 
-df_long_filtered = df_long[df_long["Establecimiento"].isin(selected_est)].copy()
-
 # Construir matriz (incluye Sumas y Promedios)
 current_week = None
 if "N° Semana" in df_long.columns:
@@ -147,8 +157,27 @@ if "N° Semana" in df_long.columns:
 if current_week:
     st.info(f"Semana detectada en los datos: {current_week}")
 
-# build_matrix siempre se llama, con o sin current_week
-df_matrix = build_matrix(df_long_filtered, df_hist=df_hist, current_week=current_week).copy()
+
+def get_full_matrix(df_long, df_hist, current_week):
+    """
+    Matriz de TODOS los establecimientos, guardada en sesión por versión
+    de los datos (hash de semana + histórico + versión de conceptos).
+    Se reconstruye sólo si cambian los datos, no al cambiar el filtro.
+    En sesión y no en el proceso: compute_metric puede completar valores
+    con datos diarios bajo el RLS del usuario.
+    """
+    version = (frame_hash(df_long, current_week), frame_hash(df_hist), get_data_version(CONCEPTOS_SCOPE))
+    cached = st.session_state.get('matriz_completa')
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    df_full_matrix = build_matrix(df_long, df_hist=df_hist, current_week=current_week)
+    st.session_state.matriz_completa = (version, df_full_matrix)
+    return df_full_matrix
+
+
+# El filtro sólo elige filas de la matriz completa y recalcula rankings y
+# Sumas y Promedios (subset_matrix): no vuelve a correr build_matrix
+df_matrix = subset_matrix(get_full_matrix(df_long, df_hist, current_week), selected_est)
 
 if "index" in df_matrix.columns:
     df_matrix.rename(columns={"index": "inc."}, inplace=True)
@@ -164,12 +193,12 @@ tab_matrix, tab_daily = st.tabs(["Matriz Semanal", "Detalle Diario"])
 
 with tab_matrix:
     # Mostrar nota semanal si existe y está visible
-    nota_semanal = get_nota_semanal()
-    if nota_semanal and is_nota_visible():
+    nota_semanal = page_data['nota_semanal']
+    if nota_semanal and page_data['nota_visible']:
         st.info(nota_semanal)
     
     # --- CONTROLES DE ORDENAMIENTO ---
-    orden_defecto = get_orden_defecto()
+    orden_defecto = page_data['orden_defecto']
     
     # Columnas disponibles para ordenar (excluyendo Establecimiento que es la primera)
     columnas_ordenables = [col for col in df_matrix.columns if col != "Establecimiento"]
@@ -209,7 +238,6 @@ with tab_matrix:
 
     # Ranking por MDAT
     if "MDAT" in df_body.columns:
-        df_body["MDAT"] = pd.to_numeric(df_body["MDAT"], errors="coerce")
         df_body["Ranking MDAT"] = (
             df_body["MDAT"]
             .rank(ascending=False, method="min")
@@ -219,7 +247,7 @@ with tab_matrix:
         df_body["Ranking MDAT"] = pd.NA
 
     if not df_total.empty:
-        df_total["Ranking MDAT"] = ""
+        df_total["Ranking MDAT"] = pd.NA
 
     def insert_ranking_col(df: pd.DataFrame) -> pd.DataFrame:
         cols = list(df.columns)
@@ -234,35 +262,8 @@ with tab_matrix:
     if not df_total.empty:
         df_total = insert_ranking_col(df_total)
 
-    # Definición de columnas por tipo
-    money_cols = [
-        "Costo promedio concentrado", "Costo ración vaca", "Precio de la leche",
-        "MDAT", "MDAT 4 sem", "MDAT 52 sem"
-    ]
-    pct_cols = ["Porcentaje de grasa", "Proteinas", "Porcentaje costo alimentos"]
-    int_cols = [
-        "Ranking MDAT", "Ranking 4 sem", "Ranking 52 sem",
-        "Vacas masa", "Vacas en ordeña", "Vacas 4 sem", "Vacas 52 sem",
-        "Grms concentrado / ltr leche"
-    ]
-    float_cols = [
-        "Superficie Praderas", "Carga animal", "Kg MS Concentrado / vaca",
-        "Kg MS Conservado / vaca", "Praderas y otros verdes", "Total MS",
-        "Producción promedio", "MDAT (L/vaca/día)"
-    ]
-
-    def clean_and_convert(df):
-        df = df.fillna(np.nan)
-        for c in df.columns:
-            if c in money_cols or c in pct_cols or c in float_cols:
-                df[c] = pd.to_numeric(df[c], errors='coerce')
-            elif c in int_cols:
-                df[c] = pd.to_numeric(df[c], errors='coerce')
-        return df
-
-    df_body = clean_and_convert(df_body)
-    if not df_total.empty:
-        df_total = clean_and_convert(df_total)
+    # La matriz ya viene tipada (float64 / Int64, ver matrix_builder): sin
+    # pasada de pd.to_numeric por columna antes de ordenar y dar formato
     
     # --- APLICAR ORDENAMIENTO SELECCIONADO ---
     if columna_orden in df_body.columns:
@@ -276,31 +277,8 @@ with tab_matrix:
             pass  # Si falla ordenar, mantener orden original
 
 
-    # Definición de reglas de negocio para colores:
-    high_is_good = [
-        "Porcentaje de grasa", "Proteinas", 
-        "Producción promedio", "Precio de la leche", 
-        "MDAT", "MDAT (L/vaca/día)", 
-        "MDAT 4 sem", "MDAT 52 sem"
-    ]
-    
-    low_is_good = [
-        "Costo promedio concentrado", 
-        "Grms concentrado / ltr leche", 
-        "Costo ración vaca", 
-        "Porcentaje costo alimentos", 
-        "Ranking MDAT", "Ranking 4 sem", "Ranking 52 sem"
-    ]
-
-    # Extraer fila de promedios para comparar
-    avg_values = {}
-    if not df_total.empty:
-        for col in df_total.columns:
-            val = df_total.iloc[0][col]
-            try:
-                avg_values[col] = float(val)
-            except:
-                avg_values[col] = np.nan
+    # Fila de promedios para comparar (colores azul/rojo, ver matrix_style)
+    avg_values = row_averages(df_total)
 
     # Estructura de columnas para el MultiIndex (Visual)
     col_structure = {
@@ -343,91 +321,16 @@ with tab_matrix:
         df.columns = pd.MultiIndex.from_tuples(tuples)
         return df
 
-    df_body_mi = apply_multiindex(df_body)
-    df_total_mi = apply_multiindex(df_total) if not df_total.empty else None
+    internal_by_tuple = {mi_tuple: col for col, mi_tuple in col_structure.items()}
 
-    def style_df(styler):
-        # Estilos globales
-        styler.set_table_styles([
-            {'selector': 'th', 'props': [
-                ('background-color', '#E2EFDA'), 
-                ('color', 'black'),
-                ('font-weight', 'bold'),
-                ('text-align', 'center'),
-                ('border', '2px solid #70AD47')  # Bordes verdes en encabezado
-            ]},
-            {'selector': 'td', 'props': [
-                ('text-align', 'center'),
-                ('border', '2px solid #70AD47')  # Bordes verdes en celdas
-            ]},
-        ])
-        # Asegurar bordes verdes aplicados a todo el cuerpo (compatibilidad Streamlit)
-        try:
-            styler.set_properties(**{'border': '2px solid #70AD47'})
-        except Exception:
-            pass
-        
-        def safe_fmt_int(x):
-            return f"{int(x)}" if pd.notna(x) else ""
-
-        # Aplicar formatos y colores condicionales
-        for internal_col, mi_tuple in col_structure.items():
-            if internal_col not in df_body.columns:
-                continue
-            
-            # 1. Formatos numéricos
-            if internal_col in money_cols:
-                styler.format(fmt_pesos, subset=[mi_tuple])
-            elif internal_col in pct_cols:
-                styler.format(fmt_pct, subset=[mi_tuple])
-            elif internal_col in int_cols:
-                styler.format(safe_fmt_int, subset=[mi_tuple])
-            elif internal_col in float_cols:
-                styler.format(fmt_miles, subset=[mi_tuple])
-            
-            # 2. Lógica Condicional (Azul vs Rojo)
-            if internal_col in high_is_good or internal_col in low_is_good:
-                
-                # Función para aplicar estilo fila por fila
-                def color_logic(s, col_name=internal_col):
-                    avg = avg_values.get(col_name, np.nan)
-                    if pd.isna(avg):
-                        return ["" for _ in s]
-                    
-                    styles = []
-                    is_high = col_name in high_is_good
-                    
-                    for val in s:
-                        try:
-                            v = float(val)
-                            if pd.isna(v):
-                                styles.append("")
-                                continue
-                            
-                            c = ""
-                            if is_high:
-                                if v > avg: c = "#0000FF" # Azul
-                                elif v < avg: c = "#FF0000" # Rojo
-                            else: # Low is good
-                                if v < avg: c = "#0000FF" # Azul
-                                elif v > avg: c = "#FF0000" # Rojo
-                                
-                            if c:
-                                styles.append(f"color: {c}; font-weight: bold;")
-                            else:
-                                styles.append("")
-                        except:
-                            styles.append("")
-                    return styles
-
-                styler.apply(color_logic, subset=[mi_tuple], axis=0)
-
-        return styler
+    def style_df(df_mi):
+        internal_cols = [internal_by_tuple[t] for t in df_mi.columns]
+        return build_styler(df_mi, internal_cols, avg_values)
 
     def df_to_html(df):
         # Usar pandas Styler para formato visual idéntico
-        if hasattr(df, 'render'):  # Si es un Styler
-            html = df.render()
+        if isinstance(df, Styler):
+            html = styled_html(df, matrix_hash, (columna_orden, ascending))
         else:
             html = df.to_html(index=False, border=0, escape=False)
         template = Template('''
@@ -456,20 +359,28 @@ with tab_matrix:
         ''')
         return template.render(table=html)
 
-    def download_pdf(df, filename="matriz_semanal_rls.pdf"):
-        # Usar el mismo styler visual que la matriz
-        html = df_to_html(styled_full)
+    def download_pdf(content_hash, filename="matriz_semanal_rls.pdf"):
+        html_filename = filename.replace('.pdf', '.html')
+        
+        def build_html():
+            # Usar el mismo styler visual que la matriz
+            return df_to_html(styled_full).encode('utf-8')
+        
+        def html_download():
+            lazy_download_button(
+                label="📥 Descargar matriz en HTML",
+                prepare_label="🧾 Generar HTML",
+                key=export_key(content_hash, "html"),
+                builder=build_html,
+                file_name=html_filename,
+                mime="text/html",
+            )
         
         # Opción 1: pdfkit no está disponible
         if not PDFKIT_AVAILABLE:
             st.warning("❌ pdfkit no está instalado. Se ofrece descarga en HTML.")
             st.info(f"Instala pdfkit y jinja2 en tu entorno:\n```\npip install pdfkit jinja2\n```")
-            st.download_button(
-                label="📥 Descargar matriz en HTML",
-                data=html.encode('utf-8'),
-                file_name=filename.replace('.pdf', '.html'),
-                mime="text/html",
-            )
+            html_download()
             return
         
         # Opción 2: pdfkit disponible pero wkhtmltopdf no
@@ -481,48 +392,36 @@ with tab_matrix:
                    "- **Linux:** `apt-get install wkhtmltopdf`\n"
                    "- **macOS:** `brew install wkhtmltopdf`\n\n"
                    "O establece la variable `WKHTMLTOPDF_PATH` en tu `.env` con la ruta completa.")
-            st.download_button(
-                label="📥 Descargar matriz en HTML",
-                data=html.encode('utf-8'),
-                file_name=filename.replace('.pdf', '.html'),
-                mime="text/html",
-            )
+            html_download()
             return
         
-        # Opción 3: Generar PDF
+        # Opción 3: Generar PDF (sólo al pedirlo; cacheado por contenido)
+        # El render pasa por el pool de pdf_renderer (concurrencia acotada + timeout)
+        def build_pdf():
+            return render_pdf(build_html().decode('utf-8'), options=MATRIX_PDF_OPTIONS)
+        
         try:
-            config = get_pdfkit_config()
-            options = {
-                'page-size': 'A4',
-                'orientation': 'Landscape',
-                'margin-top': '0.75in',
-                'margin-right': '0.75in',
-                'margin-bottom': '0.75in',
-                'margin-left': '0.75in',
-                'encoding': "UTF-8",
-                'no-outline': None,
-                'enable-local-file-access': None,
-            }
-            pdf_bytes = pdfkit.from_string(html, False, options=options, configuration=config)
-            st.download_button(
+            lazy_download_button(
                 label="📄 Descargar matriz en PDF",
-                data=pdf_bytes,
+                prepare_label="📄 Generar PDF",
+                key=export_key(content_hash, "pdf"),
+                builder=build_pdf,
                 file_name=filename,
                 mime="application/pdf",
             )
+        except PdfRenderBusy:
+            st.warning("⏳ Hay muchas exportaciones PDF en curso. Intenta nuevamente en unos segundos o descarga el HTML.")
+            html_download()
         except Exception as e:
             # Fallback final: ofrecer HTML si algo falló en la generación
             st.warning(f"❌ No se pudo generar PDF: {e}. Se ofrece HTML.")
             st.download_button(
                 label="📥 Descargar matriz en HTML",
-                data=html.encode('utf-8'),
-                file_name=filename.replace('.pdf', '.html'),
+                data=get_or_build_export(export_key(content_hash, "html"), build_html),
+                file_name=html_filename,
                 mime="text/html",
             )
 
-    styled_body = style_df(df_body_mi.style)
-    styled_total = style_df(df_total_mi.style) if df_total_mi is not None else None
-
     # Combinar tabla con sumas y promedios
     if not df_total.empty:
         df_total_aligned = df_total.reindex(columns=df_body.columns)
@@ -531,7 +430,8 @@ with tab_matrix:
         df_full = df_body.copy()
     
     df_full_mi = apply_multiindex(df_full)
-    styled_full = style_df(df_full_mi.style)
+    styled_full = style_df(df_full_mi)
+    matrix_hash = frame_hash(df_full_mi)
     
     # Calcular altura dinámica: 35px por fila + 100px para headers
     n_rows = len(df_full)
@@ -564,23 +464,19 @@ with tab_matrix:
         height=dynamic_height,
     )
 
+    # Exportaciones bajo demanda, cacheadas por contenido de la matriz
     # Para Excel: exportar tabla completa
-    df_export = df_full.copy()
-
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df_export.to_excel(writer, index=False, sheet_name="Matriz semanal")
-    buffer.seek(0)
-
-    st.download_button(
+    lazy_download_button(
         label="📥 Descargar matriz en Excel",
-        data=buffer.getvalue(),
+        prepare_label="📊 Generar Excel",
+        key=export_key(matrix_hash, "xlsx"),
+        builder=lambda: dataframe_to_excel_bytes(df_full, "Matriz semanal"),
         file_name="matriz_semanal.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
 
     # Botón de descarga del PDF (tabla completa con sumas)
-    download_pdf(df_full_mi, filename=f"matriz_semanal_rls_semana_{current_week or 'NA'}.pdf")
+    download_pdf(matrix_hash, filename=f"matriz_semanal_rls_semana_{current_week or 'NA'}.pdf")
 
     
 # ==========================================
@@ -589,53 +485,25 @@ with tab_matrix:
 with tab_daily:
     
     # Cargar lista de establecimientos permitidos para este usuario
+    # (sólo nombres: el detalle se lee por establecimiento y período)
     with st.spinner('Cargando establecimientos disponibles...'):
         try:
-            # Cargar datos diarios
-            df_daily_all = load_daily_from_db(
+            all_daily_est = daily_establishments(
                 user_id=st.session_state.user_id,
                 is_admin=st.session_state.is_admin
             )
             
-            if df_daily_all.empty:
+            if not all_daily_est:
                 st.warning("No hay datos diarios disponibles para tus empresas asignadas.")
                 st.stop()
             
-            # Extraer establecimientos únicos
-            all_daily_est = df_daily_all["Establecimiento"].unique()
-            
             # Si NO es admin, filtrar por empresas asignadas al usuario
             if not st.session_state.is_admin:
-                from db_connection import execute_query
-                # Obtener empresas del usuario
-                empresas_usuario_query = execute_query(
-                    """
-                    SELECT e.id, e.nombre, e.codigo
-                    FROM empresas e
-                    JOIN usuario_empresa ue ON e.id = ue.empresa_id
-                    WHERE ue.usuario_id = %s
-                    """,
-                    (st.session_state.user_id,),
-                    fetch_all=True
-                )
-                
-                if empresas_usuario_query:
-                    empresa_ids = [e['id'] for e in empresas_usuario_query]
-                    
-                    # Obtener establecimientos de esas empresas
-                    est_permitidos_query = execute_query(
-                        """
-                        SELECT nombre FROM establecimientos
-                        WHERE empresa_id IN ({})
-                        """.format(','.join(['%s'] * len(empresa_ids))),
-                        tuple(empresa_ids),
-                        fetch_all=True
-                    )
-                    
-                    est_permitidos = [e['nombre'] for e in est_permitidos_query] if est_permitidos_query else []
-                    
+                if permisos.empresa_ids:
                     # Filtrar solo los establecimientos permitidos que tienen datos diarios
-                    establecimientos_disponibles = sorted([e for e in all_daily_est if e in est_permitidos])
+                    establecimientos_disponibles = sorted(
+                        e for e in all_daily_est if permisos.can_view_establecimiento(e)
+                    )
                 else:
                     st.warning("No tienes empresas asignadas. Contacta al administrador.")
                     st.stop()
@@ -648,16 +516,54 @@ with tab_daily:
             st.exception(e)
             st.stop()
     
+    col_est, col_periodo = st.columns([3, 1])
+    
     # Selector de establecimiento
-    selected_est_daily = st.selectbox(
+    selected_est_daily = col_est.selectbox(
         "Selecciona un establecimiento para ver el detalle:",
         options=establecimientos_disponibles,
         key="daily_est_selector"
     )
     
+    # Período: por defecto los últimos días con datos; el historial
+    # anterior se lee sólo si se pide (cada rango lee sus particiones)
+    detail_days = DAILY_STORAGE_CONFIG['detail_days']
+    periodos = {detail_days: f"Últimos {detail_days} días", 365: "Último año", None: "Todo el historial"}
+    selected_dias = col_periodo.selectbox(
+        "Período:",
+        options=list(periodos),
+        format_func=periodos.get,
+        key="daily_periodo_selector"
+    )
+    
     if selected_est_daily:
-        # Filtrar datos para ese establecimiento
-        df_daily = df_daily_all[df_daily_all["Establecimiento"] == selected_est_daily].copy()
+        try:
+            ventana = daily_window(
+                user_id=st.session_state.user_id,
+                is_admin=st.session_state.is_admin,
+                establecimiento=selected_est_daily,
+                dias=selected_dias
+            )
+            if ventana is None:
+                st.info("No hay datos diarios para este establecimiento.")
+                st.stop()
+            fecha_desde, fecha_hasta = ventana
+            with st.spinner('Cargando detalle diario...'):
+                df_daily = load_daily_from_db(
+                    user_id=st.session_state.user_id,
+                    is_admin=st.session_state.is_admin,
+                    establecimiento=selected_est_daily,
+                    fecha_desde=fecha_desde,
+                    fecha_hasta=fecha_hasta
+                )
+        except Exception as e:
+            st.error(f"Error al cargar datos diarios: {e}")
+            st.exception(e)
+            st.stop()
+        
+        if fecha_desde is not None:
+            st.caption(f"Del {fecha_desde:%d-%m-%Y} al {fecha_hasta:%d-%m-%Y}. "
+                       "Elige otro período para ver el historial anterior.")
         
         # Filtro por Categoria
         all_cats = sorted(df_daily["CATEGORIA"].dropna().unique()) if "CATEGORIA" in df_daily.columns else []
@@ -705,10 +611,11 @@ with tab_daily:
         # Formateo visual
         styler_daily = df_view.style
         
-        # Formato miles para fechas y total
-        for c in numeric_cols:
-            if c in df_view.columns:
-                styler_daily.format(fmt_miles, subset=[c])
+        # Formato miles para fechas y total (columnar, un solo format)
+        styler_daily.format({
+            c: value_formatter(df_view[c])
+            for c in numeric_cols if c in df_view.columns
+        })
         
         # Estilos básicos
         styler_daily.set_table_styles([
@@ -730,15 +637,12 @@ with tab_daily:
             height=800
         )
         
-        # Exportar detalle diario
-        buffer_daily = io.BytesIO()
-        with pd.ExcelWriter(buffer_daily, engine="openpyxl") as writer:
-            df_view.to_excel(writer, index=False, sheet_name="Detalle Diario")
-        buffer_daily.seek(0)
-
-        st.download_button(
+        # Exportar detalle diario (bajo demanda)
+        lazy_download_button(
             label="📥 Descargar detalle diario en Excel",
-            data=buffer_daily.getvalue(),
+            prepare_label="📊 Generar Excel del detalle diario",
+            key=export_key(frame_hash(df_view), "xlsx"),
+            builder=lambda: dataframe_to_excel_bytes(df_view, "Detalle Diario"),
             file_name=f"detalle_diario_{selected_est_daily}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
@@ -0,0 +1,259 @@
+# ============================================
+# CAPA DE ACCESO ASYNC (asyncpg)
+# Carga concurrente de los datos de la página principal
+# ============================================
+"""
+Capa de acceso a datos asíncrona para las cargas calientes de app_rls.
+
+La página principal hace en cada render varias lecturas independientes
+(semana, histórico, tema de la empresa). Con psycopg2 se ejecutan una tras otra; aquí se lanzan en
+paralelo sobre un pool asyncpg pequeño y la página espera sólo lo que
+tarda la más lenta.
+
+Streamlit es síncrono, así que el event loop vive en un hilo de fondo
+propio del proceso y load_page_data() es la fachada síncrona.
+Si asyncpg no está instalado (o falla), se usan los loaders síncronos
+existentes en un ThreadPoolExecutor, con el mismo resultado.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Any, List
+
+import pandas as pd
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    asyncpg = None
+    ASYNCPG_AVAILABLE = False
+
+from config import DB_CONFIG, ASYNC_DB_CONFIG
+from db_connection import _to_prepare_sql
+import etl
+import config_manager
+
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_pool = None
+_pool_lock: Optional[asyncio.Lock] = None
+
+
+# ============================================
+# EVENT LOOP Y POOL
+# ============================================
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Event loop persistente en un hilo daemon (uno por proceso)."""
+    global _loop, _pool_lock
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _pool_lock = asyncio.Lock()
+            threading.Thread(target=_loop.run_forever, name="async-db-loop", daemon=True).start()
+    return _loop
+
+
+def run(coro, timeout: Optional[float] = None):
+    """Ejecuta una corrutina en el loop de fondo y espera su resultado."""
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    try:
+        return future.result(timeout or ASYNC_DB_CONFIG['timeout'])
+    except FutureTimeoutError:
+        # Cancela la corrutina en el loop: si no, sigue corriendo y
+        # retiene su conexión del pool asyncpg
+        future.cancel()
+        raise
+
+
+async def _init_connection(conn):
+    """
+    NUMERIC → float en cada conexión del pool (como numeric_as_float de
+    db_connection): este pool sólo alimenta los DataFrames de la página.
+    """
+    await conn.set_type_codec('numeric', encoder=str, decoder=float,
+                              schema='pg_catalog', format='text')
+
+
+async def get_pool():
+    """Crea (una sola vez) el pool asyncpg."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(
+                    host=DB_CONFIG['host'],
+                    port=DB_CONFIG['port'],
+                    database=DB_CONFIG['database'],
+                    user=DB_CONFIG['user'],
+                    password=DB_CONFIG['password'] or None,
+                    min_size=ASYNC_DB_CONFIG['min_size'],
+                    max_size=ASYNC_DB_CONFIG['max_size'],
+                    command_timeout=ASYNC_DB_CONFIG['timeout'],
+                    init=_init_connection,
+                )
+                logger.info(
+                    f"Pool async creado: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+                )
+    return _pool
+
+
+def close_pool():
+    """Cierra el pool asyncpg (si existe)."""
+    global _pool
+    if _pool is not None:
+        run(_pool.close())
+        _pool = None
+        logger.info("Pool async cerrado")
+
+
+async def fetch(query: str, params: tuple = (), user_id: Optional[int] = None,
+                is_admin: bool = False) -> List[Dict[str, Any]]:
+    """
+    Ejecuta un SELECT con placeholders %s (mismo SQL que db_connection)
+    y devuelve una lista de dicts.
+
+    El contexto RLS se establece en la conexión antes del query; asyncpg
+    hace RESET ALL al devolverla al pool, así que no se filtra a otro usuario.
+    asyncpg además prepara y cachea cada sentencia por conexión.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        if user_id is not None:
+            await conn.execute("SELECT set_user_context($1, $2)", user_id, is_admin)
+        rows = await conn.fetch(_to_prepare_sql(query), *params)
+    return [dict(row) for row in rows]
+
+
+async def fetch_one(query: str, params: tuple = (), user_id: Optional[int] = None,
+                    is_admin: bool = False) -> Optional[Dict[str, Any]]:
+    """Como fetch() pero devuelve sólo la primera fila (o None)."""
+    rows = await fetch(query, params, user_id, is_admin)
+    return rows[0] if rows else None
+
+
+# ============================================
+# LOADERS ASYNC (mismo SQL y resultado que los síncronos)
+# ============================================
+async def load_week(user_id: int, is_admin: bool = False,
+                    semana: int = None, anio: int = None) -> pd.DataFrame:
+    """Versión async de etl.load_week_from_db."""
+    if semana is None or anio is None:
+        result = await fetch_one(etl.WEEK_MAX_SQL, user_id=user_id, is_admin=is_admin)
+        if result:
+            semana = result['semana'] if semana is None else semana
+            anio = result['anio'] if anio is None else anio
+
+    results = await fetch(etl.WEEK_UNPIVOT_SQL, etl.week_params(semana, anio),
+                          user_id=user_id, is_admin=is_admin)
+    return etl.week_frame(results)
+
+
+async def load_historic(user_id: int = None, is_admin: bool = False) -> pd.DataFrame:
+    """Versión async de etl.load_historic_from_db."""
+    results = await fetch(etl.HISTORIC_SQL, user_id=user_id, is_admin=is_admin)
+    return etl.historic_frame(results)
+
+
+async def load_empresa_theme(empresa_id: int) -> Dict[str, Any]:
+    """Versión async de theme_manager.get_empresa_theme_config (comparte su cache)."""
+    # Import diferido: theme_manager importa streamlit
+    from theme_manager import (
+        EMPRESA_THEME_SQL, theme_config_from_row, get_cached_theme_config, cache_theme_config
+    )
+    config = get_cached_theme_config(empresa_id)
+    if config is not None:
+        return config
+    try:
+        config = theme_config_from_row(await fetch_one(EMPRESA_THEME_SQL, (empresa_id,)))
+        cache_theme_config(empresa_id, config)
+        return config
+    except Exception:
+        return theme_config_from_row(None)
+
+
+# ============================================
+# FACHADA SÍNCRONA
+# ============================================
+def _empty_theme_config() -> Dict[str, Any]:
+    """Config de tema vacía (admins o usuarios sin empresa)."""
+    return {'color_primario': None, 'logo_url': None}
+
+
+def _page_result(df_long, df_hist, configs, empresa_theme) -> Dict[str, Any]:
+    """Arma el dict que consume app_rls a partir de las cargas individuales."""
+    return {
+        'df_long': df_long,
+        'df_hist': df_hist,
+        'filtros_defecto': config_manager.parse_filtros_defecto(configs.get('filtros_defecto')),
+        'nota_semanal': configs.get('nota_semanal'),
+        'nota_visible': config_manager.parse_nota_visible(configs.get('nota_semanal_visible')),
+        'orden_defecto': config_manager.parse_orden_defecto(configs.get('orden_matriz_defecto')),
+        'empresa_theme': empresa_theme,
+    }
+
+
+async def _load_page_async(user_id: int, is_admin: bool, empresa_ids: List[int]) -> tuple:
+    tareas = [
+        load_week(user_id, is_admin),
+        load_historic(user_id, is_admin),
+    ]
+    # El tema sólo aplica a usuarios no admin
+    if empresa_ids:
+        tareas.append(load_empresa_theme(empresa_ids[0]))
+
+    resultados = await asyncio.gather(*tareas)
+    if empresa_ids:
+        return tuple(resultados)
+    return resultados[0], resultados[1], _empty_theme_config()
+
+
+def _load_page_threads(user_id: int, is_admin: bool, empresa_ids: List[int]) -> tuple:
+    """Fallback sin asyncpg: los loaders síncronos en paralelo sobre el pool psycopg2."""
+    from theme_manager import get_empresa_theme_config
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="page-load") as executor:
+        f_week = executor.submit(etl.load_week_from_db, user_id=user_id, is_admin=is_admin)
+        f_hist = executor.submit(etl.load_historic_from_db, user_id=user_id, is_admin=is_admin)
+        if empresa_ids:
+            empresa_theme = executor.submit(get_empresa_theme_config, empresa_ids[0]).result()
+        else:
+            empresa_theme = _empty_theme_config()
+        return f_week.result(), f_hist.result(), empresa_theme
+
+
+def load_page_data(user_id: int, is_admin: bool = False,
+                   empresa_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Carga en paralelo todo lo que necesita la página principal.
+
+    La configuración sale del snapshot cacheado de config_manager
+    (sin query salvo que haya cambiado); el resto se consulta en paralelo.
+
+    Args:
+        user_id: ID del usuario autenticado
+        is_admin: Si es administrador
+        empresa_ids: Empresas del usuario (para el tema; vacío para admin)
+
+    Returns:
+        Dict con: df_long, df_hist, filtros_defecto, nota_semanal, nota_visible,
+        orden_defecto, empresa_theme
+    """
+    empresa_ids = [] if is_admin else list(empresa_ids or [])
+    configs = config_manager.get_configs(config_manager.PAGE_CONFIG_KEYS)
+
+    cargas = None
+    if ASYNCPG_AVAILABLE and ASYNC_DB_CONFIG['enabled']:
+        try:
+            cargas = run(_load_page_async(user_id, is_admin, empresa_ids))
+        except Exception as e:
+            logger.warning(f"Carga async falló, usando loaders síncronos: {e}")
+
+    if cargas is None:
+        cargas = _load_page_threads(user_id, is_admin, empresa_ids)
+
+    df_long, df_hist, empresa_theme = cargas
+    return _page_result(df_long, df_hist, configs, empresa_theme)
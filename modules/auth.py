@@ -4,15 +4,66 @@
 # ============================================
 import bcrypt
 import streamlit as st
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, FrozenSet
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import logging
 
-from db_connection import execute_query
+from db_connection import execute_query, execute_prepared, register_statement
+from data_version import get_data_version
 from config import APP_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Sentencias calientes (se preparan una vez por conexión del pool)
+register_statement("auth_user_companies", """
+    SELECT e.id, e.nombre, e.codigo
+    FROM empresas e
+    JOIN usuario_empresa ue ON e.id = ue.empresa_id
+    WHERE ue.usuario_id = %s
+    ORDER BY e.nombre
+""")
+USER_ESTABLISHMENTS_SQL = """
+    SELECT est.id, est.nombre, emp.nombre as empresa
+    FROM establecimientos est
+    JOIN empresas emp ON est.empresa_id = emp.id
+    WHERE est.empresa_id = ANY(%s)
+    ORDER BY est.nombre
+"""
+register_statement("auth_user_establishments", USER_ESTABLISHMENTS_SQL)
+
+# Ámbito de data_version que invalida los permisos en sesión
+PERMISOS_SCOPE = 'permisos'
+
+
+# ============================================
+# PERMISOS DEL USUARIO (inmutables, en sesión)
+# ============================================
+@dataclass(frozen=True)
+class UserPermissions:
+    """
+    Empresas y establecimientos visibles para un usuario.
+    Se construye al hacer login y se guarda en st.session_state.permisos;
+    sólo se recalcula cuando cambia la versión de datos 'permisos'.
+    """
+    user_id: int
+    is_admin: bool
+    empresa_ids: Tuple[int, ...] = ()                          # ordenadas por nombre de empresa
+    establecimientos: Tuple[Tuple[int, str, str], ...] = ()   # (id, nombre, empresa)
+    empresa_id_set: FrozenSet[int] = frozenset()
+    establecimiento_ids: FrozenSet[int] = frozenset()
+    establecimiento_nombres: FrozenSet[str] = frozenset()
+    version: Optional[int] = None
+
+    def can_view_empresa(self, empresa_id: int) -> bool:
+        return self.is_admin or empresa_id in self.empresa_id_set
+
+    def can_view_establecimiento(self, nombre: str) -> bool:
+        return self.is_admin or nombre in self.establecimiento_nombres
+
+    def can_view_establecimiento_id(self, establecimiento_id: int) -> bool:
+        return self.is_admin or establecimiento_id in self.establecimiento_ids
+
 
 # ============================================
 # SEGURIDAD: Rate Limiting para Login
@@ -141,15 +192,7 @@ def authenticate(username: str, password: str) -> Optional[Dict[str, Any]]:
 def get_user_companies(user_id: int) -> List[Dict[str, Any]]:
     """Obtiene las empresas asociadas a un usuario."""
     try:
-        query = """
-            SELECT e.id, e.nombre, e.codigo
-            FROM empresas e
-            JOIN usuario_empresa ue ON e.id = ue.empresa_id
-            WHERE ue.usuario_id = %s
-            ORDER BY e.nombre
-        """
-        
-        companies = execute_query(query, params=(user_id,), fetch_all=True, return_dict=True)
+        companies = execute_prepared("auth_user_companies", (user_id,), fetch_all=True, return_dict=True)
         return companies or []
         
     except Exception as e:
@@ -157,6 +200,59 @@ def get_user_companies(user_id: int) -> List[Dict[str, Any]]:
         return []
 
 
+def build_user_permissions(user_id: int, is_admin: bool,
+                           companies: Optional[List[Dict[str, Any]]] = None) -> UserPermissions:
+    """
+    Consulta una vez las empresas y establecimientos del usuario.
+    
+    Args:
+        user_id: ID del usuario
+        is_admin: Los administradores ven todo (no se consulta nada)
+        companies: Empresas ya obtenidas con get_user_companies (opcional)
+    """
+    version = get_data_version(PERMISOS_SCOPE)
+    if is_admin:
+        return UserPermissions(user_id=user_id, is_admin=True, version=version)
+    
+    if companies is None:
+        companies = get_user_companies(user_id)
+    empresa_ids = tuple(c['id'] for c in companies)
+    
+    establecimientos = ()
+    if empresa_ids:
+        rows = execute_prepared("auth_user_establishments", (list(empresa_ids),), fetch_all=True) or []
+        establecimientos = tuple((r['id'], r['nombre'], r['empresa']) for r in rows)
+    
+    return UserPermissions(
+        user_id=user_id,
+        is_admin=False,
+        empresa_ids=empresa_ids,
+        establecimientos=establecimientos,
+        empresa_id_set=frozenset(empresa_ids),
+        establecimiento_ids=frozenset(e[0] for e in establecimientos),
+        establecimiento_nombres=frozenset(e[1] for e in establecimientos),
+        version=version
+    )
+
+
+def get_user_permissions() -> UserPermissions:
+    """
+    Permisos del usuario en sesión. Se reconstruyen sólo si no existen
+    o si cambió la versión de datos 'permisos' (empresas, establecimientos,
+    asignaciones).
+    """
+    permisos = st.session_state.get('permisos')
+    if permisos is not None and permisos.version == get_data_version(PERMISOS_SCOPE):
+        return permisos
+    
+    user_id = st.session_state.user_id
+    is_admin = st.session_state.is_admin
+    companies = [] if is_admin else get_user_companies(user_id)
+    st.session_state.empresas = companies
+    st.session_state.permisos = build_user_permissions(user_id, is_admin, companies)
+    return st.session_state.permisos
+
+
 def init_session_state():
     """Inicializa el estado de sesión de Streamlit."""
     if 'authenticated' not in st.session_state:
@@ -171,6 +267,8 @@ def init_session_state():
         st.session_state.is_admin = False
     if 'empresas' not in st.session_state:
         st.session_state.empresas = []
+    if 'permisos' not in st.session_state:
+        st.session_state.permisos = None
 
 
 def login_user(user_data: Dict[str, Any]):
@@ -186,6 +284,9 @@ def login_user(user_data: Dict[str, Any]):
         st.session_state.empresas = get_user_companies(user_data['id'])
     else:
         st.session_state.empresas = []
+    st.session_state.permisos = build_user_permissions(
+        user_data['id'], user_data['is_admin'], st.session_state.empresas
+    )
     
     # Limpiar intentos fallidos tras login exitoso
     clear_login_attempts(user_data['username'])
@@ -269,18 +370,23 @@ def show_login_form():
         # Ver documentación docs/INSTALACION.md para usuarios de prueba en desarrollo
 
 
-def show_user_info():
-    """Muestra información del usuario en el sidebar con estilos mejorados."""
+def show_user_info(theme_config: Optional[Dict[str, Any]] = None):
+    """
+    Muestra información del usuario en el sidebar con estilos mejorados.
+    
+    Args:
+        theme_config: Config de tema de la empresa ya cargada (opcional)
+    """
     if st.session_state.authenticated:
         # Importar y aplicar estilos visuales (sin toggle de tema - usa Streamlit nativo)
         from theme_manager import apply_visual_polish, render_company_logo
         
         # Aplicar estilos visuales profesionales (compatibles con tema nativo)
-        apply_visual_polish()
+        apply_visual_polish(theme_config)
         
         with st.sidebar:
             # Company logo if available
-            render_company_logo()
+            render_company_logo(theme_config)
             
             st.markdown("---")
             st.markdown(f"**👤 Usuario:** {st.session_state.nombre_completo}")
@@ -290,31 +396,10 @@ def show_user_info():
                 st.markdown("**🛡️ Rol:** Administrador")
             else:
                 # Mostrar establecimientos en vez de empresas
-                empresa_ids = [e['id'] for e in st.session_state.empresas] if st.session_state.empresas else []
-                
-                if empresa_ids:
-                    from db_connection import execute_query
-                    # Obtener establecimientos de las empresas del usuario
-                    establecimientos = execute_query(
-                        """
-                        SELECT est.nombre, emp.nombre as empresa
-                        FROM establecimientos est
-                        JOIN empresas emp ON est.empresa_id = emp.id
-                        WHERE est.empresa_id IN ({})
-                        ORDER BY est.nombre
-                        """.format(','.join(['%s'] * len(empresa_ids))),
-                        tuple(empresa_ids),
-                        fetch_all=True
-                    )
-                    
-                    if establecimientos:
-                        st.markdown(f"**📍 Establecimientos:** {len(establecimientos)}")
-                        for est in establecimientos:
-                            st.markdown(f"  • {est['nombre']}")
-                    else:
-                        st.markdown("**📍 Establecimientos:** 0")
-                else:
-                    st.markdown("**📍 Establecimientos:** 0")
+                establecimientos = get_user_permissions().establecimientos
+                st.markdown(f"**📍 Establecimientos:** {len(establecimientos)}")
+                for _est_id, nombre, _empresa in establecimientos:
+                    st.markdown(f"  • {nombre}")
             
             st.markdown("---")
             
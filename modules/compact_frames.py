@@ -0,0 +1,97 @@
+# =====================================================
+# DATAFRAMES COMPACTOS
+# Tipos de columna y reporte de memoria de los frames de la página
+# =====================================================
+"""
+Los loaders arman los DataFrames con pd.DataFrame(filas del driver):
+cada NUMERIC llega como decimal.Decimal (un objeto Python por celda en
+una columna object) y cada texto repetido (Empresa, Establecimiento,
+CONCEPTO...) es un str por fila. Cada sesión de Streamlit guarda varios
+de estos frames y sus copias.
+
+compact_frame() convierte en el borde del driver:
+- columnas numéricas → float64 (8 bytes por celda, operaciones NumPy)
+- textos repetidos → category (un código entero por fila + los textos
+  distintos una sola vez)
+
+float32 queda como opción (float_dtype) para frames de sólo lectura:
+los DECIMAL(10,2) sobre ~167.000 pierden los centavos en float32, así
+que los loaders usan float64.
+
+memory_report() mide la memoria real (deep) de un conjunto de frames.
+Benchmark: benchmarks/bench_page_memory.py
+"""
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def to_float(values: pd.Series, dtype=np.float64) -> pd.Series:
+    """Serie (Decimal, int, None, texto numérico) → float; lo no numérico queda NaN."""
+    try:
+        return values.astype(dtype)
+    except (TypeError, ValueError):
+        return pd.to_numeric(values, errors="coerce").astype(dtype)
+
+
+def compact_frame(df: pd.DataFrame, categories: Iterable[str] = (), floats: Iterable[str] = (),
+                  float_dtype=np.float64) -> pd.DataFrame:
+    """
+    Convierte en el mismo DataFrame las columnas indicadas (las que no
+    existan se ignoran) y lo devuelve.
+
+    Args:
+        categories: Columnas de texto repetido → category
+        floats: Columnas numéricas → float_dtype
+        float_dtype: np.float64 (por defecto) o np.float32
+    """
+    for col in floats:
+        if col in df.columns and df[col].dtype != float_dtype:
+            df[col] = to_float(df[col], float_dtype)
+    for col in categories:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def frame_from_rows(rows: List[dict], columns: Optional[List[str]] = None,
+                    categories: Iterable[str] = (), floats: Iterable[str] = (),
+                    float_dtype=np.float64) -> pd.DataFrame:
+    """pd.DataFrame(rows) + compact_frame (frame vacío con `columns` si no hay filas)."""
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    return compact_frame(pd.DataFrame(rows), categories, floats, float_dtype)
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """Memoria del frame incluyendo los objetos Python de las columnas object."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def memory_report(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Memoria por frame: Frame | Filas | Columnas | MB | Bytes por fila,
+    más una fila Total. Los valores que no son DataFrame se ignoran.
+    """
+    rows = []
+    for nombre, df in frames.items():
+        if not isinstance(df, pd.DataFrame):
+            continue
+        total = frame_bytes(df)
+        rows.append({
+            "Frame": nombre,
+            "Filas": len(df),
+            "Columnas": len(df.columns),
+            "MB": round(total / 1024 / 1024, 3),
+            "Bytes por fila": round(total / len(df)) if len(df) else 0,
+        })
+    if rows:
+        rows.append({
+            "Frame": "Total",
+            "Filas": sum(r["Filas"] for r in rows),
+            "Columnas": None,
+            "MB": round(sum(r["MB"] for r in rows), 3),
+            "Bytes por fila": None,
+        })
+    return pd.DataFrame(rows, columns=["Frame", "Filas", "Columnas", "MB", "Bytes por fila"])
@@ -0,0 +1,435 @@
+# =====================================================
+# CATÁLOGO DE CONCEPTOS Y ALIAS
+# =====================================================
+"""
+Catálogo único de conceptos: texto del Excel → concepto → columna en BD.
+
+Antes cada camino tenía su propio mapeo (CONCEPT_MAP en concept_engine,
+concepto_map en ExcelProcessor._aggregate_to_semanal, COLUMN_MAP en
+HistoricoProcessor y las reglas de _clean_concept en etl), la mayoría
+recorriendo listas de substrings por cada fila.
+
+Aquí:
+- CONCEPTOS define cada concepto (clave interna) y sus columnas en
+  datos_semanales / datos_historicos.
+- ALIAS_BASE son los textos conocidos de los Excel; la tabla
+  concepto_alias (db/migrations/create_concepto_alias_table.sql) agrega
+  los que confirman los administradores.
+- Ambos se cargan en un índice en memoria (texto normalizado → clave),
+  así que resolver un concepto es una búsqueda en diccionario. El índice
+  se recarga cuando cambia la versión de datos 'conceptos'.
+- Los patrones de substring de los mapeos anteriores quedan sólo como
+  respaldo para textos nuevos, y su resultado se memoriza por texto.
+- set_offline() deja sólo ALIAS_BASE, sin consultar la base (benchmarks
+  sin BD).
+"""
+import re
+import logging
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Ámbito de data_version que invalida el índice en memoria
+CONCEPTOS_SCOPE = 'conceptos'
+
+ALIAS_SQL = "SELECT alias_norm, concepto_key FROM concepto_alias"
+
+# Prefijo entre paréntesis de los Excel: "(A) ", "(1) ", "(BB) "
+PREFIJO_RE = re.compile(r"^\([A-Za-z0-9]+\)\s*")
+
+
+class Concepto(NamedTuple):
+    """Concepto interno y dónde se guarda."""
+    nombre: str
+    semanal: Optional[str] = None      # columna de datos_semanales (None = no se guarda)
+    historico: Optional[str] = None    # columna de datos_historicos
+
+
+# Clave interna (la misma de concept_engine) → concepto
+CONCEPTOS: Dict[str, Concepto] = {
+    # Identificadores del histórico
+    'semana': Concepto("N° Semana", historico='semana'),
+    'fecha': Concepto("Fecha", historico='fecha'),
+    'establecimiento': Concepto("Establecimiento", historico='establecimiento'),
+
+    # Vacas
+    'vacas_ordena': Concepto("Vacas en ordeña", 'vacas_en_ordena', 'vacas_en_ordena'),
+    'vacas_masa': Concepto("Vacas masa", 'vacas_masa', 'vacas_masa'),
+    'vacas_produccion': Concepto("Vacas en producción", historico='vacas_en_produccion'),
+    'superficie_praderas': Concepto("Superficie Praderas", 'superficie_pradera', 'superficie_praderas'),
+
+    # Producción y leche
+    'produccion_prom': Concepto("Producción promedio", 'produccion_promedio'),
+    'produccion_total': Concepto("Producción total", historico='produccion_total'),
+    'precio_leche': Concepto("Precio de la leche", 'precio_leche', 'precio_leche'),
+    'leche_enviada': Concepto("Leche enviada", historico='leche_enviada'),
+    'leche_no_vendible': Concepto("Leche no vendible", historico='leche_no_vendible'),
+    'pna_terneros': Concepto("PNA terneros", historico='pna_terneros'),
+    'dias_lactancia': Concepto("Días de lactancia promedio", historico='dias_lactancia'),
+    'porc_leche_no_vendible': Concepto("Porcentaje leche no vendible",
+                                       historico='porcentaje_leche_no_vendible'),
+    'relacion_ordena_masa': Concepto("Relación vaca ordeña / vaca masa",
+                                     historico='relacion_ordena_masa'),
+    'eficiencia': Concepto("Eficiencia", historico='eficiencia'),
+
+    # Calidad
+    'porc_grasa': Concepto("Porcentaje de grasa", 'porcentaje_grasa', 'porcentaje_grasa'),
+    'proteinas': Concepto("Proteinas", 'proteinas', 'porcentaje_proteina'),
+
+    # MS (pradera + verde se suman en praderas_otros_verdes al agregar la semana)
+    'ms_pradera': Concepto("Kg MS Pradera / vaca", 'kg_ms_pradera_vaca', 'kg_ms_pradera'),
+    'ms_verde': Concepto("Kg MS Verde / vaca", 'kg_ms_verde_vaca'),
+    'ms_conservado': Concepto("Kg MS Conservado / vaca", 'kg_ms_conservado_vaca', 'kg_ms_conservado'),
+    'ms_concentrado': Concepto("Kg MS Concentrado / vaca", 'kg_ms_concentrado_vaca', 'kg_ms_concentrado'),
+    'praderas_otros_verdes': Concepto("Praderas y otros verdes"),
+    'total_ms': Concepto("Total MS", 'total_ms'),
+    'consumo_ms': Concepto("Consumo de mat. seca", historico='consumo_ms'),
+    'ms_por_ha': Concepto("Mat. Seca por Ha", historico='ms_por_ha'),
+
+    # Costos
+    'costo_racion_vaca': Concepto("Costo ración vaca", 'costo_racion_vaca', 'costo_racion_vaca'),
+    'costo_concentrado': Concepto("Costo promedio concentrado", 'costo_promedio_concentrado'),
+    'gramos_por_litro': Concepto("Grms concentrado / ltr leche", 'grms_concentrado_por_litro'),
+    'porc_costo_alimentos': Concepto("Porcentaje costo alimentos", 'porcentaje_costo_alimentos'),
+
+    # MDAT
+    'mdat': Concepto("MDAT", 'mdat', 'mdat'),
+    'mdat_litros': Concepto("MDAT (L/vaca/día)", 'mdat_litros_vaca_dia'),
+}
+
+# Textos conocidos (reporte semanal e histórico) → clave. Se comparan
+# normalizados (sin prefijo, minúsculas, sin tildes), así que no hace
+# falta repetir variantes con/sin tilde o mayúsculas.
+ALIAS_BASE: Dict[str, str] = {
+    # Identificadores del histórico
+    "Semana": 'semana',
+    "N° Semana": 'semana',
+    "Nº Semana": 'semana',
+    "Nâ° Semana": 'semana',
+    "Fecha": 'fecha',
+    "Establecimiento": 'establecimiento',
+    "Empresa": 'establecimiento',
+
+    # Vacas
+    "Vacas en ordeña": 'vacas_ordena',
+    "Vacas masa": 'vacas_masa',
+    "Vacas en producción": 'vacas_produccion',
+    "Superficie Praderas": 'superficie_praderas',
+
+    # Producción y leche
+    "Producción promedio": 'produccion_prom',
+    "Producción total": 'produccion_total',
+    "Precio de la leche": 'precio_leche',
+    "Leche enviada": 'leche_enviada',
+    "Leche no vendible": 'leche_no_vendible',
+    "PNA terneros": 'pna_terneros',
+    "Días de lactancia promedio": 'dias_lactancia',
+    "Días lactancia": 'dias_lactancia',
+    "Porcentaje leche no vendible": 'porc_leche_no_vendible',
+    "% Leche no vendible": 'porc_leche_no_vendible',
+    "Relación vaca ordeña / vaca masa": 'relacion_ordena_masa',
+    "Eficiencia": 'eficiencia',
+
+    # Calidad
+    "Porcentaje de grasa": 'porc_grasa',
+    "% de grasa": 'porc_grasa',
+    "% Grasa": 'porc_grasa',
+    "Proteinas": 'proteinas',
+    "% Proteína": 'proteinas',
+
+    # MS
+    "Kg MS Pradera / vaca": 'ms_pradera',
+    "Kg MS pradera": 'ms_pradera',
+    "Kg MS Verde / vaca": 'ms_verde',
+    "Kg MS Conservado / vaca": 'ms_conservado',
+    "Kg MS conservado": 'ms_conservado',
+    "Kg MS Concentrado / vaca": 'ms_concentrado',
+    "Kg MS concentrado": 'ms_concentrado',
+    "Praderas y otros verdes": 'praderas_otros_verdes',
+    "Total MS": 'total_ms',
+    "Consumo de mat. seca": 'consumo_ms',
+    "Consumo MS": 'consumo_ms',
+    "Mat. Seca por Ha": 'ms_por_ha',
+    "MS por Ha": 'ms_por_ha',
+
+    # Costos
+    "Costo ración vaca": 'costo_racion_vaca',
+    "Costo promedio concentrado": 'costo_concentrado',
+    "Grms concentrado / ltr leche": 'gramos_por_litro',
+    "Porcentaje costo alimentos": 'porc_costo_alimentos',
+
+    # MDAT
+    "MDAT": 'mdat',
+    "MDAT (L/vaca/día)": 'mdat_litros',
+}
+
+# Respaldo para textos que no están en el índice (encoding corrupto,
+# variantes nuevas): substrings normalizados, el primero que calce gana.
+# Reporte semanal: los patrones del antiguo concepto_map de ExcelProcessor,
+# sin los demasiado amplios ('promedio' también tomaba "Costo promedio
+# concentrado"; ') mdat' también tomaba "MDAT (L/vaca/día)").
+PATRONES_SEMANAL: List[Tuple[str, str]] = [
+    ('superficie', 'superficie_praderas'),
+    ('vacas en orde', 'vacas_ordena'),
+    ('vacas masa', 'vacas_masa'),
+    ('produccion promedio', 'produccion_prom'),
+    ('precio de la leche', 'precio_leche'),
+    ('porcentaje de grasa', 'porc_grasa'),
+    ('% de grasa', 'porc_grasa'),
+    ('proteinas', 'proteinas'),
+    ('kg ms pradera / vaca', 'ms_pradera'),
+    ('kg ms concentrado / vaca', 'ms_concentrado'),
+    ('kg ms conservado / vaca', 'ms_conservado'),
+    ('kg ms verde / vaca', 'ms_verde'),
+    ('total ms', 'total_ms'),
+    ('costo raci', 'costo_racion_vaca'),
+    ('costo promedio concentrado', 'costo_concentrado'),
+    ('grms concentrado / ltr leche', 'gramos_por_litro'),
+    ('mdat (l/vaca', 'mdat_litros'),
+    ('porcentaje costo alimentos', 'porc_costo_alimentos'),
+]
+
+# Histórico: el antiguo HistoricoProcessor.COLUMN_MAP, en el mismo orden
+# (los patrones más específicos primero)
+PATRONES_HISTORICO: List[Tuple[str, str]] = [
+    ('semana', 'semana'),
+    ('fecha', 'fecha'),
+    ('establecimiento', 'establecimiento'),
+    ('empresa', 'establecimiento'),
+    ('vacas en ord', 'vacas_ordena'),
+    ('vacas masa', 'vacas_masa'),
+    ('vacas en producci', 'vacas_produccion'),
+    ('le envian', 'leche_enviada'),
+    ('leche enviada', 'leche_enviada'),
+    ('che no', 'leche_no_vendible'),
+    ('pna terr', 'pna_terneros'),
+    ('pna tern', 'pna_terneros'),
+    ('produccion', 'produccion_total'),
+    ('precio de', 'precio_leche'),
+    ('lactancia', 'dias_lactancia'),
+    ('grasa', 'porc_grasa'),
+    ('% prot', 'proteinas'),
+    ('proteina', 'proteinas'),
+    ('kg ms prad', 'ms_pradera'),
+    ('ms pradera', 'ms_pradera'),
+    ('kg ms cons', 'ms_conservado'),
+    ('ms conserv', 'ms_conservado'),
+    ('kg ms conc', 'ms_concentrado'),
+    ('ms concent', 'ms_concentrado'),
+    ('consumo ms', 'consumo_ms'),
+    ('ms var', 'consumo_ms'),
+    ('ms por ha', 'ms_por_ha'),
+    ('ms/ha', 'ms_por_ha'),
+    ('taje leche', 'costo_racion_vaca'),
+    ('costo raci', 'costo_racion_vaca'),
+    ('mdat', 'mdat'),
+    ('eficie', 'eficiencia'),
+    ('centaje c', 'relacion_ordena_masa'),
+    ('superficie', 'superficie_praderas'),
+    ('% leche no', 'porc_leche_no_vendible'),
+]
+
+PATRONES = {
+    'semanal': PATRONES_SEMANAL,
+    'historico': PATRONES_HISTORICO,
+}
+
+
+# ==========================================
+# Normalización
+# ==========================================
+
+def strip_prefix(txt: str) -> str:
+    """Quita el prefijo "(A) " y los espacios repetidos, conservando el texto."""
+    txt = PREFIJO_RE.sub("", txt.strip())
+    return " ".join(txt.split())
+
+
+@lru_cache(maxsize=4096)
+def normalize_alias(txt: str) -> str:
+    """
+    Forma canónica de un texto de concepto o columna: sin prefijo,
+    minúsculas, sin tildes ni caracteres de encoding roto ('�', '?', '°').
+    """
+    if not txt:
+        return ""
+    txt = unicodedata.normalize('NFD', strip_prefix(txt).lower())
+    txt = ''.join(c for c in txt if unicodedata.category(c) != 'Mn')
+    for ch in ('�', '?', '°', 'º'):
+        txt = txt.replace(ch, '')
+    return " ".join(txt.split())
+
+
+# ==========================================
+# Índice en memoria
+# ==========================================
+
+_index: Optional[Dict[str, str]] = None
+_index_version = None
+# Sin base de datos: sólo ALIAS_BASE, sin data_version ni concepto_alias
+_offline = False
+# Resoluciones por (texto normalizado, contexto), incluidas las de respaldo
+_resolved: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+_lock = threading.Lock()
+
+
+def _current_version():
+    if _offline:
+        return None
+    try:
+        from data_version import get_data_version
+        return get_data_version(CONCEPTOS_SCOPE)
+    except Exception:
+        return None
+
+
+def _load_index() -> Dict[str, str]:
+    index = {normalize_alias(alias): key for alias, key in ALIAS_BASE.items()}
+    if _offline:
+        return index
+    try:
+        from db_connection import execute_query
+        rows = execute_query(ALIAS_SQL) or []
+    except Exception as e:
+        logger.debug(f"No se pudo leer concepto_alias: {e}")
+        rows = []
+    for row in rows:
+        if row['concepto_key'] in CONCEPTOS:
+            index[row['alias_norm']] = row['concepto_key']
+    return index
+
+
+def get_index() -> Dict[str, str]:
+    """Índice texto normalizado → clave (se recarga si cambió 'conceptos')."""
+    global _index, _index_version
+
+    version = _current_version()
+    with _lock:
+        if _index is None or version != _index_version:
+            _index = _load_index()
+            _index_version = version
+            _resolved.clear()
+        return _index
+
+
+def set_offline(offline: bool = True):
+    """Usa sólo ALIAS_BASE, sin leer data_version ni concepto_alias de la base."""
+    global _offline
+    _offline = offline
+    invalidate_index()
+
+
+def invalidate_index():
+    """Fuerza a recargar el índice en la próxima resolución."""
+    global _index
+    with _lock:
+        _index = None
+        _resolved.clear()
+
+
+# ==========================================
+# Resolución
+# ==========================================
+
+def _resolve(txt, contexto: Optional[str], index: Dict[str, str]) -> Optional[str]:
+    if txt is None or pd.isna(txt):
+        return None
+    norm = normalize_alias(str(txt))
+    key = index.get(norm)
+    if key is not None or contexto is None:
+        return key
+
+    cache_key = (norm, contexto)
+    if cache_key in _resolved:
+        return _resolved[cache_key]
+    key = next((k for patron, k in PATRONES[contexto] if patron in norm), None)
+    _resolved[cache_key] = key
+    return key
+
+
+def resolve(txt, contexto: Optional[str] = None) -> Optional[str]:
+    """
+    Clave interna de un concepto (None si no se reconoce).
+
+    Args:
+        txt: Texto tal como viene en el Excel o en la BD
+        contexto: 'semanal' o 'historico' para usar los patrones de
+                  respaldo de ese camino; None = sólo el índice
+    """
+    return _resolve(txt, contexto, get_index())
+
+
+def resolve_series(values: pd.Series, contexto: Optional[str] = None) -> pd.Series:
+    """Resuelve una columna completa, una vez por valor distinto."""
+    index = get_index()
+    codes, uniques = pd.factorize(values)
+    # Último elemento = valor para los nulos (código -1)
+    keys = pd.Series([_resolve(v, contexto, index) for v in uniques] + [None])
+    codes[codes < 0] = len(uniques)
+    return keys.iloc[codes].set_axis(values.index)
+
+
+def columna_semanal(key: Optional[str]) -> Optional[str]:
+    """Columna de datos_semanales de una clave (None si no se guarda)."""
+    concepto = CONCEPTOS.get(key)
+    return concepto.semanal if concepto else None
+
+
+def columna_historico(key: Optional[str]) -> Optional[str]:
+    """Columna de datos_historicos de una clave."""
+    concepto = CONCEPTOS.get(key)
+    return concepto.historico if concepto else None
+
+
+def unmapped_concepts(values: Iterable, contexto: Optional[str] = 'semanal') -> List[str]:
+    """Textos distintos (sin prefijo) que no se reconocen, ordenados."""
+    index = get_index()
+    pendientes = {
+        strip_prefix(str(v)) for v in pd.unique(pd.Series(list(values), dtype=object).dropna())
+        if str(v).strip() and _resolve(v, contexto, index) is None
+    }
+    return sorted(pendientes)
+
+
+# ==========================================
+# Confirmación de alias (admin)
+# ==========================================
+
+def confirm_alias(alias: str, concepto_key: str, usuario_id: Optional[int] = None) -> bool:
+    """
+    Registra un alias confirmado por un administrador en concepto_alias
+    y lo agrega al índice en memoria.
+    """
+    if concepto_key not in CONCEPTOS:
+        raise ValueError(f"Concepto desconocido: {concepto_key}")
+    norm = normalize_alias(alias)
+    if not norm:
+        raise ValueError("El alias está vacío")
+
+    from db_connection import execute_update
+    execute_update("""
+        INSERT INTO concepto_alias (alias_norm, alias, concepto_key, origen, confirmado_por)
+        VALUES (%s, %s, %s, 'admin', %s)
+        ON CONFLICT (alias_norm) DO UPDATE SET
+            alias = EXCLUDED.alias,
+            concepto_key = EXCLUDED.concepto_key,
+            origen = EXCLUDED.origen,
+            confirmado_por = EXCLUDED.confirmado_por,
+            updated_at = CURRENT_TIMESTAMP
+    """, (norm, strip_prefix(alias), concepto_key, usuario_id))
+
+    try:
+        from data_version import invalidate_data_versions
+        invalidate_data_versions()
+    except Exception:
+        pass
+    with _lock:
+        if _index is not None:
+            _index[norm] = concepto_key
+        _resolved.clear()
+    return True
@@ -2,13 +2,15 @@
 
 import pandas as pd
 import numpy as np
-import unicodedata
 import re
 
+from concept_catalog import resolve, resolve_series
+
 # ==========================================
-# Mapeo de conceptos Excel → clave interna
+# Columnas de la matriz: concepto Excel → clave interna
 # Los conceptos vienen limpios (sin prefijo "(A) ", "(B) ", etc.)
-# gracias a _clean_concept en etl.py
+# gracias a _clean_concept en etl.py. La resolución de cualquier texto
+# a su clave la hace concept_catalog (índice compartido).
 # ==========================================
 
 CONCEPT_MAP = {
@@ -58,51 +60,28 @@ CONCEPT_MAP = {
 }
 
 
-def _normalize_text(txt: str) -> str:
-    """
-    Normaliza texto quitando acentos y caracteres especiales
-    para hacer matching más robusto.
-    """
-    if not txt:
-        return ""
-    # Normalizar unicode (NFD = descomponer caracteres con acentos)
-    txt = unicodedata.normalize('NFD', txt)
-    # Quitar caracteres de combinación (acentos)
-    txt = ''.join(c for c in txt if unicodedata.category(c) != 'Mn')
-    # Reemplazar caracteres problemáticos de encoding
-    txt = txt.replace('�', '')
-    txt = txt.replace('?', '')
-    return txt
-
-
 # ==========================================
 # Normalizador de conceptos
 # ==========================================
 
-def attach_normalized_concepts(df: pd.DataFrame) -> pd.DataFrame:
+def map_concept(concepto) -> str | None:
+    """Clave interna de un CONCEPTO (None si no está en el catálogo)."""
+    return resolve(concepto)
+
+
+def attach_normalized_concepts(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
     """
     Adjunta la columna Concepto_Norm mapeando CONCEPTO → clave interna.
-    Usa matching normalizado (sin acentos) para mayor robustez.
+    Usa el índice de concept_catalog (texto normalizado, sin acentos).
+
+    El mapeo se hace sobre los conceptos distintos (pocas decenas) y se
+    propaga a todas las filas con sus códigos. Con copy=False la columna
+    se agrega sobre el mismo DataFrame en vez de copiarlo completo.
     """
-    df = df.copy()
-    
-    # Crear versión normalizada del CONCEPT_MAP
-    concept_map_norm = {}
-    for k, v in CONCEPT_MAP.items():
-        key_norm = _normalize_text(k.lower())
-        concept_map_norm[key_norm] = v
-    
-    def map_concept(concepto):
-        if pd.isna(concepto):
-            return None
-        # Intentar mapeo directo primero
-        if concepto in CONCEPT_MAP:
-            return CONCEPT_MAP[concepto]
-        # Si no, normalizar y buscar
-        concepto_norm = _normalize_text(str(concepto).lower())
-        return concept_map_norm.get(concepto_norm)
-    
-    df["Concepto_Norm"] = df["CONCEPTO"].apply(map_concept)
+    if copy:
+        df = df.copy()
+
+    df["Concepto_Norm"] = resolve_series(df["CONCEPTO"])
     return df
 
 
@@ -123,15 +102,23 @@ def compute_metric(df: pd.DataFrame, est: str, concept_key: str) -> float:
     if sub.empty:
         # Intentar consultar datos diarios si el DataFrame tiene la función disponible
         try:
-            from etl import load_daily_from_db
+            from etl import load_daily_from_db, daily_window
+            from config import DAILY_STORAGE_CONFIG
             # Se asume que user_id y is_admin están disponibles en session_state
             import streamlit as st
             user_id = getattr(st.session_state, "user_id", None)
             is_admin = getattr(st.session_state, "is_admin", False)
-            df_daily = load_daily_from_db(user_id=user_id, is_admin=is_admin, establecimiento=est)
+            # Promedio de los últimos días con datos (mismo período que
+            # Detalle diario): lee sólo las particiones de ese rango
+            ventana = daily_window(user_id=user_id, is_admin=is_admin, establecimiento=est,
+                                   dias=DAILY_STORAGE_CONFIG['detail_days'])
+            if ventana is None:
+                return np.nan
+            df_daily = load_daily_from_db(user_id=user_id, is_admin=is_admin, establecimiento=est,
+                                          fecha_desde=ventana[0], fecha_hasta=ventana[1])
             # Normalizar conceptos en el diario
             if not df_daily.empty:
-                df_daily = attach_normalized_concepts(df_daily)
+                df_daily = attach_normalized_concepts(df_daily, copy=False)
                 sub_daily = df_daily[df_daily["Concepto_Norm"] == concept_key]
                 # Buscar columnas de fechas
                 date_pattern = re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$')
@@ -26,6 +26,20 @@ POOL_CONFIG = {
     'maxconn': int(os.getenv('DB_POOL_MAX', '20')),
 }
 
+# Lectura columnar (db_connection.execute_frame): filas por fetchmany del
+# cursor de servidor; cada lote se convierte a columnas tipadas y se libera
+FETCH_CONFIG = {
+    'chunk_size': int(os.getenv('DB_FETCH_CHUNK_SIZE', '20000')),
+}
+
+# Pool async (asyncpg) para la carga concurrente de la página principal
+ASYNC_DB_CONFIG = {
+    'enabled': os.getenv('ASYNC_DB_ENABLED', 'true').lower() == 'true',
+    'min_size': int(os.getenv('ASYNC_DB_POOL_MIN', '1')),
+    'max_size': int(os.getenv('ASYNC_DB_POOL_MAX', '5')),
+    'timeout': float(os.getenv('ASYNC_DB_TIMEOUT', '30')),
+}
+
 # ============================================
 # CONFIGURACIÓN DE REDIS (CACHE)
 # ============================================
@@ -36,6 +50,73 @@ REDIS_CONFIG = {
     'enabled': os.getenv('REDIS_ENABLED', 'true').lower() == 'true',
 }
 
+# ============================================
+# MONITOREO DE QUERIES LENTAS
+# ============================================
+QUERY_STATS_CONFIG = {
+    'enabled': os.getenv('SLOW_QUERY_LOG', 'true').lower() == 'true',
+    'slow_query_ms': float(os.getenv('SLOW_QUERY_MS', '500')),
+    # Fracción de queries lentas (SELECT) que se re-ejecutan con EXPLAIN ANALYZE
+    'explain_sample_rate': float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', '0.1')),
+    # Guardar en tabla query_stats (además del log)
+    'persist': os.getenv('SLOW_QUERY_PERSIST', 'true').lower() == 'true',
+}
+
+# ============================================
+# CACHE DE configuracion_app
+# ============================================
+CONFIG_CACHE_CONFIG = {
+    # Cada cuántos segundos se verifica updated_at para detectar cambios
+    # hechos por otros procesos (0 = en cada lectura)
+    'poll_seconds': float(os.getenv('CONFIG_CACHE_POLL_SECONDS', '5')),
+    # Vigencia del tema (color/logo) cacheado por empresa
+    'theme_ttl_seconds': float(os.getenv('THEME_CACHE_TTL_SECONDS', '60')),
+}
+
+# ============================================
+# CACHE DE EXPORTACIONES (Excel / PDF)
+# ============================================
+EXPORT_CACHE_CONFIG = {
+    # Tamaño máximo total del cache en memoria (por proceso)
+    'max_bytes': int(float(os.getenv('EXPORT_CACHE_MAX_MB', '64')) * 1024 * 1024),
+}
+
+# Renderizado PDF (wkhtmltopdf): procesos simultáneos, cola y timeout
+PDF_RENDER_CONFIG = {
+    'workers': int(os.getenv('PDF_RENDER_WORKERS', '2')),
+    'queue_size': int(os.getenv('PDF_RENDER_QUEUE', '8')),
+    'timeout': float(os.getenv('PDF_RENDER_TIMEOUT', '60')),
+    # Espera máxima adicional en cola antes de iniciar el render
+    'queue_timeout': float(os.getenv('PDF_RENDER_QUEUE_TIMEOUT', '60')),
+}
+
+# ============================================
+# PARTICIONES DE datos_diarios
+# ============================================
+# Ver db/migrations/partition_datos_diarios.sql y modules/partition_manager.py
+PARTITION_CONFIG = {
+    # 'mensual' o 'anual'
+    'granularity': os.getenv('DAILY_PARTITION_GRANULARITY', 'mensual'),
+    # Períodos futuros que se crean por adelantado
+    'ahead': int(os.getenv('DAILY_PARTITIONS_AHEAD', '3')),
+    # Esquema donde quedan las particiones archivadas
+    'archive_schema': os.getenv('DAILY_PARTITION_ARCHIVE_SCHEMA', 'archivo'),
+}
+
+# ============================================
+# ALMACENAMIENTO DE DATOS DIARIOS
+# ============================================
+# Ver db/migrations/datos_diarios_semana.sql
+DAILY_STORAGE_CONFIG = {
+    # 'filas' (datos_diarios), 'semana' (datos_diarios_semana, un FLOAT8[7]
+    # por establecimiento/concepto/semana) o 'ambos' (escribe en las dos,
+    # lee de datos_diarios)
+    'mode': os.getenv('DAILY_STORAGE_MODE', 'filas'),
+    # Días que carga el Detalle diario por defecto (hasta la última fecha
+    # con datos); el historial anterior se pide eligiendo otro período
+    'detail_days': int(os.getenv('DAILY_DETAIL_DAYS', '90')),
+}
+
 # ============================================
 # CONFIGURACIÓN DE LA APLICACIÓN
 # ============================================
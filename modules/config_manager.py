@@ -1,20 +1,77 @@
 """
 Módulo de gestión de configuración de la aplicación.
 Permite al admin configurar filtros por defecto y notas semanales.
+
+Las lecturas se sirven desde un snapshot inmutable de toda la tabla
+configuracion_app (una sola query), cacheado a nivel de proceso.
+set_config lo invalida; los cambios hechos por otros procesos se
+detectan consultando MAX(updated_at) cada CONFIG_CACHE_CONFIG['poll_seconds'].
 """
 import json
-from typing import Optional, List
+import time
+import threading
+from types import MappingProxyType
+from typing import Optional, List, Dict, Mapping
 from db_connection import execute_query, execute_update
+from config import CONFIG_CACHE_CONFIG
+
+CONFIG_SNAPSHOT_SQL = "SELECT clave, valor FROM configuracion_app"
+CONFIG_VERSION_SQL = "SELECT MAX(updated_at) AS version, COUNT(*) AS filas FROM configuracion_app"
+
+# Claves que lee la página principal en cada carga
+PAGE_CONFIG_KEYS = ['filtros_defecto', 'nota_semanal', 'nota_semanal_visible', 'orden_matriz_defecto']
+
+ORDEN_DEFECTO = {'columna': 'Establecimiento', 'ascendente': True}
+
+# Snapshot cacheado: (dict inmutable, versión, instante de la última verificación)
+_snapshot: Optional[Mapping[str, Optional[str]]] = None
+_snapshot_version = None
+_snapshot_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def _get_version():
+    row = execute_query(CONFIG_VERSION_SQL, fetch_one=True)
+    return (row['version'], row['filas']) if row else (None, 0)
+
+
+def get_config_snapshot() -> Mapping[str, Optional[str]]:
+    """
+    Devuelve todas las configuraciones como dict inmutable (clave → valor).
+    Recarga la tabla completa sólo si fue invalidada o cambió su versión.
+    """
+    global _snapshot, _snapshot_version, _snapshot_checked_at
+
+    with _snapshot_lock:
+        now = time.monotonic()
+        if _snapshot is not None and now - _snapshot_checked_at < CONFIG_CACHE_CONFIG['poll_seconds']:
+            return _snapshot
+
+        version = _get_version()
+        if _snapshot is None or version != _snapshot_version:
+            rows = execute_query(CONFIG_SNAPSHOT_SQL) or []
+            _snapshot = MappingProxyType({row['clave']: row['valor'] for row in rows})
+            _snapshot_version = version
+        _snapshot_checked_at = now
+        return _snapshot
+
+
+def invalidate_config_cache():
+    """Fuerza la recarga del snapshot en la próxima lectura."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
 
 
 def get_config(clave: str) -> Optional[str]:
     """Obtiene el valor de una configuración por clave."""
-    result = execute_query(
-        "SELECT valor FROM configuracion_app WHERE clave = %s",
-        (clave,),
-        fetch_one=True
-    )
-    return result['valor'] if result else None
+    return get_config_snapshot().get(clave)
+
+
+def get_configs(claves: List[str]) -> Dict[str, Optional[str]]:
+    """Obtiene varias configuraciones del mismo snapshot (clave → valor)."""
+    snapshot = get_config_snapshot()
+    return {clave: snapshot.get(clave) for clave in claves}
 
 
 def set_config(clave: str, valor: str, user_id: int = None) -> bool:
@@ -31,15 +88,15 @@ def set_config(clave: str, valor: str, user_id: int = None) -> bool:
             """,
             (clave, valor, user_id)
         )
+        invalidate_config_cache()
         return True
     except Exception as e:
         print(f"Error guardando config: {e}")
         return False
 
 
-def get_filtros_defecto() -> List[str]:
-    """Obtiene la lista de establecimientos por defecto para filtros."""
-    valor = get_config('filtros_defecto')
+def parse_filtros_defecto(valor: Optional[str]) -> List[str]:
+    """Interpreta el valor guardado de 'filtros_defecto'."""
     if valor:
         try:
             return json.loads(valor)
@@ -48,6 +105,11 @@ def get_filtros_defecto() -> List[str]:
     return []
 
 
+def get_filtros_defecto() -> List[str]:
+    """Obtiene la lista de establecimientos por defecto para filtros."""
+    return parse_filtros_defecto(get_config('filtros_defecto'))
+
+
 def set_filtros_defecto(establecimientos: List[str], user_id: int = None) -> bool:
     """Guarda la lista de establecimientos por defecto."""
     return set_config('filtros_defecto', json.dumps(establecimientos), user_id)
@@ -63,10 +125,14 @@ def set_nota_semanal(nota: str, user_id: int = None) -> bool:
     return set_config('nota_semanal', nota, user_id)
 
 
+def parse_nota_visible(valor: Optional[str]) -> bool:
+    """Interpreta el valor guardado de 'nota_semanal_visible' (por defecto visible)."""
+    return valor.lower() == 'true' if valor else True
+
+
 def is_nota_visible() -> bool:
     """Verifica si la nota semanal debe mostrarse."""
-    valor = get_config('nota_semanal_visible')
-    return valor.lower() == 'true' if valor else True
+    return parse_nota_visible(get_config('nota_semanal_visible'))
 
 
 def set_nota_visible(visible: bool, user_id: int = None) -> bool:
@@ -74,15 +140,19 @@ def set_nota_visible(visible: bool, user_id: int = None) -> bool:
     return set_config('nota_semanal_visible', 'true' if visible else 'false', user_id)
 
 
-def get_orden_defecto() -> dict:
-    """Obtiene la configuración de ordenamiento por defecto de la matriz."""
-    valor = get_config('orden_matriz_defecto')
+def parse_orden_defecto(valor: Optional[str]) -> dict:
+    """Interpreta el valor guardado de 'orden_matriz_defecto'."""
     if valor:
         try:
             return json.loads(valor)
         except json.JSONDecodeError:
-            return {'columna': 'Establecimiento', 'ascendente': True}
-    return {'columna': 'Establecimiento', 'ascendente': True}
+            return dict(ORDEN_DEFECTO)
+    return dict(ORDEN_DEFECTO)
+
+
+def get_orden_defecto() -> dict:
+    """Obtiene la configuración de ordenamiento por defecto de la matriz."""
+    return parse_orden_defecto(get_config('orden_matriz_defecto'))
 
 
 def set_orden_defecto(columna: str, ascendente: bool, user_id: int = None) -> bool:
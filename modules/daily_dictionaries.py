@@ -0,0 +1,104 @@
+# =====================================================
+# DICCIONARIOS DE DATOS DIARIOS
+# =====================================================
+"""
+conceptos / categorias: texto ↔ SMALLINT de datos_diarios y
+datos_diarios_semana (db/migrations/datos_diarios_semana.sql y
+datos_diarios_conceptos_id.sql).
+
+Los diccionarios tienen unas decenas de filas y sólo crecen (un texto
+nuevo recibe un id nuevo; los ids existentes no cambian), así que se
+cachean completos en el proceso:
+- lectura: las consultas de Detalle devuelven los ids y decode() los
+  traduce en pandas (sin JOIN por fila). Un id desconocido (creado por
+  otro proceso) recarga el diccionario una vez.
+- escritura: get_ids() crea los textos que falten y actualiza el cache.
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TABLAS = ('conceptos', 'categorias')
+
+_names: Dict[str, Dict[int, str]] = {}
+_ids: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def _check(tabla: str):
+    if tabla not in TABLAS:
+        raise ValueError(f"Diccionario desconocido: {tabla}")
+
+
+def _load(tabla: str):
+    """Relee el diccionario completo (llamar con _lock tomado)."""
+    from db_connection import execute_query
+    rows = execute_query(f"SELECT id, nombre FROM {tabla}", fetch_all=True) or []
+    _names[tabla] = {row['id']: row['nombre'] for row in rows}
+    _ids[tabla] = {row['nombre']: row['id'] for row in rows}
+
+
+def get_names(tabla: str, ids: Iterable = ()) -> Dict[int, str]:
+    """id → texto. Recarga si alguno de `ids` no está en el cache."""
+    _check(tabla)
+    with _lock:
+        if tabla not in _names or any(i not in _names[tabla] for i in ids if i is not None):
+            _load(tabla)
+        return _names[tabla]
+
+
+def get_ids(tabla: str, nombres: Iterable[str]) -> Dict[str, int]:
+    """texto → id, creando en la tabla los textos que falten."""
+    _check(tabla)
+    nombres = {n for n in nombres if n is not None}
+    with _lock:
+        if tabla not in _ids:
+            _load(tabla)
+        faltantes = sorted(nombres - _ids[tabla].keys())
+        if faltantes:
+            from db_connection import get_connection
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        INSERT INTO {tabla} (nombre) SELECT unnest(%s::text[])
+                        ON CONFLICT (nombre) DO NOTHING
+                    """, (faltantes,))
+                    cur.execute(f"SELECT id, nombre FROM {tabla} WHERE nombre = ANY(%s)", (faltantes,))
+                    for id_, nombre in cur.fetchall():
+                        _ids[tabla][nombre] = id_
+                        _names[tabla][id_] = nombre
+                    conn.commit()
+            logger.info(f"{tabla}: {len(faltantes)} texto(s) nuevo(s)")
+        return _ids[tabla]
+
+
+def decode(tabla: str, values: pd.Series) -> pd.Series:
+    """Serie de ids → serie de textos (None para ids nulos)."""
+    unicos = [int(v) for v in pd.unique(values.dropna())]
+    names = get_names(tabla, unicos)
+    return values.map(names).astype(object).where(values.notna(), None)
+
+
+def encode_batch(batch: List[tuple]) -> List[tuple]:
+    """
+    Filas (est_id, empresa_id, fecha, categoria, concepto, valor) de
+    process_semanal → (est_id, empresa_id, fecha, categoria_id, concepto_id, valor).
+    """
+    categoria_ids = get_ids('categorias', (r[3] for r in batch))
+    concepto_ids = get_ids('conceptos', (r[4] for r in batch))
+    return [
+        (est_id, empresa_id, fecha, categoria_ids.get(categoria), concepto_ids[concepto], valor)
+        for est_id, empresa_id, fecha, categoria, concepto, valor in batch
+    ]
+
+
+def invalidate(tabla: Optional[str] = None):
+    """Descarta el cache (todos los diccionarios o uno)."""
+    with _lock:
+        for t in ([tabla] if tabla else TABLAS):
+            _names.pop(t, None)
+            _ids.pop(t, None)
@@ -0,0 +1,59 @@
+# =====================================================
+# TABLAS DE DATOS DIARIOS SEGÚN DAILY_STORAGE_MODE
+# =====================================================
+"""
+Operaciones de mantenimiento (mover / eliminar) sobre los datos diarios
+en las tablas que escribe el modo de almacenamiento
+(DAILY_STORAGE_CONFIG, db/migrations/datos_diarios_semana.sql):
+
+  filas  → datos_diarios
+  semana → datos_diarios_semana
+  ambos  → las dos
+
+datos_diarios se actualiza en todos los modos (puede conservar lo cargado
+antes de pasar a 'semana'). Las usan admin_panel.py y modules/admin.
+"""
+from typing import Iterable, Tuple
+
+from db_connection import execute_update
+from config import DAILY_STORAGE_CONFIG
+
+
+def daily_tables(storage: str = None) -> Tuple[str, ...]:
+    """Tablas de datos diarios a mantener en el modo dado (None = config)."""
+    storage = storage or DAILY_STORAGE_CONFIG['mode']
+    if storage == 'filas':
+        return ('datos_diarios',)
+    return ('datos_diarios', 'datos_diarios_semana')
+
+
+def move_establecimiento_daily(establecimiento_id: int, empresa_id: int) -> int:
+    """
+    Reasigna la empresa de los datos diarios de un establecimiento (al
+    moverlo de empresa; RLS filtra por empresa_id).
+
+    Returns:
+        Filas actualizadas
+    """
+    return sum(
+        execute_update(f"UPDATE {tabla} SET empresa_id = %s WHERE establecimiento_id = %s",
+                       (empresa_id, establecimiento_id))
+        for tabla in daily_tables()
+    )
+
+
+def delete_establecimientos_daily(establecimiento_ids: Iterable[int]) -> int:
+    """
+    Elimina los datos diarios de los establecimientos dados.
+
+    Returns:
+        Filas eliminadas
+    """
+    ids = tuple(establecimiento_ids)
+    if not ids:
+        return 0
+    placeholders = ','.join(['%s'] * len(ids))
+    return sum(
+        execute_update(f"DELETE FROM {tabla} WHERE establecimiento_id IN ({placeholders})", ids)
+        for tabla in daily_tables()
+    )
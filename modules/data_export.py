@@ -0,0 +1,202 @@
+# =====================================================
+# EXPORTACIÓN EN STREAMING (CSV / Excel)
+# datos_diarios y datos_historicos completos con memoria constante
+# =====================================================
+"""
+Exportar una tabla completa con execute_query + pd.DataFrame + to_excel
+tiene en memoria, a la vez, todas las filas del driver, el DataFrame y el
+workbook de openpyxl. Aquí las filas se leen con db_connection.iter_query
+(cursor de servidor, lotes de FETCH_CONFIG['chunk_size']) y cada lote se
+escribe al archivo antes de pedir el siguiente:
+
+- CSV: DataFrame.to_csv del lote sobre el mismo archivo
+- Excel: openpyxl en modo write_only (las filas van a un XML temporal en
+  disco, no a objetos Cell); pasado el máximo de filas de una hoja sigue
+  en "<hoja> (2)", "<hoja> (3)"...
+
+El archivo se escribe a disco (ruta o archivo binario abierto): el pico de
+memoria es un lote, no la tabla. Con st.download_button Streamlit igual
+guarda el archivo final en memoria para servirlo (el .xlsx comprimido, no
+las filas).
+
+Benchmark: benchmarks/bench_streaming_export.py
+"""
+import io
+import logging
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+from openpyxl import Workbook
+
+from db_connection import iter_query
+from etl import DAILY_SEMANA_FROM, daily_filters
+
+logger = logging.getLogger(__name__)
+
+# Filas por hoja de Excel (1.048.576 menos el encabezado)
+EXCEL_MAX_ROWS = 1_048_575
+
+DAILY_EXPORT_SELECT = """
+    SELECT
+        emp.nombre AS "Empresa",
+        est.nombre AS "Establecimiento",
+        dd.fecha AS "Fecha",
+        cat.nombre AS "Categoría",
+        c.nombre AS "Concepto",
+        dd.valor AS "Valor"
+"""
+
+DAILY_EXPORT_SQL = DAILY_EXPORT_SELECT + """
+    FROM datos_diarios dd
+    JOIN establecimientos est ON dd.establecimiento_id = est.id
+    JOIN empresas emp ON dd.empresa_id = emp.id
+    JOIN conceptos c ON dd.concepto_id = c.id
+    LEFT JOIN categorias cat ON dd.categoria_id = cat.id
+    WHERE 1=1 {where_clause}
+    ORDER BY est.nombre, dd.fecha, dd.concepto_id
+"""
+
+# Mismo resultado desde datos_diarios_semana (DAILY_STORAGE_MODE=semana)
+DAILY_SEMANA_EXPORT_SQL = DAILY_EXPORT_SELECT + DAILY_SEMANA_FROM + """
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    JOIN conceptos c ON ds.concepto_id = c.id
+    LEFT JOIN categorias cat ON ds.categoria_id = cat.id
+    WHERE 1=1 {where_clause}
+    ORDER BY est.nombre, dd.fecha, ds.concepto_id
+"""
+
+HISTORIC_EXPORT_SQL = """
+    SELECT
+        establecimiento AS "Establecimiento",
+        anio AS "Año",
+        semana AS "N° Semana",
+        fecha AS "Fecha",
+        mdat AS "MDAT",
+        vacas_en_ordena AS "Vacas en ordeña",
+        produccion_total AS "Producción total",
+        precio_leche AS "Precio leche",
+        porcentaje_grasa AS "% Grasa",
+        porcentaje_proteina AS "% Proteína"
+    FROM datos_historicos
+    ORDER BY establecimiento, anio, semana
+"""
+
+Destino = Union[str, BinaryIO]
+
+
+@contextmanager
+def _open_binary(destino: Destino):
+    """Abre la ruta en 'wb' o usa el archivo ya abierto (sin cerrarlo)."""
+    if isinstance(destino, str):
+        with open(destino, "wb") as f:
+            yield f
+    else:
+        yield destino
+
+
+def daily_export_query(establecimiento: str = None, fecha_desde=None, fecha_hasta=None,
+                       storage: str = None) -> Tuple[str, tuple]:
+    """(sql, params) de la exportación de datos diarios con los filtros de Detalle diario."""
+    if storage is None:
+        from config import DAILY_STORAGE_CONFIG
+        storage = DAILY_STORAGE_CONFIG['mode']
+    semanal = storage == 'semana'
+    where_clause, params = daily_filters(establecimiento, fecha_desde, fecha_hasta, semanal=semanal)
+    sql = DAILY_SEMANA_EXPORT_SQL if semanal else DAILY_EXPORT_SQL
+    return sql.format(where_clause=where_clause), params
+
+
+def historic_export_query() -> Tuple[str, tuple]:
+    """(sql, params) de la exportación de datos_historicos."""
+    return HISTORIC_EXPORT_SQL, ()
+
+
+def export_csv(query: str, params: Optional[tuple], destino: Destino, user_id: int = None,
+               is_admin: bool = False, chunk_size: int = None) -> int:
+    """
+    Escribe el resultado del query como CSV (UTF-8 con BOM, para Excel).
+
+    Args:
+        destino: Ruta o archivo binario abierto
+
+    Returns:
+        Filas escritas
+    """
+    filas = 0
+    with _open_binary(destino) as raw:
+        f = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        try:
+            for chunk in iter_query(query, params, chunk_size, user_id, is_admin, as_frame=True):
+                chunk.to_csv(f, header=filas == 0, index=False)
+                filas += len(chunk)
+        finally:
+            f.flush()
+            f.detach()
+    return filas
+
+
+def export_excel(query: str, params: Optional[tuple], destino: Destino, sheet_name: str,
+                 user_id: int = None, is_admin: bool = False, chunk_size: int = None) -> int:
+    """
+    Escribe el resultado del query como .xlsx (openpyxl write_only).
+
+    Args:
+        destino: Ruta o archivo binario abierto
+        sheet_name: Nombre de la hoja (las siguientes agregan " (2)", " (3)"...)
+
+    Returns:
+        Filas escritas
+    """
+    wb = Workbook(write_only=True)
+    ws = None
+    filas = 0
+    for chunk in iter_query(query, params, chunk_size, user_id, is_admin, as_frame=True):
+        header = list(chunk.columns)
+        # NaN → celda vacía (openpyxl escribiría NaN como número)
+        rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+        for row in rows:
+            if filas % EXCEL_MAX_ROWS == 0:
+                hoja = filas // EXCEL_MAX_ROWS + 1
+                ws = wb.create_sheet(sheet_name if hoja == 1 else f"{sheet_name} ({hoja})")
+                ws.append(header)
+            ws.append(row)
+            filas += 1
+        if ws is None:
+            ws = wb.create_sheet(sheet_name)
+            ws.append(header)
+    with _open_binary(destino) as f:
+        wb.save(f)
+    return filas
+
+
+EXPORTS: Dict[str, Callable[..., Tuple[str, tuple]]] = {
+    'datos_diarios': daily_export_query,
+    'datos_historicos': historic_export_query,
+}
+
+
+def export_table(tabla: str, formato: str, destino: Destino, user_id: int = None,
+                 is_admin: bool = False, chunk_size: int = None, **filtros) -> int:
+    """
+    Exporta datos_diarios o datos_historicos (con RLS) a CSV o Excel.
+
+    Args:
+        tabla: 'datos_diarios' o 'datos_historicos'
+        formato: 'csv' o 'xlsx'
+        destino: Ruta o archivo binario abierto
+        filtros: establecimiento / fecha_desde / fecha_hasta (datos_diarios)
+
+    Returns:
+        Filas escritas
+    """
+    if tabla not in EXPORTS:
+        raise ValueError(f"Tabla no exportable: {tabla}")
+    query, params = EXPORTS[tabla](**filtros)
+    if formato == 'csv':
+        filas = export_csv(query, params, destino, user_id, is_admin, chunk_size)
+    elif formato == 'xlsx':
+        filas = export_excel(query, params, destino, tabla, user_id, is_admin, chunk_size)
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+    logger.info(f"Exportación {tabla}.{formato}: {filas} filas")
+    return filas
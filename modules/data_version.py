@@ -0,0 +1,54 @@
+# ============================================
+# VERSIONES DE DATOS
+# Invalidación de caches por ámbito
+# ============================================
+"""
+Lectura de la tabla data_version (ver db/migrations/create_data_version_table.sql).
+
+Cada ámbito ('permisos', ...) tiene un contador que los triggers incrementan
+cuando cambian sus tablas. Las versiones se leen todas juntas en una query
+y se reutilizan durante CONFIG_CACHE_CONFIG['poll_seconds'], así que
+comparar versiones en cada rerun no cuesta un round trip.
+"""
+import time
+import logging
+import threading
+from typing import Optional, Dict
+
+from config import CONFIG_CACHE_CONFIG
+from db_connection import execute_query
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_SQL = "SELECT scope, version FROM data_version"
+
+_versions: Dict[str, int] = {}
+_checked_at: Optional[float] = None
+_lock = threading.Lock()
+
+
+def get_data_version(scope: str) -> Optional[int]:
+    """
+    Versión actual de un ámbito de datos (None si la tabla no existe
+    o el ámbito no está registrado).
+    """
+    global _versions, _checked_at
+
+    with _lock:
+        now = time.monotonic()
+        if _checked_at is None or now - _checked_at >= CONFIG_CACHE_CONFIG['poll_seconds']:
+            try:
+                rows = execute_query(DATA_VERSION_SQL) or []
+                _versions = {row['scope']: row['version'] for row in rows}
+            except Exception as e:
+                logger.debug(f"No se pudo leer data_version: {e}")
+                _versions = {}
+            _checked_at = now
+        return _versions.get(scope)
+
+
+def invalidate_data_versions():
+    """Fuerza a releer las versiones en la próxima consulta."""
+    global _checked_at
+    with _lock:
+        _checked_at = None
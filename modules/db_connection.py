@@ -3,12 +3,22 @@
 # Maneja pool de conexiones y contexto RLS
 # ============================================
 import psycopg2
-from psycopg2 import pool, extras
-from typing import Optional, Dict, Any, List
+from psycopg2 import pool, extras, extensions
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Union
+import itertools
 import logging
+import re
+import time
+import threading
+import weakref
 from contextlib import contextmanager
 
-from config import DB_CONFIG, POOL_CONFIG
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from config import DB_CONFIG, POOL_CONFIG, FETCH_CONFIG
+from compact_frames import compact_frame
+import query_stats
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -16,13 +26,16 @@ logger = logging.getLogger(__name__)
 
 # Pool de conexiones global
 connection_pool: Optional[pool.ThreadedConnectionPool] = None
+_pool_init_lock = threading.Lock()
 
 
 def init_pool():
     """Inicializa el pool de conexiones a PostgreSQL"""
     global connection_pool
     
-    if connection_pool is None:
+    with _pool_init_lock:
+        if connection_pool is not None:
+            return
         try:
             # UTF8 funciona ahora que la password es correcta
             db_config = DB_CONFIG.copy()
@@ -94,6 +107,9 @@ def get_connection(user_id: Optional[int] = None, is_admin: bool = False):
 def set_user_context(conn, user_id: int, is_admin: bool = False):
     """
     Establece el contexto de usuario en la conexión para aplicar RLS.
+    Con db/migrations/rls_empresa_ids.sql la función SQL también resuelve
+    las empresas del usuario en app.empresa_ids (una vez por conexión
+    tomada del pool, no por fila evaluada).
     
     Args:
         conn: Conexión psycopg2
@@ -110,6 +126,60 @@ def set_user_context(conn, user_id: int, is_admin: bool = False):
         raise
 
 
+# ============================================
+# NUMERIC → float EN EL DRIVER (opt-in)
+# ============================================
+# psycopg2 devuelve cada NUMERIC / DECIMAL(10,2) como decimal.Decimal, y los
+# loaders de pandas los volvían a convertir con pd.to_numeric. Con
+# numeric_as_float=True el typecaster se registra en el cursor de esa
+# consulta (no en la conexión del pool): el resto de los llamadores
+# (procesadores de carga, panel admin) sigue recibiendo Decimal.
+def _numeric_to_float(value: Optional[str], cursor) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+NUMERIC_AS_FLOAT = extensions.new_type(extensions.DECIMAL.values, 'NUMERIC_AS_FLOAT', _numeric_to_float)
+
+
+def register_numeric_as_float(conn_or_cursor):
+    """Registra el typecaster NUMERIC → float en un cursor (o en una conexión completa)."""
+    extensions.register_type(NUMERIC_AS_FLOAT, conn_or_cursor)
+
+
+def _cursor(conn, return_dict: bool, numeric_as_float: bool):
+    cursor = conn.cursor(cursor_factory=extras.RealDictCursor if return_dict else None)
+    if numeric_as_float:
+        register_numeric_as_float(cursor)
+    return cursor
+
+
+def _report_slow_query(conn, query: str, params: Optional[tuple], elapsed_ms: float, row_count: int):
+    """
+    Registra una query que superó el umbral de lentitud.
+    El EXPLAIN (muestreado) corre en la misma conexión para conservar el
+    contexto RLS; la estadística se guarda en una conexión aparte para no
+    alterar la transacción del llamador.
+    """
+    try:
+        plan = None
+        if query_stats.should_explain(query):
+            plan = query_stats.explain_analyze(conn, query, params)
+        
+        stats_conn = None
+        try:
+            stats_conn = connection_pool.getconn()
+        except Exception as e:
+            logger.debug(f"Sin conexión libre para query_stats: {e}")
+        
+        try:
+            query_stats.record_slow_query(stats_conn, query, params, elapsed_ms, row_count, plan)
+        finally:
+            if stats_conn is not None:
+                connection_pool.putconn(stats_conn)
+    except Exception as e:
+        logger.debug(f"Error registrando query lenta: {e}")
+
+
 def execute_query(
     query: str,
     params: Optional[tuple] = None,
@@ -117,10 +187,12 @@ def execute_query(
     is_admin: bool = False,
     fetch_one: bool = False,
     fetch_all: bool = True,
-    return_dict: bool = True
+    return_dict: bool = True,
+    numeric_as_float: bool = False
 ) -> Optional[Any]:
     """
     Ejecuta un query SELECT con contexto RLS aplicado.
+    Si supera el umbral SLOW_QUERY_MS se registra en query_stats.
     
     Args:
         query: SQL query
@@ -130,14 +202,14 @@ def execute_query(
         fetch_one: Si solo se debe retornar un registro
         fetch_all: Si se deben retornar todos los registros
         return_dict: Si se debe retornar como dict (True) o tupla (False)
+        numeric_as_float: NUMERIC como float en vez de Decimal (sólo este query)
         
     Returns:
         Resultados del query (list of dict, dict, o None)
     """
     with get_connection(user_id, is_admin) as conn:
-        cursor_factory = extras.RealDictCursor if return_dict else None
-        
-        with conn.cursor(cursor_factory=cursor_factory) as cursor:
+        with _cursor(conn, return_dict, numeric_as_float) as cursor:
+            start = time.perf_counter()
             cursor.execute(query, params or ())
             
             # Si es un INSERT...RETURNING, necesitamos commit
@@ -145,11 +217,18 @@ def execute_query(
                 conn.commit()
             
             if fetch_one:
-                return cursor.fetchone()
+                result = cursor.fetchone()
             elif fetch_all:
-                return cursor.fetchall()
+                result = cursor.fetchall()
             else:
-                return None
+                result = None
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            row_count = cursor.rowcount
+        
+        if query_stats.is_slow(elapsed_ms):
+            _report_slow_query(conn, query, params, elapsed_ms, row_count)
+        
+        return result
 
 
 def execute_update(
@@ -160,6 +239,7 @@ def execute_update(
 ) -> int:
     """
     Ejecuta un query INSERT/UPDATE/DELETE.
+    Si supera el umbral SLOW_QUERY_MS se registra en query_stats.
     
     Args:
         query: SQL query
@@ -172,9 +252,378 @@ def execute_update(
     """
     with get_connection(user_id, is_admin) as conn:
         with conn.cursor() as cursor:
+            start = time.perf_counter()
             cursor.execute(query, params or ())
             conn.commit()
-            return cursor.rowcount
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            row_count = cursor.rowcount
+        
+        if query_stats.is_slow(elapsed_ms):
+            _report_slow_query(conn, query, params, elapsed_ms, row_count)
+        
+        return row_count
+
+
+# ============================================
+# SENTENCIAS PREPARADAS (queries calientes)
+# ============================================
+# Registro nombre → SQL (con placeholders %s) de las queries que se ejecutan
+# en cada interacción. Se preparan de forma lazy, una vez por conexión del pool,
+# y luego se ejecutan con EXECUTE para evitar re-parseo y re-planificación.
+HOT_STATEMENTS: Dict[str, str] = {}
+
+# Conexión → {nombre: SQL con que se preparó} en esa sesión de PostgreSQL
+# (si register_statement cambia el SQL, se hace DEALLOCATE y se re-prepara)
+_prepared_by_conn: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# Sentencias cuyo PREPARE falló (se ejecutan siempre en modo plano)
+_unpreparable: set = set()
+_prepared_lock = threading.Lock()
+
+_RE_PLACEHOLDER = re.compile(r"%s")
+
+
+def register_statement(name: str, query: str) -> str:
+    """
+    Registra una sentencia caliente para ejecutarla preparada.
+    Es idempotente: se puede llamar en cada uso. Si cambia el SQL de un
+    nombre ya registrado, cada conexión lo re-prepara en su próximo uso.
+    
+    Args:
+        name: Nombre de la sentencia (identificador SQL válido)
+        query: SQL con placeholders %s
+        
+    Returns:
+        El nombre registrado
+    """
+    if HOT_STATEMENTS.get(name) != query:
+        HOT_STATEMENTS[name] = query
+        with _prepared_lock:
+            _unpreparable.discard(name)
+    return name
+
+
+def _to_prepare_sql(query: str) -> str:
+    """Convierte placeholders %s de psycopg2 a $1..$n de PostgreSQL."""
+    counter = iter(range(1, 10000))
+    txt = _RE_PLACEHOLDER.sub(lambda _m: f"${next(counter)}", query)
+    return txt.replace("%%", "%")
+
+
+def _deallocate(conn, name: str):
+    """DEALLOCATE de la sentencia en la conexión (si ya no existe, se ignora)."""
+    with _prepared_lock:
+        _prepared_by_conn.get(conn, {}).pop(name, None)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DEALLOCATE {name}")
+    except psycopg2.Error:
+        conn.rollback()
+
+
+def _ensure_prepared(conn, name: str) -> bool:
+    """
+    Prepara la sentencia en la conexión si aún no lo está.
+    Retorna False si el PREPARE falló (se usará ejecución plana).
+    """
+    query = HOT_STATEMENTS[name]
+    # El PREPARE corre fuera del lock (la conexión es de este hilo);
+    # la consulta y el registro en los dicts compartidos, dentro
+    with _prepared_lock:
+        preparada = _prepared_by_conn.setdefault(conn, {}).get(name)
+    if preparada == query:
+        return True
+    
+    if preparada is not None:
+        # Preparada con un SQL anterior (register_statement cambió el texto)
+        _deallocate(conn, name)
+    
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"PREPARE {name} AS {_to_prepare_sql(query)}")
+        with _prepared_lock:
+            _prepared_by_conn.setdefault(conn, {})[name] = query
+        logger.debug(f"Sentencia preparada: {name}")
+        return True
+    except Exception as e:
+        conn.rollback()
+        with _prepared_lock:
+            _unpreparable.add(name)
+        logger.warning(f"No se pudo preparar '{name}', se usará ejecución normal: {e}")
+        return False
+
+
+def execute_prepared(
+    name: str,
+    params: Optional[tuple] = None,
+    user_id: Optional[int] = None,
+    is_admin: bool = False,
+    fetch_one: bool = False,
+    fetch_all: bool = True,
+    return_dict: bool = True,
+    numeric_as_float: bool = False
+) -> Optional[Any]:
+    """
+    Ejecuta una sentencia registrada con register_statement usando EXECUTE.
+    Si la sentencia no se puede preparar (o el EXECUTE falla), cae a la
+    ejecución plana con execute_query.
+    
+    Args:
+        name: Nombre de la sentencia registrada
+        (resto de argumentos igual que execute_query)
+        
+    Returns:
+        Resultados del query (list of dict, dict, o None)
+    """
+    query = HOT_STATEMENTS[name]
+    if name in _unpreparable:
+        return execute_query(query, params, user_id, is_admin, fetch_one, fetch_all, return_dict,
+                             numeric_as_float)
+    
+    params = tuple(params or ())
+    with get_connection(user_id, is_admin) as conn:
+        if _ensure_prepared(conn, name):
+            placeholders = ", ".join(["%s"] * len(params))
+            execute_sql = f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}"
+            try:
+                with _cursor(conn, return_dict, numeric_as_float) as cursor:
+                    start = time.perf_counter()
+                    cursor.execute(execute_sql, params)
+                    if fetch_one:
+                        result = cursor.fetchone()
+                    elif fetch_all:
+                        result = cursor.fetchall()
+                    else:
+                        result = None
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    row_count = cursor.rowcount
+                
+                if query_stats.is_slow(elapsed_ms):
+                    _report_slow_query(conn, query, params, elapsed_ms, row_count)
+                return result
+            except psycopg2.Error as e:
+                # p.ej. la sesión se reinició y el statement ya no existe
+                conn.rollback()
+                with _prepared_lock:
+                    _prepared_by_conn.get(conn, {}).pop(name, None)
+                logger.warning(f"EXECUTE {name} falló, se reintenta sin preparar: {e}")
+    
+    return execute_query(query, params, user_id, is_admin, fetch_one, fetch_all, return_dict,
+                         numeric_as_float)
+
+
+# ============================================
+# LECTURA COLUMNAR (DataFrame por lotes)
+# ============================================
+# execute_query arma un dict por fila (RealDictCursor + fetchall) y el
+# llamador luego hace pd.DataFrame(lista de dicts): en el pico conviven
+# las filas del cursor, los dicts y el DataFrame. execute_frame lee tuplas
+# con fetchmany desde un cursor de servidor (DECLARE ... FETCH), convierte
+# cada lote a columnas tipadas (compact_frames) y lo suelta: el pico es el
+# DataFrame final más un lote.
+_cursor_ids = itertools.count(1)
+
+
+def _frame_chunk(batch: list, columns: List[str], categories: Iterable[str] = (),
+                 floats: Iterable[str] = (), dates: Iterable[str] = ()) -> pd.DataFrame:
+    """Un lote de tuplas del cursor → DataFrame con los tipos pedidos."""
+    chunk = compact_frame(pd.DataFrame.from_records(batch, columns=columns),
+                          categories=categories, floats=floats)
+    for col in dates:
+        if col in chunk.columns:
+            chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+    return chunk
+
+
+def _frame_from_cursor(cursor, chunk_size: int, categories: Iterable[str] = (),
+                       floats: Iterable[str] = (), dates: Iterable[str] = ()) -> pd.DataFrame:
+    """Lee el cursor por lotes y arma el DataFrame columna por columna."""
+    categories, floats, dates = list(categories), list(floats), list(dates)
+    columns = None
+    parts: Dict[str, list] = {}
+    while True:
+        batch = cursor.fetchmany(chunk_size)
+        if columns is None:
+            columns = [d[0] for d in cursor.description or ()]
+            parts = {c: [] for c in columns}
+        if not batch:
+            break
+        chunk = _frame_chunk(batch, columns, categories, floats, dates)
+        for col in columns:
+            parts[col].append(chunk[col])
+        del batch, chunk
+
+    if not columns or not parts[columns[0]]:
+        return pd.DataFrame(columns=columns)
+    data = {}
+    for col in columns:
+        if col in categories:
+            # Los lotes traen categorías distintas: pd.concat volvería a object
+            data[col] = pd.Series(union_categoricals(parts.pop(col), sort_categories=True))
+        else:
+            data[col] = pd.concat(parts.pop(col), ignore_index=True)
+    return pd.DataFrame(data, columns=columns)
+
+
+def execute_frame(
+    query: str,
+    params: Optional[tuple] = None,
+    user_id: Optional[int] = None,
+    is_admin: bool = False,
+    statement: Optional[str] = None,
+    categories: Iterable[str] = (),
+    floats: Iterable[str] = (),
+    dates: Iterable[str] = (),
+    chunk_size: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Ejecuta un SELECT con contexto RLS y devuelve un DataFrame construido
+    por lotes de tuplas (NUMERIC como float, sin dicts por fila).
+    Si supera el umbral SLOW_QUERY_MS se registra en query_stats.
+    
+    Args:
+        query: SQL query
+        params: Parámetros para el query
+        user_id: ID del usuario (para RLS)
+        is_admin: Si es administrador
+        statement: Nombre registrado con register_statement: se ejecuta
+                   preparado (EXECUTE no admite cursor de servidor, así que
+                   el resultado llega completo al cliente y se convierte por
+                   lotes). Sin nombre se usa un cursor de servidor.
+        categories / floats: Columnas a category / float64 (compact_frames)
+        dates: Columnas date → datetime64
+        chunk_size: Filas por fetchmany (None = FETCH_CONFIG['chunk_size'])
+        
+    Returns:
+        DataFrame (vacío con las columnas del query si no hay filas)
+    """
+    chunk_size = chunk_size or FETCH_CONFIG['chunk_size']
+    tipos = dict(categories=categories, floats=floats, dates=dates)
+    params = tuple(params or ())
+    
+    if statement is not None and statement not in _unpreparable:
+        with get_connection(user_id, is_admin) as conn:
+            if _ensure_prepared(conn, statement):
+                placeholders = ", ".join(["%s"] * len(params))
+                execute_sql = f"EXECUTE {statement} ({placeholders})" if params else f"EXECUTE {statement}"
+                try:
+                    with _cursor(conn, False, True) as cursor:
+                        start = time.perf_counter()
+                        cursor.execute(execute_sql, params)
+                        df = _frame_from_cursor(cursor, chunk_size, **tipos)
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                    
+                    if query_stats.is_slow(elapsed_ms):
+                        _report_slow_query(conn, query, params, elapsed_ms, len(df))
+                    return df
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    with _prepared_lock:
+                        _prepared_by_conn.get(conn, {}).pop(statement, None)
+                    logger.warning(f"EXECUTE {statement} falló, se reintenta sin preparar: {e}")
+    
+    with get_connection(user_id, is_admin) as conn:
+        # Cursor con nombre = cursor de servidor: las filas quedan en
+        # PostgreSQL y se traen de a chunk_size
+        with conn.cursor(name=f"frame_{next(_cursor_ids)}") as cursor:
+            register_numeric_as_float(cursor)
+            cursor.itersize = chunk_size
+            start = time.perf_counter()
+            cursor.execute(query, params)
+            df = _frame_from_cursor(cursor, chunk_size, **tipos)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        conn.rollback()  # cierra la transacción del cursor (el contexto RLS es de sesión)
+        
+        if query_stats.is_slow(elapsed_ms):
+            _report_slow_query(conn, query, params, elapsed_ms, len(df))
+        return df
+
+
+# ============================================
+# LECTURA EN STREAMING (generador por lotes)
+# ============================================
+# Para resultados que no conviene tener completos en memoria (exportaciones
+# de datos_diarios / datos_historicos, historia completa): el cursor de
+# servidor queda abierto mientras el llamador consume los lotes y cada lote
+# se suelta antes de pedir el siguiente. Ver data_export.py
+
+def iter_query(
+    query: str,
+    params: Optional[tuple] = None,
+    chunk_size: Optional[int] = None,
+    user_id: Optional[int] = None,
+    is_admin: bool = False,
+    as_frame: bool = False,
+    return_dict: bool = False,
+    numeric_as_float: bool = True,
+    categories: Iterable[str] = (),
+    floats: Iterable[str] = (),
+    dates: Iterable[str] = ()
+) -> Iterator[Union[List, pd.DataFrame]]:
+    """
+    Ejecuta un SELECT con contexto RLS y entrega el resultado por lotes
+    desde un cursor de servidor (DECLARE ... FETCH) dentro de una
+    transacción. La conexión del pool queda tomada hasta agotar el
+    generador o cerrarlo (break / close() / salir del for por una
+    excepción devuelven la conexión).
+    
+    Args:
+        query: SQL query
+        params: Parámetros para el query
+        chunk_size: Filas por lote (None = FETCH_CONFIG['chunk_size'])
+        user_id: ID del usuario (para RLS)
+        is_admin: Si es administrador
+        as_frame: True = lotes como DataFrame (tipos de categories /
+                  floats / dates, como execute_frame); sin filas entrega
+                  un único DataFrame vacío con las columnas del query
+        return_dict: Lotes de dicts en vez de tuplas (sólo sin as_frame)
+        numeric_as_float: NUMERIC como float en vez de Decimal
+        
+    Yields:
+        Lista de filas (tuplas o dicts) o DataFrame, de hasta chunk_size filas
+        
+    Example:
+        for chunk in iter_query(sql, params, user_id=1, as_frame=True):
+            chunk.to_csv(f, header=f.tell() == 0, index=False)
+    """
+    chunk_size = chunk_size or FETCH_CONFIG['chunk_size']
+    tipos = dict(categories=list(categories), floats=list(floats), dates=list(dates))
+    params = tuple(params or ())
+    cursor_factory = extras.RealDictCursor if return_dict and not as_frame else None
+    
+    with get_connection(user_id, is_admin) as conn:
+        # Sólo cuenta el tiempo en la base (fetchmany), no el del consumidor
+        elapsed_ms = 0.0
+        row_count = 0
+        try:
+            with conn.cursor(name=f"iter_{next(_cursor_ids)}", cursor_factory=cursor_factory) as cursor:
+                if numeric_as_float:
+                    register_numeric_as_float(cursor)
+                cursor.itersize = chunk_size
+                start = time.perf_counter()
+                cursor.execute(query, params or None)
+                while True:
+                    batch = cursor.fetchmany(chunk_size)
+                    elapsed_ms += (time.perf_counter() - start) * 1000
+                    if not as_frame:
+                        if not batch:
+                            break
+                        row_count += len(batch)
+                        yield batch
+                    else:
+                        columns = [d[0] for d in cursor.description or ()]
+                        if not batch:
+                            if not row_count:
+                                yield pd.DataFrame(columns=columns)
+                            break
+                        row_count += len(batch)
+                        yield _frame_chunk(batch, columns, **tipos)
+                    del batch
+                    start = time.perf_counter()
+        finally:
+            conn.rollback()  # cierra la transacción del cursor (el contexto RLS es de sesión)
+        
+        if query_stats.is_slow(elapsed_ms):
+            _report_slow_query(conn, query, params, elapsed_ms, row_count)
 
 
 def test_connection() -> bool:
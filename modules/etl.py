@@ -8,8 +8,13 @@ from __future__ import annotations
 import re
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
+import daily_dictionaries
+from compact_frames import compact_frame, frame_from_rows
+from concept_catalog import strip_prefix
+
 
 # ---------------------------------------------------------
 # Normalizadores auxiliares (semanal)
@@ -67,6 +72,58 @@ def _normalize_number(x: Any) -> float | None:
         return None
 
 
+# Números simples que float() acepta directamente (tras limpiar el texto)
+_SIMPLE_FLOAT_RE = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+
+def _normalize_number_series(values: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de _normalize_number para una columna completa.
+
+    Aplica las mismas reglas con métodos .str y máscaras (quitar $, % y
+    espacios; "1.234,56" / "869,43" / "869.43") y devuelve float64 con
+    NaN donde _normalize_number devuelve None. La conversión final usa
+    float() sobre todo el arreglo de una vez; si alguna celda no es un
+    número simple (p. ej. "inf", "1_000" o basura), sólo esas pasan por
+    _normalize_number.
+    """
+    out = np.full(len(values), np.nan)
+    pos = np.flatnonzero(values.notna().to_numpy())
+    if len(pos) == 0:
+        return pd.Series(out, index=values.index)
+
+    txt = values.iloc[pos].astype(str).str.strip()
+    keep = (txt != "").to_numpy()
+    pos, txt = pos[keep], txt[keep]
+    txt = txt.str.replace(r"[$% ]", "", regex=True)
+
+    # Con coma: la coma es el decimal y los puntos (si hay) son miles
+    has_comma = txt.str.contains(",", regex=False)
+    if has_comma.any():
+        txt = txt.where(
+            ~has_comma,
+            txt.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+        )
+
+    cleaned = txt.to_numpy(dtype=object)
+    try:
+        # Caso normal: todas las celdas son números válidos
+        out[pos] = cleaned.astype(float)
+        return pd.Series(out, index=values.index)
+    except ValueError:
+        pass
+
+    simple = txt.str.fullmatch(_SIMPLE_FLOAT_RE).to_numpy(dtype=bool)
+    out[pos[simple]] = cleaned[simple].astype(float)
+
+    # Casos raros: mismo camino que la versión escalar
+    if not simple.all():
+        out[pos[~simple]] = [
+            np.nan if v is None else v for v in map(_normalize_number, cleaned[~simple])
+        ]
+    return pd.Series(out, index=values.index)
+
+
 def _clean_concept(raw: Any) -> str | None:
     """
     Limpia el texto del CONCEPTO:
@@ -76,13 +133,9 @@ def _clean_concept(raw: Any) -> str | None:
     if raw is None or pd.isna(raw):
         return None
 
-    txt = str(raw).strip()
-    # Quitar prefijo entre paréntesis + espacio: "(A) ", "(1) ", "(BB) "
-    txt = re.sub(r"^\([A-Za-z0-9]+\)\s*", "", txt)
-    # Quitar dobles espacios perdidos
-    while "  " in txt:
-        txt = txt.replace("  ", " ")
-    txt = txt.strip()
+    # Prefijo "(A) ", "(1) ", "(BB) " y espacios repetidos: misma regla
+    # que usa el catálogo de conceptos al normalizar
+    txt = strip_prefix(str(raw))
 
     return txt or None
 
@@ -210,14 +263,14 @@ def load_week_excel(path_or_buffer: Any) -> pd.DataFrame:
     df["concepto"] = df["concepto"].apply(_clean_concept)
 
     # Normalizar A. TOTAL a float (respetando decimales reales)
-    df["a_total"] = df["a_total"].apply(_normalize_number)
+    df["a_total"] = _normalize_number_series(df["a_total"])
 
     # Normalizar columnas de fecha a float también (son métricas diarias)
     for dc in date_cols:
-        df[dc] = df[dc].apply(_normalize_number)
+        df[dc] = _normalize_number_series(df[dc])
 
     if "n_semana" in df.columns:
-        df["n_semana"] = df["n_semana"].apply(_normalize_number).astype("Int64")
+        df["n_semana"] = _normalize_number_series(df["n_semana"]).astype("Int64")
 
     # Quitar basura de espacios en texto
     df["establecimiento"] = df["establecimiento"].astype(str).str.strip()
@@ -301,6 +354,361 @@ def load_historic_excel(path_or_buffer: Any) -> pd.DataFrame:
     return df
 
 
+# ---------------------------------------------------------
+# SQL de las cargas desde PostgreSQL
+# (compartido por los loaders síncronos y async_db)
+# ---------------------------------------------------------
+# Semana más reciente: (anio, semana) de la misma fila (MAX por columna
+# mezclaba años) y con LIMIT 1 se lee del índice (anio DESC, semana DESC)
+WEEK_MAX_SQL = """
+    SELECT semana, anio
+    FROM datos_semanales
+    ORDER BY anio DESC, semana DESC
+    LIMIT 1
+"""
+
+# Unpivot de datos_semanales (columnas → filas CONCEPTO / A. TOTAL).
+# Recibe (semana, anio) repetidos WEEK_UNPIVOT_PARAM_REPEAT veces.
+WEEK_UNPIVOT_SQL = """
+    SELECT 
+        emp.nombre as "Empresa",
+        emp.codigo as "Empresa_COD",
+        est.nombre as "Establecimiento",
+        est.id as "establecimiento_id",
+        ds.semana as "N° Semana",
+        -- Transformar datos de columnas a filas (unpivot)
+        'Superficie Praderas' as "CONCEPTO", ds.superficie_pradera as "A. TOTAL"
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.superficie_pradera IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT 
+        emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Vacas masa', ds.vacas_masa
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.vacas_masa IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Vacas en ordeña', ds.vacas_en_ordena
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.vacas_en_ordena IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Carga animal', ds.carga_animal
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.carga_animal IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Porcentaje de grasa', ds.porcentaje_grasa
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.porcentaje_grasa IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Proteinas', ds.proteinas
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.proteinas IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Costo promedio concentrado', ds.costo_promedio_concentrado
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.costo_promedio_concentrado IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Grms concentrado / ltr leche', ds.grms_concentrado_por_litro
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.grms_concentrado_por_litro IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Kg MS Concentrado / vaca', ds.kg_ms_concentrado_vaca
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.kg_ms_concentrado_vaca IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Kg MS Conservado / vaca', ds.kg_ms_conservado_vaca
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.kg_ms_conservado_vaca IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Praderas y otros verdes', ds.praderas_otros_verdes
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Total MS', ds.total_ms
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.total_ms IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Producción promedio', ds.produccion_promedio
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.produccion_promedio IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Costo ración vaca', ds.costo_racion_vaca
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.costo_racion_vaca IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Precio de la leche', ds.precio_leche
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.precio_leche IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'MDAT (L/vaca/día)', ds.mdat_litros_vaca_dia
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.mdat_litros_vaca_dia IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'Porcentaje costo alimentos', ds.porcentaje_costo_alimentos
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.porcentaje_costo_alimentos IS NOT NULL
+    
+    UNION ALL
+    
+    SELECT emp.nombre, emp.codigo, est.nombre, est.id, ds.semana,
+        'MDAT', ds.mdat
+    FROM datos_semanales ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    JOIN empresas emp ON ds.empresa_id = emp.id
+    WHERE ds.semana = %s AND ds.anio = %s AND ds.mdat IS NOT NULL
+    
+    ORDER BY "Establecimiento", "CONCEPTO"
+"""
+WEEK_UNPIVOT_PARAM_REPEAT = 18
+
+# CORREGIDO: Usar datos_historicos en lugar de historico_mdat
+# establecimiento_id / Año: matrix_builder cruza con la semana por entero
+# y ordena las semanas de varios años (migración historico_establecimiento_id.sql)
+HISTORIC_SQL = """
+    SELECT 
+        fecha as "Fecha",
+        anio as "Año",
+        semana as "N° Semana",
+        establecimiento_id,
+        establecimiento as "Establecimiento",
+        mdat as "MDAT",
+        vacas_en_ordena as "Vacas en ordeña"
+    FROM datos_historicos
+    ORDER BY anio DESC, semana DESC
+"""
+
+WEEK_COLUMNS = ['Empresa', 'Empresa_COD', 'Establecimiento', 'CONCEPTO', 'A. TOTAL', 'N° Semana',
+                'establecimiento_id']
+
+# Tipos compactos (compact_frames): textos repetidos por fila → category,
+# NUMERIC → float64 (los loaders ya piden float al driver con numeric_as_float;
+# si llegan Decimal se convierten aquí)
+WEEK_CATEGORY_COLUMNS = ['Empresa', 'Empresa_COD', 'Establecimiento', 'CONCEPTO']
+WEEK_FLOAT_COLUMNS = ['A. TOTAL']
+HISTORIC_CATEGORY_COLUMNS = ['Establecimiento']
+HISTORIC_FLOAT_COLUMNS = ['MDAT', 'Vacas en ordeña']
+DAILY_CATEGORY_COLUMNS = ['Establecimiento', 'CATEGORIA', 'CONCEPTO']
+
+
+# Detalle diario (load_daily_from_db). {where_clause} lo arma daily_filters;
+# índices en db/migrations/index_hot_paths.sql. Concepto y categoría salen
+# como ids y se traducen con daily_dictionaries (cache en el proceso).
+DAILY_FECHAS_SQL = """
+    SELECT DISTINCT fecha
+    FROM datos_diarios dd
+    JOIN establecimientos est ON dd.establecimiento_id = est.id
+    WHERE 1=1 {where_clause}
+    ORDER BY fecha
+"""
+
+DAILY_DETAIL_SQL = """
+    SELECT 
+        est.nombre as "Establecimiento",
+        dd.categoria_id,
+        dd.concepto_id,
+        dd.fecha,
+        dd.valor
+    FROM datos_diarios dd
+    JOIN establecimientos est ON dd.establecimiento_id = est.id
+    WHERE 1=1 {where_clause}
+    ORDER BY est.nombre, dd.categoria_id, dd.concepto_id, dd.fecha
+"""
+
+# Mismo resultado desde datos_diarios_semana (un FLOAT8[7] por semana):
+# el LATERAL despliega cada arreglo en (fecha, valor) con el alias dd,
+# así el {where_clause} de daily_filters sirve para los dos modos.
+# Ver db/migrations/datos_diarios_semana.sql
+DAILY_SEMANA_FROM = """
+    FROM datos_diarios_semana ds
+    JOIN establecimientos est ON ds.establecimiento_id = est.id
+    CROSS JOIN LATERAL (
+        SELECT ds.semana_inicio + (u.dia - 1)::int AS fecha, u.valor
+        FROM unnest(ds.valores) WITH ORDINALITY AS u(valor, dia)
+        WHERE u.valor IS NOT NULL
+    ) dd
+"""
+
+DAILY_SEMANA_FECHAS_SQL = """
+    SELECT DISTINCT dd.fecha
+""" + DAILY_SEMANA_FROM + """
+    WHERE 1=1 {where_clause}
+    ORDER BY dd.fecha
+"""
+
+DAILY_SEMANA_DETAIL_SQL = """
+    SELECT 
+        est.nombre as "Establecimiento",
+        ds.categoria_id,
+        ds.concepto_id,
+        dd.fecha,
+        dd.valor
+""" + DAILY_SEMANA_FROM + """
+    WHERE 1=1 {where_clause}
+    ORDER BY est.nombre, ds.categoria_id, ds.concepto_id, dd.fecha
+"""
+
+
+# Última fecha con datos (ancla de la ventana del Detalle diario) y
+# establecimientos con datos diarios, sin leer el detalle completo
+DAILY_ULTIMA_FECHA_SQL = """
+    SELECT MAX(dd.fecha) AS fecha
+    FROM datos_diarios dd
+    JOIN establecimientos est ON dd.establecimiento_id = est.id
+    WHERE 1=1 {where_clause}
+"""
+
+DAILY_SEMANA_ULTIMA_FECHA_SQL = """
+    SELECT MAX(dd.fecha) AS fecha
+""" + DAILY_SEMANA_FROM + """
+    WHERE 1=1 {where_clause}
+"""
+
+DAILY_ESTABLECIMIENTOS_SQL = """
+    SELECT est.nombre AS "Establecimiento"
+    FROM establecimientos est
+    WHERE EXISTS (SELECT 1 FROM {tabla} d WHERE d.establecimiento_id = est.id)
+    ORDER BY est.nombre
+"""
+
+
+def _daily_semanal(storage: str = None) -> bool:
+    """True si el Detalle diario se lee de datos_diarios_semana (DAILY_STORAGE_CONFIG)."""
+    if storage is None:
+        from config import DAILY_STORAGE_CONFIG
+        storage = DAILY_STORAGE_CONFIG['mode']
+    return storage == 'semana'
+
+
+def daily_filters(establecimiento: str = None, fecha_desde=None, fecha_hasta=None,
+                  semanal: bool = False) -> tuple:
+    """
+    (where_clause, params) de las consultas de Detalle diario.
+    Con semanal=True agrega el rango sobre ds.semana_inicio (usa la PK /
+    el BRIN antes de desplegar los arreglos).
+    """
+    where_clause = ""
+    params = []
+    if establecimiento:
+        where_clause = "AND est.nombre = %s"
+        params.append(establecimiento)
+    if fecha_desde is not None:
+        if semanal:
+            where_clause += " AND ds.semana_inicio > %s::date - 7"
+            params.append(fecha_desde)
+        where_clause += " AND dd.fecha >= %s"
+        params.append(fecha_desde)
+    if fecha_hasta is not None:
+        if semanal:
+            where_clause += " AND ds.semana_inicio <= %s"
+            params.append(fecha_hasta)
+        where_clause += " AND dd.fecha <= %s"
+        params.append(fecha_hasta)
+    return where_clause, tuple(params)
+
+
+def week_params(semana: int, anio: int) -> tuple:
+    """Parámetros de WEEK_UNPIVOT_SQL: (semana, anio) por cada UNION."""
+    return tuple([semana, anio] * WEEK_UNPIVOT_PARAM_REPEAT)
+
+
+def week_frame(results: list) -> pd.DataFrame:
+    """Construye el DataFrame largo semanal (tipos compactos) a partir de las filas del query."""
+    return frame_from_rows(results, WEEK_COLUMNS,
+                           categories=WEEK_CATEGORY_COLUMNS, floats=WEEK_FLOAT_COLUMNS)
+
+
+def historic_frame(results: list) -> pd.DataFrame:
+    """Construye el DataFrame histórico (tipos compactos) a partir de las filas del query."""
+    # MDAT / Vacas ya llegan como float (numeric_as_float); la conversión
+    # queda para filas con Decimal de otros llamadores
+    df = frame_from_rows(results, categories=HISTORIC_CATEGORY_COLUMNS,
+                         floats=HISTORIC_FLOAT_COLUMNS)
+    # Fecha como datetime64 (igual que load_historic_excel), no datetime.date por fila
+    if "Fecha" in df.columns:
+        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    return df
+
+
 # ---------------------------------------------------------
 # Funciones PostgreSQL (con RLS automático)
 # ---------------------------------------------------------
@@ -322,205 +730,34 @@ def load_week_from_db(user_id: int, is_admin: bool = False, semana: int = None,
         Empresa | Empresa_COD | Establecimiento | CONCEPTO | A. TOTAL | N° Semana
     """
     try:
-        from db_connection import execute_query
+        from db_connection import execute_frame, execute_prepared, register_statement
     except ImportError:
         raise ImportError("Módulo db_connection no disponible. Asegúrate de tener psycopg2 instalado.")
     
     # Si no se especifica semana/anio, usar la más reciente
     if semana is None or anio is None:
-        query_max = """
-            SELECT MAX(semana) as semana, MAX(anio) as anio
-            FROM datos_semanales
-        """
-        result = execute_query(query_max, user_id=user_id, is_admin=is_admin, fetch_one=True)
+        register_statement("etl_week_max", WEEK_MAX_SQL)
+        result = execute_prepared("etl_week_max", user_id=user_id, is_admin=is_admin, fetch_one=True)
         if result:
             semana = result['semana'] if semana is None else semana
             anio = result['anio'] if anio is None else anio
     
     # Query principal - datos_semanales NO tiene RLS, muestra todas las empresas
-    query = """
-        SELECT 
-            emp.nombre as "Empresa",
-            emp.codigo as "Empresa_COD",
-            est.nombre as "Establecimiento",
-            ds.semana as "N° Semana",
-            -- Transformar datos de columnas a filas (unpivot)
-            'Superficie Praderas' as "CONCEPTO", ds.superficie_pradera as "A. TOTAL"
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.superficie_pradera IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT 
-            emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Vacas masa', ds.vacas_masa
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.vacas_masa IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Vacas en ordeña', ds.vacas_en_ordena
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.vacas_en_ordena IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Carga animal', ds.carga_animal
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.carga_animal IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Porcentaje de grasa', ds.porcentaje_grasa
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.porcentaje_grasa IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Proteinas', ds.proteinas
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.proteinas IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Costo promedio concentrado', ds.costo_promedio_concentrado
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.costo_promedio_concentrado IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Grms concentrado / ltr leche', ds.grms_concentrado_por_litro
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.grms_concentrado_por_litro IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Kg MS Concentrado / vaca', ds.kg_ms_concentrado_vaca
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.kg_ms_concentrado_vaca IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Kg MS Conservado / vaca', ds.kg_ms_conservado_vaca
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.kg_ms_conservado_vaca IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Praderas y otros verdes', ds.praderas_otros_verdes
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Total MS', ds.total_ms
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.total_ms IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Producción promedio', ds.produccion_promedio
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.produccion_promedio IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Costo ración vaca', ds.costo_racion_vaca
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.costo_racion_vaca IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Precio de la leche', ds.precio_leche
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.precio_leche IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'MDAT (L/vaca/día)', ds.mdat_litros_vaca_dia
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.mdat_litros_vaca_dia IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'Porcentaje costo alimentos', ds.porcentaje_costo_alimentos
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.porcentaje_costo_alimentos IS NOT NULL
-        
-        UNION ALL
-        
-        SELECT emp.nombre, emp.codigo, est.nombre, ds.semana,
-            'MDAT', ds.mdat
-        FROM datos_semanales ds
-        JOIN establecimientos est ON ds.establecimiento_id = est.id
-        JOIN empresas emp ON ds.empresa_id = emp.id
-        WHERE ds.semana = %s AND ds.anio = %s AND ds.mdat IS NOT NULL
-        
-        ORDER BY "Establecimiento", "CONCEPTO"
-    """
-    
     # Repetir parámetros para cada UNION (18 conceptos: Superficie, Vacas masa, Vacas en ordeña, Carga, Grasa, Proteínas, Costo conc, Grms, KG MS conc, KG MS cons, Praderas, Total MS, Producción, Costo ración, Precio, MDAT L/vaca, Porc costo, MDAT)
-    params = tuple([semana, anio] * 18)
-    
-    results = execute_query(query, params=params, user_id=user_id, is_admin=is_admin, fetch_all=True)
+    params = week_params(semana, anio)
     
-    if not results:
-        return pd.DataFrame(columns=['Empresa', 'Empresa_COD', 'Establecimiento', 'CONCEPTO', 'A. TOTAL', 'N° Semana'])
+    # Sentencia caliente: se prepara una vez por conexión (ver db_connection.HOT_STATEMENTS)
+    # Lectura columnar (tuplas por lotes → columnas tipadas, sin dicts por fila)
+    register_statement("etl_week_unpivot", WEEK_UNPIVOT_SQL)
+    df = execute_frame(WEEK_UNPIVOT_SQL, params, user_id=user_id, is_admin=is_admin,
+                       statement="etl_week_unpivot",
+                       categories=WEEK_CATEGORY_COLUMNS, floats=WEEK_FLOAT_COLUMNS)
     
-    df = pd.DataFrame(results)
-    return df
+    return df if not df.empty else pd.DataFrame(columns=WEEK_COLUMNS)
 
 
-def load_daily_from_db(user_id: int, is_admin: bool = False, establecimiento: str = None) -> pd.DataFrame:
+def load_daily_from_db(user_id: int, is_admin: bool = False, establecimiento: str = None,
+                       fecha_desde=None, fecha_hasta=None, storage: str = None) -> pd.DataFrame:
     """
     Carga datos diarios desde PostgreSQL para el detalle diario.
     
@@ -531,70 +768,63 @@ def load_daily_from_db(user_id: int, is_admin: bool = False, establecimiento: st
         user_id: ID del usuario (para RLS)
         is_admin: Si es administrador
         establecimiento: Nombre del establecimiento (None = todos los permitidos)
+        fecha_desde: Fecha inicial incluida (None = sin límite)
+        fecha_hasta: Fecha final incluida (None = sin límite). Con
+                     datos_diarios particionada, el rango limita la
+                     lectura a las particiones del período.
+        storage: 'filas' (datos_diarios) o 'semana' (datos_diarios_semana).
+                 None = DAILY_STORAGE_CONFIG['mode'] ('ambos' lee filas).
+                 El resultado es el mismo en los dos modos.
         
     Returns:
         DataFrame con estructura similar a load_week_excel para detalle diario:
         Establecimiento | CATEGORIA | CONCEPTO | [fechas] | A. TOTAL
     """
     try:
-        from db_connection import execute_query
+        from db_connection import execute_query, execute_frame
     except ImportError:
         raise ImportError("Módulo db_connection no disponible")
     
-    # Query base con RLS aplicado automáticamente
-    where_clause = ""
-    params = []
+    semanal = _daily_semanal(storage)
+    fechas_sql = DAILY_SEMANA_FECHAS_SQL if semanal else DAILY_FECHAS_SQL
+    detail_sql = DAILY_SEMANA_DETAIL_SQL if semanal else DAILY_DETAIL_SQL
     
-    if establecimiento:
-        where_clause = "AND est.nombre = %s"
-        params.append(establecimiento)
+    # Query base con RLS aplicado automáticamente
+    where_clause, params = daily_filters(establecimiento, fecha_desde, fecha_hasta, semanal=semanal)
     
     # Primero obtener las fechas disponibles
-    query_fechas = f"""
-        SELECT DISTINCT fecha
-        FROM datos_diarios dd
-        JOIN establecimientos est ON dd.establecimiento_id = est.id
-        WHERE 1=1 {where_clause}
-        ORDER BY fecha
-    """
-    
-    fechas_result = execute_query(query_fechas, params=tuple(params) if params else None, 
-                                    user_id=user_id, is_admin=is_admin, fetch_all=True)
+    fechas_result = execute_query(fechas_sql.format(where_clause=where_clause),
+                                  params=params or None,
+                                  user_id=user_id, is_admin=is_admin, fetch_all=True)
     
     if not fechas_result:
         return pd.DataFrame()
     
     fechas = [r['fecha'] for r in fechas_result]
     
-    # Query para obtener los datos en formato largo
-    query = f"""
-        SELECT 
-            est.nombre as "Establecimiento",
-            dd.categoria as "CATEGORIA",
-            dd.concepto as "CONCEPTO",
-            dd.fecha,
-            dd.valor
-        FROM datos_diarios dd
-        JOIN establecimientos est ON dd.establecimiento_id = est.id
-        WHERE 1=1 {where_clause}
-        ORDER BY est.nombre, dd.categoria, dd.concepto, dd.fecha
-    """
-    
-    results = execute_query(query, params=tuple(params) if params else None,
-                            user_id=user_id, is_admin=is_admin, fetch_all=True)
+    # Datos en formato largo, lectura columnar desde un cursor de servidor
+    df_long = execute_frame(detail_sql.format(where_clause=where_clause), params,
+                            user_id=user_id, is_admin=is_admin,
+                            categories=['Establecimiento'], floats=['valor'], dates=['fecha'])
     
-    if not results:
+    if df_long.empty:
         return pd.DataFrame()
     
-    df_long = pd.DataFrame(results)
-    
-    # Pivotar para tener fechas como columnas
+    # Pivotar para tener fechas como columnas (sobre los ids: agrupa enteros,
+    # no textos)
     df_pivot = df_long.pivot_table(
-        index=['Establecimiento', 'CATEGORIA', 'CONCEPTO'],
+        index=['Establecimiento', 'categoria_id', 'concepto_id'],
         columns='fecha',
         values='valor',
-        aggfunc='first'
+        aggfunc='first',
+        observed=True
     ).reset_index()
+    del df_long
+    
+    # ids → texto (diccionarios cacheados), en el mismo orden de antes
+    df_pivot.insert(1, 'CATEGORIA', daily_dictionaries.decode('categorias', df_pivot.pop('categoria_id')))
+    df_pivot.insert(2, 'CONCEPTO', daily_dictionaries.decode('conceptos', df_pivot.pop('concepto_id')))
+    df_pivot = df_pivot.sort_values(['Establecimiento', 'CATEGORIA', 'CONCEPTO']).reset_index(drop=True)
     
     # Renombrar columnas de fecha al formato dd-mm-yyyy
     date_cols = {}
@@ -608,7 +838,50 @@ def load_daily_from_db(user_id: int, is_admin: bool = False, establecimiento: st
     fecha_columns = [c for c in df_pivot.columns if re.match(r'^\d{1,2}-\d{1,2}-\d{4}$', str(c))]
     df_pivot['A. TOTAL'] = df_pivot[fecha_columns].sum(axis=1, skipna=True)
     
-    return df_pivot
+    return compact_frame(df_pivot, categories=DAILY_CATEGORY_COLUMNS)
+
+
+def daily_establishments(user_id: int, is_admin: bool = False, storage: str = None) -> list:
+    """
+    Establecimientos con datos diarios visibles para el usuario (RLS),
+    sin cargar el detalle. Un EXISTS por establecimiento (índice por
+    establecimiento_id en cada partición).
+    """
+    from db_connection import execute_query
+    
+    tabla = "datos_diarios_semana" if _daily_semanal(storage) else "datos_diarios"
+    rows = execute_query(DAILY_ESTABLECIMIENTOS_SQL.format(tabla=tabla),
+                         user_id=user_id, is_admin=is_admin, fetch_all=True) or []
+    return [r['Establecimiento'] for r in rows]
+
+
+def daily_window(user_id: int, is_admin: bool = False, establecimiento: str = None,
+                 dias: int = None, storage: str = None):
+    """
+    Ventana (fecha_desde, fecha_hasta) de los últimos `dias` con datos,
+    anclada en la última fecha cargada (no en hoy: un establecimiento que
+    dejó de cargar sigue mostrando su último período). Con el rango,
+    load_daily_from_db lee sólo las particiones del período.
+    
+    Args:
+        dias: Largo de la ventana (None = todo el historial: fecha_desde None)
+        
+    Returns:
+        (fecha_desde, fecha_hasta), o None si no hay datos
+    """
+    from datetime import timedelta
+    from db_connection import execute_query
+    
+    semanal = _daily_semanal(storage)
+    where_clause, params = daily_filters(establecimiento, semanal=semanal)
+    sql = DAILY_SEMANA_ULTIMA_FECHA_SQL if semanal else DAILY_ULTIMA_FECHA_SQL
+    row = execute_query(sql.format(where_clause=where_clause), params=params or None,
+                        user_id=user_id, is_admin=is_admin, fetch_one=True)
+    hasta = row['fecha'] if row else None
+    if hasta is None:
+        return None
+    desde = hasta - timedelta(days=dias - 1) if dias else None
+    return desde, hasta
 
 
 def load_historic_from_db(user_id: int = None, is_admin: bool = False) -> pd.DataFrame:
@@ -624,34 +897,14 @@ def load_historic_from_db(user_id: int = None, is_admin: bool = False) -> pd.Dat
         Fecha | N° Semana | Empresa | Establecimiento | MDAT
     """
     try:
-        from db_connection import execute_query
+        from db_connection import execute_frame, register_statement
     except ImportError:
         raise ImportError("Módulo db_connection no disponible")
     
-    # CORREGIDO: Usar datos_historicos en lugar de historico_mdat
-    query = """
-        SELECT 
-            fecha as "Fecha",
-            semana as "N° Semana",
-            establecimiento as "Establecimiento",
-            mdat as "MDAT",
-            vacas_en_ordena as "Vacas en ordeña"
-        FROM datos_historicos
-        ORDER BY semana DESC
-    """
-    
-    results = execute_query(query, user_id=user_id, is_admin=is_admin, fetch_all=True)
-    
-    if not results:
-        return pd.DataFrame()
-    
-    df = pd.DataFrame(results)
-    # Convertir columnas numéricas potencialmente en Decimal a float para evitar
-    # errores de operaciones con tipos mezclados (Decimal vs float)
-    for col in ["MDAT", "Vacas en ordeña"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    return df
+    register_statement("etl_historic", HISTORIC_SQL)
+    return execute_frame(HISTORIC_SQL, user_id=user_id, is_admin=is_admin, statement="etl_historic",
+                         categories=HISTORIC_CATEGORY_COLUMNS, floats=HISTORIC_FLOAT_COLUMNS,
+                         dates=["Fecha"])
 
 
 # ---------------------------------------------------------
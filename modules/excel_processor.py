@@ -4,11 +4,16 @@ Módulo para procesar reportes semanales e históricos
 """
 import pandas as pd
 import numpy as np
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import Dict, List, Tuple, Optional
 import re
 from db_connection import execute_query, execute_update, get_connection
 from psycopg2 import extras
+import concept_catalog
+import partition_manager
+import daily_dictionaries
+from config import DAILY_STORAGE_CONFIG
+from historico_processor import backfill_establecimiento_ids
 
 class ExcelProcessor:
     """Procesador de archivos Excel con estandarización robusta"""
@@ -267,21 +272,45 @@ class ExcelProcessor:
             
             # Insertar datos diarios en batch
             if batch_diarios:
-                with get_connection() as conn:
-                    with conn.cursor() as cur:
-                        extras.execute_batch(cur, """
-                            INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria, concepto, valor)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                            ON CONFLICT (establecimiento_id, fecha, concepto) DO UPDATE
-                            SET valor = EXCLUDED.valor
-                        """, batch_diarios, page_size=1000)
-                        conn.commit()
+                # ON CONFLICT no admite la misma clave dos veces en una
+                # sentencia: gana la última.
+                batch_diarios = list({(r[0], r[2], r[4]): r for r in batch_diarios}.values())
+                # concepto / categoría como ids de los diccionarios
+                batch_diarios = daily_dictionaries.encode_batch(batch_diarios)
+                storage = DAILY_STORAGE_CONFIG['mode']
+                if storage in ('filas', 'ambos'):
+                    # Si datos_diarios está particionada, asegurar la partición
+                    # del período (si no, las filas caen en la DEFAULT)
+                    try:
+                        partition_manager.ensure_for_range(fecha_inicio, fecha_fin)
+                    except Exception as e:
+                        self.warnings.append(f"No se pudieron crear particiones: {e}")
+                    # Una sentencia multi-fila por página (en la tabla particionada
+                    # el ruteo a la partición se paga por sentencia).
+                    with get_connection() as conn:
+                        with conn.cursor() as cur:
+                            extras.execute_values(cur, """
+                                INSERT INTO datos_diarios (establecimiento_id, empresa_id, fecha, categoria_id, concepto_id, valor)
+                                VALUES %s
+                                ON CONFLICT (establecimiento_id, fecha, concepto_id) DO UPDATE
+                                SET valor = EXCLUDED.valor
+                            """, batch_diarios, page_size=1000)
+                            conn.commit()
+                if storage in ('semana', 'ambos'):
+                    self._upsert_diarios_semana(batch_diarios)
                 self.stats['registros_diarios'] = len(batch_diarios)
 
             # Agregar datos semanales
             semanales_count = self._aggregate_to_semanal(df, semana, anio, est_map, fecha_inicio, fecha_fin)
             self.stats['registros_semanales'] = semanales_count
 
+            # Establecimientos nuevos: enlazar el histórico que ya los nombraba
+            if self.stats['establecimientos_creados']:
+                try:
+                    backfill_establecimiento_ids()
+                except Exception as e:
+                    self.warnings.append(f"No se pudo enlazar el histórico: {e}")
+
             return {
                 'success': True,
                 'stats': self.stats,
@@ -294,6 +323,41 @@ class ExcelProcessor:
             self.logs.append(f"Error en procesamiento: {str(e)}")
             return {'success': False, 'errors': self.errors, 'logs': self.logs}
     
+    def _upsert_diarios_semana(self, batch_diarios: List[tuple]) -> int:
+        """
+        Escribe los datos diarios en datos_diarios_semana: una fila por
+        (establecimiento, semana, concepto) con los valores lunes..domingo.
+        Los días sin dato en el batch conservan el valor guardado.
+        
+        batch_diarios: (est_id, empresa_id, fecha, categoria_id, concepto_id, valor)
+                       (daily_dictionaries.encode_batch)
+        Returns: filas semanales escritas
+        """
+        semanas = {}
+        for est_id, empresa_id, fecha, categoria_id, concepto_id, valor in batch_diarios:
+            lunes = fecha - timedelta(days=fecha.weekday())
+            key = (est_id, lunes, concepto_id)
+            if key not in semanas:
+                semanas[key] = (lunes, est_id, empresa_id, concepto_id, categoria_id, [None] * 7)
+            semanas[key][5][fecha.weekday()] = valor
+
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                extras.execute_values(cur, """
+                    INSERT INTO datos_diarios_semana
+                        (semana_inicio, establecimiento_id, empresa_id, concepto_id, categoria_id, valores)
+                    VALUES %s
+                    ON CONFLICT (establecimiento_id, semana_inicio, concepto_id) DO UPDATE
+                    SET valores = ARRAY(
+                        SELECT COALESCE(u.nuevo, u.actual)
+                        FROM unnest(EXCLUDED.valores, datos_diarios_semana.valores)
+                             WITH ORDINALITY AS u(nuevo, actual, dia)
+                        ORDER BY u.dia
+                    )
+                """, list(semanas.values()), template="(%s, %s, %s, %s, %s, %s::float8[])", page_size=1000)
+                conn.commit()
+        return len(semanas)
+
     def _aggregate_to_semanal(self, df_original: pd.DataFrame, semana: int, anio: int, est_map: Dict, fecha_inicio: 'date' = None, fecha_fin: 'date' = None) -> int:
         """
         Copia datos de Excel → semanales sin cálculos.
@@ -310,95 +374,50 @@ class ExcelProcessor:
             fecha_fin: Fecha de fin del período (nueva)
         
         Mapeo de conceptos Excel → columnas BD:
-        Los conceptos vienen con prefijo (A), (B), etc.
-        Usamos contains con el texto relevante (sin el prefijo de letra).
+        Cada CONCEPTO distinto se resuelve una vez con concept_catalog
+        (índice de alias; los patrones antiguos quedan como respaldo).
         """
-        # Mapeo: concepto_excel (lowercase, substring) → columna_db
-        concepto_map = {
-            # Superficie
-            'superficie': 'superficie_pradera',
-            
-            # Vacas (con variantes por encoding)
-            'vacas en orde': 'vacas_en_ordena',  # Captura encoding corrupto
-            'vacas masa': 'vacas_masa',
-            
-            # Producción promedio (ESPECÍFICO: buscar "promedio" para evitar "Producción total")
-            'promedio': 'produccion_promedio',  # Captura solo "Producción promedio", no "total"
-            
-            # Precio de la leche
-            'precio de la leche': 'precio_leche',
-            
-            # Calidad (grasa y proteína)
-            'porcentaje de grasa': 'porcentaje_grasa',
-            '% de grasa': 'porcentaje_grasa',
-            'proteinas': 'proteinas',
-            
-            # Materia seca (MS) por vaca - del Excel
-            'kg ms pradera / vaca': 'kg_ms_pradera_vaca',
-            'kg ms concentrado / vaca': 'kg_ms_concentrado_vaca',
-            'kg ms conservado / vaca': 'kg_ms_conservado_vaca',
-            'kg ms verde / vaca': 'kg_ms_verde_vaca',
-            'total ms': 'total_ms',
-            # Si quieres guardar 'mat. seca por ha' o 'consumo de mat. seca', usa columnas separadas en la BD
-            # 'mat. seca por ha': 'mat_seca_por_ha',
-            # 'consumo de mat. seca': 'consumo_mat_seca',
-            
-            # Costos (con variantes por encoding)
-            'costo raci': 'costo_racion_vaca',
-            'costo promedio concentrado': 'costo_promedio_concentrado',
-            'grms concentrado / ltr leche': 'grms_concentrado_por_litro',
-            
-            # MDAT
-            ') mdat': 'mdat',
-            'mdat (l/vaca': 'mdat_litros_vaca_dia',
-            
-            # Porcentaje costo alimentos
-            'porcentaje costo alimentos': 'porcentaje_costo_alimentos',
-        }
-        
         count = 0
-        conceptos_no_mapeados = set()
-        
+
         # Verificar que tenemos la columna A. TOTAL
         has_a_total = 'A. TOTAL' in df_original.columns
+        date_pattern = re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$')
+
+        # Concepto → columna de datos_semanales, una vez para todo el archivo
+        claves = concept_catalog.resolve_series(df_original['CONCEPTO'], contexto='semanal')
+        columnas = claves.map(concept_catalog.columna_semanal)
+        est_nombres = df_original['Establecimiento'].astype(str).str.strip()
 
         for (empresa_id, est_nombre), est_id in est_map.items():
             valores = {}  # columna_db → valor único
             pradera_val = None
             verde_val = None
-            df_est = df_original[df_original['Establecimiento'].astype(str).str.strip() == str(est_nombre).strip()].copy()
+            mask_est = est_nombres == str(est_nombre).strip()
+            df_est = df_original[mask_est]
             if df_est.empty:
                 continue
 
-            # Normalizar conceptos a lowercase para matching
-            df_est['__concepto_norm'] = df_est['CONCEPTO'].astype(str).str.lower()
-
-            for concepto_excel, columna_db in concepto_map.items():
-                mask = df_est['__concepto_norm'].str.contains(concepto_excel.lower(), na=False, regex=False)
-                sub = df_est[mask]
+            for columna_db, sub in df_est.groupby(columnas[mask_est], sort=False):
                 val_final = None
-                if not sub.empty:
-                    # Tomar A. TOTAL si existe
-                    if has_a_total and 'A. TOTAL' in sub.columns:
-                        vals = pd.to_numeric(sub['A. TOTAL'], errors='coerce').dropna()
-                        if len(vals) > 0:
-                            val_final = float(vals.mean())
-                        else:
-                            # Si no hay A. TOTAL pero hay días, promediar días
-                            date_pattern = re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$')
-                            date_cols = [col for col in sub.columns if date_pattern.match(str(col))]
-                            if date_cols:
-                                vals = pd.to_numeric(sub[date_cols].values.flatten(), errors='coerce')
-                                vals = pd.Series(vals).dropna()
-                                val_final = float(vals.mean()) if len(vals) > 0 else None
+                # Tomar A. TOTAL si existe
+                if has_a_total and 'A. TOTAL' in sub.columns:
+                    vals = pd.to_numeric(sub['A. TOTAL'], errors='coerce').dropna()
+                    if len(vals) > 0:
+                        val_final = float(vals.mean())
                     else:
-                        # Si no hay fila, buscar días en el df_est
-                        date_pattern = re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$')
-                        date_cols = [col for col in df_est.columns if date_pattern.match(str(col))]
+                        # Si no hay A. TOTAL pero hay días, promediar días
+                        date_cols = [col for col in sub.columns if date_pattern.match(str(col))]
                         if date_cols:
-                            vals = pd.to_numeric(df_est[date_cols].values.flatten(), errors='coerce')
+                            vals = pd.to_numeric(sub[date_cols].values.flatten(), errors='coerce')
                             vals = pd.Series(vals).dropna()
                             val_final = float(vals.mean()) if len(vals) > 0 else None
+                else:
+                    # Sin A. TOTAL, promediar los días del establecimiento
+                    date_cols = [col for col in df_est.columns if date_pattern.match(str(col))]
+                    if date_cols:
+                        vals = pd.to_numeric(df_est[date_cols].values.flatten(), errors='coerce')
+                        vals = pd.Series(vals).dropna()
+                        val_final = float(vals.mean()) if len(vals) > 0 else None
 
                 # Guardar el valor real, solo redondear a 2 decimales
                 if val_final is not None:
@@ -412,11 +431,8 @@ class ExcelProcessor:
                         valores[columna_db] = val_final
 
             # Detectar conceptos no mapeados en este establecimiento
-            for concepto in df_est['__concepto_norm'].unique():
-                mapeado = any(pattern in concepto for pattern in concepto_map.keys())
-                if not mapeado:
-                    conceptos_no_mapeados.add(concepto)
-                    self.logs.append(f"Concepto no mapeado: '{concepto}' en establecimiento '{est_nombre}'")
+            for concepto in df_est.loc[claves[mask_est].isna(), 'CONCEPTO'].dropna().unique():
+                self.logs.append(f"Concepto no mapeado: '{concepto}' en establecimiento '{est_nombre}'")
 
             # Sumar pradera + verde para praderas_otros_verdes
             if pradera_val is not None or verde_val is not None:
@@ -0,0 +1,117 @@
+# =====================================================
+# CACHE DE EXPORTACIONES (Excel / PDF / HTML)
+# LRU en memoria acotado por tamaño, clave = hash del contenido
+# =====================================================
+"""
+Las exportaciones se generan sólo cuando el usuario las pide y se guardan
+por hash del contenido + formato. Si otro usuario (o el mismo tras un
+rerun) pide la misma matriz, se sirve desde memoria sin volver a
+construir el workbook ni lanzar wkhtmltopdf.
+
+El cache es del proceso (compartido entre sesiones de Streamlit) y
+expulsa las entradas menos usadas cuando supera EXPORT_CACHE_CONFIG['max_bytes'].
+"""
+
+import io
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import pandas as pd
+
+from config import EXPORT_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_entries: "OrderedDict[str, bytes]" = OrderedDict()
+_total_bytes = 0
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def frame_hash(df: pd.DataFrame, *extra) -> str:
+    """
+    Hash estable del contenido de un DataFrame (valores, índice y columnas)
+    más cualquier dato extra que cambie la salida (orden, semana, etc.).
+    """
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    h.update(repr(list(df.columns)).encode("utf-8"))
+    for item in extra:
+        h.update(repr(item).encode("utf-8"))
+    return h.hexdigest()
+
+
+def export_key(content_hash: str, fmt: str) -> str:
+    """Clave del cache: hash del contenido + formato de salida."""
+    return f"{fmt}:{content_hash}"
+
+
+def export_cache_get(key: str) -> Optional[bytes]:
+    """Devuelve la exportación cacheada (y la marca como reciente) o None."""
+    with _lock:
+        data = _entries.get(key)
+        if data is not None:
+            _entries.move_to_end(key)
+        return data
+
+
+def export_cache_put(key: str, data: bytes):
+    """Guarda una exportación, expulsando las más antiguas si se excede el límite."""
+    global _total_bytes
+    max_bytes = EXPORT_CACHE_CONFIG['max_bytes']
+    if len(data) > max_bytes:
+        return
+
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            _total_bytes -= len(old)
+        _entries[key] = data
+        _total_bytes += len(data)
+        while _total_bytes > max_bytes and _entries:
+            _, evicted = _entries.popitem(last=False)
+            _total_bytes -= len(evicted)
+            _stats['evictions'] += 1
+
+
+def get_or_build_export(key: str, builder: Callable[[], bytes]) -> bytes:
+    """Devuelve la exportación cacheada o la construye con builder() y la guarda."""
+    data = export_cache_get(key)
+    if data is not None:
+        _stats['hits'] += 1
+        return data
+
+    _stats['misses'] += 1
+    data = builder()
+    export_cache_put(key, data)
+    return data
+
+
+def dataframe_to_excel_bytes(df: pd.DataFrame, sheet_name: str) -> bytes:
+    """Serializa un DataFrame a un .xlsx (openpyxl) en memoria."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffer.getvalue()
+
+
+def get_export_cache_stats() -> dict:
+    """Estadísticas del cache de exportaciones."""
+    with _lock:
+        return {
+            'entries': len(_entries),
+            'bytes': _total_bytes,
+            'max_bytes': EXPORT_CACHE_CONFIG['max_bytes'],
+            **_stats,
+        }
+
+
+def clear_export_cache():
+    """Vacía el cache de exportaciones."""
+    global _total_bytes
+    with _lock:
+        _entries.clear()
+        _total_bytes = 0
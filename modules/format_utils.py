@@ -1,7 +1,160 @@
 """Funciones compartidas para formateo de números y DataFrames con locale español."""
+from typing import Callable, NamedTuple
+
+import numpy as np
 import pandas as pd
 
 
+class NumberFormat(NamedTuple):
+    """Especificación de formato numérico (locale español)."""
+    decimals: int = 2
+    currency: bool = False   # Prefijo $
+    percent: bool = False    # Sufijo %
+    thousands: bool = True   # Separador de miles (.)
+    truncate: bool = False   # Truncar como int(x) en vez de redondear
+
+
+MILES = NumberFormat()
+PESOS = NumberFormat(currency=True)
+PCT = NumberFormat(percent=True)
+ENTERO = NumberFormat(decimals=0, thousands=False, truncate=True)
+
+
+_DIGITS = np.array(list("0123456789"), dtype='U1')
+# Hasta aquí el producto |x| × 10^decimales se representa exacto como entero
+_MAX_EXACT = float(2 ** 52)
+
+
+def _scaled_integers(vals: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    round(|vals| × 10^decimales) como int64, con el mismo redondeo que
+    f"{x:.Nf}". Los casos al borde de .5 (donde el producto en coma
+    flotante puede cruzar la mitad) se resuelven con el formateo de Python.
+    Requiere |vals| × 10^decimales < 2^52.
+    """
+    y = np.abs(vals) * 10.0 ** decimals
+    dudoso = np.abs(y - np.floor(y) - 0.5) <= 4 * np.finfo(float).eps * np.maximum(y, 1.0)
+    q = np.round(np.where(dudoso, 0.0, y)).astype(np.int64)
+    for i in np.flatnonzero(dudoso):
+        q[i] = int(f"{abs(vals[i]):.{decimals}f}".replace(".", ""))
+    return q
+
+
+def _format_scalar(x: float, spec: NumberFormat) -> str:
+    """Formato de un único valor (misma salida que format_numbers_spanish)."""
+    sep = "," if spec.thousands else ""
+    if spec.truncate:
+        x = float(int(x))
+    text = f"{x:{sep}.{int(spec.decimals)}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return ("$" if spec.currency else "") + text + ("%" if spec.percent else "")
+
+
+def _digit_matrix(values: np.ndarray, width: int) -> np.ndarray:
+    """Matriz n × width con los dígitos decimales de values (int64 ≥ 0)."""
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return _DIGITS[(values[:, None] // powers) % 10]
+
+
+def format_numbers_spanish(values, spec: NumberFormat = MILES, na: str = "") -> np.ndarray:
+    """
+    Formatea un arreglo de números completo en formato español (1.234,56)
+    en una sola pasada vectorizada: los dígitos, separadores, signo y
+    símbolos se escriben en una matriz de caracteres (una fila por valor)
+    que luego se lee como un arreglo de strings.
+
+    Produce el mismo texto que fmt_miles / fmt_pesos / fmt_pct.
+
+    Args:
+        values: Arreglo/Serie/lista de números (se convierte a float)
+        spec: Decimales, moneda ($), porcentaje (%) y separador de miles
+        na: Texto para NaN / infinitos
+
+    Returns:
+        np.ndarray (dtype object) con la misma forma que values
+    """
+    arr = np.asarray(values, dtype=float)
+    flat = arr.ravel()
+    if spec.truncate:
+        flat = np.trunc(flat) + 0.0  # + 0.0 evita "-0"
+    out = np.full(flat.shape, na, dtype=object)
+    decimals = int(spec.decimals)
+    mask = np.isfinite(flat)
+
+    # Magnitudes fuera del rango entero exacto: formateo escalar
+    huge = mask & (np.abs(np.where(mask, flat, 0.0)) * 10.0 ** decimals >= _MAX_EXACT)
+    for i in np.flatnonzero(huge):
+        out[i] = _format_scalar(flat[i], spec)
+    mask &= ~huge
+    if not mask.any():
+        return out.reshape(arr.shape)
+
+    vals = flat[mask]
+    n = vals.size
+    q = _scaled_integers(vals, decimals)
+    int_part = q // (10 ** decimals)
+
+    # Parte entera, alineada a la derecha, con separador de miles
+    n_digits = np.floor(np.log10(np.maximum(int_part, 1))).astype(int) + 1
+    width = int(n_digits.max())
+    r = width - 1 - np.arange(width)  # posición de cada dígito desde la derecha
+    n_seps = (width - 1) // 3 if spec.thousands else 0
+    pos = np.arange(width) + (n_seps - r // 3 if spec.thousands else 0)
+    row_len = n_digits + ((n_digits - 1) // 3 if spec.thousands else 0)
+
+    # Columnas: "$" y "-" | parte entera | ",decimales" | "%"
+    left = 2
+    int_end = left + width + n_seps
+    tail = (1 + decimals if decimals > 0 else 0) + (1 if spec.percent else 0)
+    chars = np.full((n, int_end + tail), ' ', dtype='U1')
+
+    significant = r[None, :] < n_digits[:, None]
+    chars[:, left + pos] = np.where(significant, _digit_matrix(int_part, width), ' ')
+    if spec.thousands:
+        seps = np.flatnonzero((r % 3 == 0) & (r > 0))
+        chars[:, left + pos[seps] + 1] = np.where(significant[:, seps], '.', ' ')
+
+    # Signo y moneda pegados al primer dígito: "$-1.234,50"
+    rows = np.arange(n)
+    start = int_end - row_len
+    negative = np.signbit(vals)
+    start = start - negative
+    chars[rows[negative], start[negative]] = '-'
+    if spec.currency:
+        chars[rows, start - 1] = '$'
+
+    if decimals > 0:
+        chars[:, int_end] = ','
+        chars[:, int_end + 1:int_end + 1 + decimals] = _digit_matrix(q % (10 ** decimals), decimals)
+    if spec.percent:
+        chars[:, -1] = '%'
+
+    out[mask] = np.char.lstrip(chars.view(f'U{chars.shape[1]}').reshape(n))
+    return out.reshape(arr.shape)
+
+
+def format_series_spanish(series: pd.Series, spec: NumberFormat = MILES, na: str = "") -> pd.Series:
+    """Versión para pd.Series (conserva el índice)."""
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return pd.Series(format_numbers_spanish(values, spec, na), index=series.index, name=series.name)
+
+
+class _Formatted(dict):
+    """Tabla valor → texto; valores ausentes (NaN, texto) se muestran vacíos."""
+
+    def __missing__(self, key):
+        return ""
+
+
+def value_formatter(values, spec: NumberFormat = MILES) -> Callable[[float], str]:
+    """
+    Formateador para Styler.format: formatea de una vez los valores únicos
+    de la columna y devuelve una búsqueda en diccionario por celda.
+    """
+    arr = pd.to_numeric(pd.Series(np.ravel(values)), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    uniques = np.unique(arr[np.isfinite(arr)])
+    return _Formatted(zip(uniques.tolist(), format_numbers_spanish(uniques, spec).tolist())).__getitem__
+
+
 def format_number_spanish(x):
     """
     Convierte un número a formato español: 1.234,56
@@ -17,6 +170,27 @@ def format_number_spanish(x):
     return str(x)
 
 
+def fmt_miles(x: float) -> str:
+    """Número con separador de miles y coma decimal: 12.345,67"""
+    if pd.isna(x):
+        return ""
+    return f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def fmt_pesos(x: float) -> str:
+    """Igual que arriba, pero con símbolo $ delante."""
+    if pd.isna(x):
+        return ""
+    return "$" + fmt_miles(x)
+
+
+def fmt_pct(x: float) -> str:
+    """Para % que ya vienen como número (no lo dividimos por 100)."""
+    if pd.isna(x):
+        return ""
+    return fmt_miles(x) + "%"
+
+
 def format_dataframe_for_display(df: pd.DataFrame) -> tuple:
     """
     Formatea un DataFrame para mostrar números con formato español.
@@ -28,9 +202,9 @@ def format_dataframe_for_display(df: pd.DataFrame) -> tuple:
     for col in df_display.columns:
         try:
             if pd.api.types.is_numeric_dtype(df_display[col]):
-                # Convertir a string con formato español
-                df_display[col] = df_display[col].apply(format_number_spanish)
-        except:
+                # Convertir la columna completa a string con formato español
+                df_display[col] = format_series_spanish(df_display[col])
+        except Exception:
             pass
     
     return df_display, None
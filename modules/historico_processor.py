@@ -4,97 +4,97 @@ Módulo para cargar y procesar el archivo histórico de datos semanales
 """
 import pandas as pd
 import numpy as np
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from datetime import datetime, date
+from typing import Dict, Iterable, List, Tuple, Optional
 from db_connection import execute_query, execute_update, get_connection
 from psycopg2 import extras
+import concept_catalog
+from etl import normalize_est_name
+
+
+def anio_de_semana(semana: int, fecha: date) -> int:
+    """
+    Año al que pertenece una semana según su fecha de cierre: el de la
+    fecha, salvo las semanas que cruzan el cambio de año (semana 52/53
+    que cierra en enero, semana 1 que cierra en diciembre).
+    Misma regla que db/migrations/historico_establecimiento_id.sql.
+    """
+    if semana >= 50 and fecha.month == 1:
+        return fecha.year - 1
+    if semana <= 2 and fecha.month == 12:
+        return fecha.year + 1
+    return fecha.year
+
+
+def resolve_establecimiento_ids(nombres: Iterable[str]) -> Dict[str, Optional[int]]:
+    """
+    Resuelve nombres de establecimiento del histórico a establecimientos.id.
+
+    Primero por nombre exacto (sin mayúsculas ni espacios extremos) y si no,
+    con etl.normalize_est_name ("Agricola X" == "X"). Un nombre normalizado
+    que corresponde a más de un establecimiento queda sin resolver (None).
+    """
+    nombres = {str(n).strip() for n in nombres if n is not None}
+    if not nombres:
+        return {}
+
+    exactos: Dict[str, int] = {}
+    normalizados: Dict[str, Optional[int]] = {}
+    for row in execute_query("SELECT id, nombre FROM establecimientos") or []:
+        exactos[row['nombre'].strip().lower()] = row['id']
+        clave = normalize_est_name(row['nombre']).lower()
+        # Ambiguo: dos establecimientos con el mismo nombre normalizado
+        normalizados[clave] = row['id'] if clave not in normalizados else None
+
+    resultado = {}
+    for nombre in nombres:
+        est_id = exactos.get(nombre.lower())
+        if est_id is None:
+            est_id = normalizados.get(normalize_est_name(nombre).lower())
+        resultado[nombre] = est_id
+    return resultado
+
+
+def backfill_establecimiento_ids() -> Dict:
+    """
+    Completa datos_historicos.establecimiento_id de las filas que no lo
+    tienen (migración historico_establecimiento_id.sql o cargas antiguas).
+
+    Returns:
+        {'filas_actualizadas': int, 'sin_resolver': [nombres]}
+    """
+    pendientes = execute_query("""
+        SELECT DISTINCT establecimiento
+        FROM datos_historicos
+        WHERE establecimiento_id IS NULL AND establecimiento IS NOT NULL
+    """) or []
+    ids = resolve_establecimiento_ids(r['establecimiento'] for r in pendientes)
+
+    resueltos = [(nombre, est_id) for nombre, est_id in ids.items() if est_id is not None]
+    actualizadas = 0
+    if resueltos:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                # Una sola página: rowcount cuenta todas las filas actualizadas
+                extras.execute_values(cur, """
+                    UPDATE datos_historicos dh
+                    SET establecimiento_id = v.id
+                    FROM (VALUES %s) AS v(nombre, id)
+                    WHERE TRIM(dh.establecimiento) = v.nombre
+                      AND dh.establecimiento_id IS NULL
+                """, resueltos, page_size=len(resueltos))
+                actualizadas = cur.rowcount
+            conn.commit()
+
+    return {
+        'filas_actualizadas': actualizadas,
+        'sin_resolver': sorted(nombre for nombre, est_id in ids.items() if est_id is None),
+    }
 
 
 class HistoricoProcessor:
     """Procesador para archivos de histórico completo"""
     
-    # Mapeo de columnas del Excel histórico a columnas de la BD
-    # Basado en el Excel "HISTORICO PERSISTENTE"
-    # IMPORTANTE: Los patrones más específicos deben ir PRIMERO para evitar conflictos
-    COLUMN_MAP = {
-        # Identificadores
-        'semana': 'semana',
-        'n° semana': 'semana',
-        'nâ° semana': 'semana',  # encoding alternativo
-        'fecha': 'fecha',
-        'establecimiento': 'establecimiento',  # Es el nombre del fundo
-        'empresa': 'establecimiento',  # Alias por si viene como "empresa"
-        
-        # VACAS - Patrones específicos PRIMERO para evitar conflictos
-        # "(A) Vacas en ordeña" debe mapear a vacas_en_ordena, NO a vacas_en_produccion
-        'vacas en ordeña': 'vacas_en_ordena',    # Match exacto primero
-        'vacas en ordena': 'vacas_en_ordena',    # Sin tilde
-        'vacas en ord': 'vacas_en_ordena',       # Parcial
-        '(a) vacas': 'vacas_en_ordena',          # Con prefijo (A)
-        
-        # Vacas masa
-        'vacas masa': 'vacas_masa',
-        
-        # Vacas en producción (después de los más específicos)
-        'vacas en producción': 'vacas_en_produccion',
-        'vacas en produccion': 'vacas_en_produccion',
-        'vacas en producci': 'vacas_en_produccion',
-        
-        # Leche
-        'le envían': 'leche_enviada',
-        'le envian': 'leche_enviada',
-        'leche enviada': 'leche_enviada',
-        'che no': 'leche_no_vendible',
-        'pna terr': 'pna_terneros',
-        'pna tern': 'pna_terneros',
-        'producción': 'produccion_total',
-        'produccion': 'produccion_total',
-        'precio de': 'precio_leche',
-        'dias lactancia': 'dias_lactancia',
-        'días lactancia': 'dias_lactancia',
-        'lactancia': 'dias_lactancia',
-        
-        # Calidad
-        '% grasa': 'porcentaje_grasa',
-        'grasa': 'porcentaje_grasa',
-        '% prot': 'porcentaje_proteina',
-        'proteina': 'porcentaje_proteina',
-        'proteínas': 'porcentaje_proteina',
-        
-        # MS
-        'kg ms prad': 'kg_ms_pradera',
-        'ms pradera': 'kg_ms_pradera',
-        'kg ms cons': 'kg_ms_conservado',
-        'ms conserv': 'kg_ms_conservado',
-        'kg ms conc': 'kg_ms_concentrado',
-        'ms concent': 'kg_ms_concentrado',
-        'consumo ms': 'consumo_ms',
-        'ms var': 'consumo_ms',
-        'ms por ha': 'ms_por_ha',
-        'ms/ha': 'ms_por_ha',
-        
-        # Costos
-        'taje leche': 'costo_racion_vaca',
-        'costo raci': 'costo_racion_vaca',
-        
-        # MDAT
-        'mdat': 'mdat',
-        '(i) mdat': 'mdat',
-        
-        # Eficiencia
-        'eficie': 'eficiencia',
-        'eficiencia': 'eficiencia',
-        
-        # Relaciones
-        'centaje c': 'relacion_ordena_masa',
-        
-        # Superficie
-        'superficie': 'superficie_praderas',
-        
-        # Otros
-        '% leche no': 'porcentaje_leche_no_vendible',
-    }
-    
     def __init__(self):
         self.errors = []
         self.warnings = []
@@ -107,30 +107,20 @@ class HistoricoProcessor:
             'empresas_unicas': 0
         }
     
-    def _normalize_column_name(self, col: str) -> str:
-        """Normaliza nombre de columna para matching"""
-        if not col:
-            return ""
-        col = str(col).lower().strip()
-        # Quitar caracteres especiales de encoding
-        col = col.replace('â', 'a').replace('ã', 'a').replace('ñ', 'n')
-        col = col.replace('°', '').replace('º', '')
-        return col
-    
     def _map_columns(self, df: pd.DataFrame) -> Dict[str, str]:
         """
-        Mapea columnas del Excel a columnas de BD
+        Mapea columnas del Excel a columnas de BD con el catálogo de
+        conceptos (concept_catalog, contexto 'historico').
         Returns: dict con {columna_excel: columna_bd}
         """
         mapping = {}
         
         for excel_col in df.columns:
-            excel_col_norm = self._normalize_column_name(excel_col)
-            
-            for pattern, db_col in self.COLUMN_MAP.items():
-                if pattern in excel_col_norm:
-                    mapping[excel_col] = db_col
-                    break
+            db_col = concept_catalog.columna_historico(
+                concept_catalog.resolve(excel_col, contexto='historico')
+            )
+            if db_col:
+                mapping[excel_col] = db_col
         
         return mapping
     
@@ -320,9 +310,11 @@ class HistoricoProcessor:
                 self.stats['semanas_unicas'].add(semana)
                 self.stats['empresas_unicas'].add(establecimiento)
                 
-                # Construir tupla para insert (sin campo empresa, solo establecimiento)
+                # Construir tupla para insert (sin campo empresa, solo establecimiento;
+                # establecimiento_id se resuelve después para todo el archivo)
                 batch_data.append((
                     semana,
+                    anio_de_semana(semana, fecha),
                     fecha,
                     establecimiento,
                     self._safe_int(record.get('vacas_en_produccion')),
@@ -350,13 +342,23 @@ class HistoricoProcessor:
                     self._safe_float(record.get('carga_animal')),
                 ))
             
+            # Resolver establecimiento_id una vez por nombre
+            ids = resolve_establecimiento_ids(t[3] for t in batch_data)
+            sin_resolver = sorted(nombre for nombre, est_id in ids.items() if est_id is None)
+            if sin_resolver:
+                self.warnings.append(
+                    f"Establecimientos sin coincidencia en la base ({len(sin_resolver)}): "
+                    f"{', '.join(sin_resolver)}"
+                )
+            batch_data = [t[:4] + (ids.get(t[3]),) + t[4:] for t in batch_data]
+            
             # Insertar en batch
             if batch_data:
                 with get_connection() as conn:
                     with conn.cursor() as cur:
                         extras.execute_batch(cur, """
                             INSERT INTO datos_historicos (
-                                semana, fecha, establecimiento,
+                                semana, anio, fecha, establecimiento, establecimiento_id,
                                 vacas_en_produccion, leche_enviada, leche_no_vendible, pna_terneros,
                                 produccion_total, precio_leche, dias_lactancia,
                                 porcentaje_grasa, porcentaje_proteina,
@@ -365,7 +367,7 @@ class HistoricoProcessor:
                                 vacas_masa, vacas_en_ordena, relacion_ordena_masa,
                                 superficie_praderas, porcentaje_leche_no_vendible, carga_animal
                             ) VALUES (
-                                %s, %s, %s,
+                                %s, %s, %s, %s, %s,
                                 %s, %s, %s, %s,
                                 %s, %s, %s,
                                 %s, %s,
@@ -374,8 +376,9 @@ class HistoricoProcessor:
                                 %s, %s, %s,
                                 %s, %s, %s
                             )
-                            ON CONFLICT (semana, establecimiento) DO UPDATE SET
+                            ON CONFLICT (establecimiento, anio, semana) DO UPDATE SET
                                 fecha = EXCLUDED.fecha,
+                                establecimiento_id = EXCLUDED.establecimiento_id,
                                 vacas_en_produccion = EXCLUDED.vacas_en_produccion,
                                 leche_enviada = EXCLUDED.leche_enviada,
                                 leche_no_vendible = EXCLUDED.leche_no_vendible,
@@ -493,7 +496,8 @@ class HistoricoProcessor:
         Returns:
             Dict con mdat_4sem, vacas_4sem, mdat_52sem, vacas_52sem
         """
-        # Obtener histórico del establecimiento
+        # Obtener histórico del establecimiento (cruce por establecimiento_id)
+        est_id = resolve_establecimiento_ids([establecimiento]).get(str(establecimiento).strip())
         query = """
             SELECT 
                 semana,
@@ -501,12 +505,12 @@ class HistoricoProcessor:
                 mdat,
                 vacas_en_ordena
             FROM datos_historicos
-            WHERE LOWER(establecimiento) = LOWER(%s)
+            WHERE establecimiento_id = %s
               AND fecha < %s
-            ORDER BY fecha DESC
+            ORDER BY anio DESC, semana DESC
         """
         
-        results = execute_query(query, (establecimiento, fecha_actual))
+        results = execute_query(query, (est_id, fecha_actual)) if est_id is not None else None
         
         if not results:
             return {
@@ -1,5 +1,7 @@
 # matrix_builder.py
 
+import re
+
 import pandas as pd
 import numpy as np
 
@@ -8,7 +10,9 @@ from concept_engine import (
     attach_normalized_concepts,
     CONCEPT_MAP,
 )
-from db_connection import execute_query
+from db_connection import execute_frame
+from etl import HISTORIC_CATEGORY_COLUMNS, HISTORIC_FLOAT_COLUMNS
+from compact_frames import compact_frame, to_float
 
 # Orden de columnas igual al Power BI
 MATRIX_COLUMNS = [
@@ -31,6 +35,12 @@ MATRIX_COLUMNS = [
     "MDAT 52 sem", "Vacas 52 sem", "Ranking 52 sem",
 ]
 
+RANKING_COLUMNS = ["Ranking MDAT", "Ranking 4 sem", "Ranking 52 sem"]
+# Columnas numéricas de la matriz: float64 (los rankings, Int64)
+MATRIX_FLOAT_COLUMNS = [
+    c for c in MATRIX_COLUMNS if c != "Establecimiento" and c not in RANKING_COLUMNS
+]
+
 
 def _safe_val(row: dict, col: str) -> float:
     v = row.get(col)
@@ -93,38 +103,99 @@ def _derivados(row: dict):
     return mdat, mdat_l, carga, pct_costo
 
 
-def _load_historico_from_db(current_week: int) -> pd.DataFrame:
+def _load_historico_from_db() -> pd.DataFrame:
     """
     Carga datos históricos desde la tabla datos_historicos.
-    Obtiene las últimas 52 semanas para cálculos de promedios.
+    Trae los dos últimos años (las 52 semanas previas a la última semana
+    de cada establecimiento pueden empezar el año anterior).
     """
     try:
-        # Cargar histórico de las últimas 52 semanas (excluyendo la actual)
         query = """
             SELECT 
+                anio as "Año",
                 semana as "N° Semana",
+                establecimiento_id,
                 establecimiento as "Establecimiento",
                 mdat as "MDAT",
                 vacas_en_ordena as "Vacas en ordeña"
             FROM datos_historicos
-            WHERE semana < %s AND semana >= %s
-            ORDER BY semana DESC
+            WHERE anio >= (SELECT MAX(anio) - 1 FROM datos_historicos)
+            ORDER BY anio DESC, semana DESC
         """
-        start_week = current_week - 52
-        results = execute_query(query, (current_week, start_week))
-        
-        if results:
-            return pd.DataFrame(results)
-        return pd.DataFrame()
+        return execute_frame(query, categories=HISTORIC_CATEGORY_COLUMNS, floats=HISTORIC_FLOAT_COLUMNS)
     except Exception as e:
         print(f"Error cargando histórico: {e}")
         return pd.DataFrame()
 
 
+def _week_ordinal(df_hist: pd.DataFrame) -> pd.Series:
+    """
+    Número de semana continuo entre años a partir de Año + N° Semana, con
+    la misma numeración con que se cargan (historico_processor.anio_de_semana:
+    año por fecha de cierre, semana del Excel tal cual; no es semana ISO).
+    Cada año ocupa 52 posiciones, o 53 si alguna fila de ese año trae la
+    semana 53; la semana 0 cae sobre la última del año anterior. Toda fila
+    con Año y N° Semana numéricos tiene orden. Sin columna Año (histórico
+    Excel antiguo) se usa el N° Semana tal cual, como antes.
+    """
+    semana = pd.to_numeric(df_hist["N° Semana"], errors="coerce")
+    if "Año" not in df_hist.columns:
+        return semana
+    anio = pd.to_numeric(df_hist["Año"], errors="coerce")
+    validos = anio.notna() & semana.notna()
+    if not validos.any():
+        return semana
+
+    # Largo de cada año (también los años sin filas, para no pegar años
+    # separados) y semana en que empieza cada uno
+    anios = anio[validos].astype(int)
+    largo = semana[validos].groupby(anios).max().clip(lower=52)
+    largo = largo.reindex(range(anios.min(), anios.max() + 1), fill_value=52)
+    inicio = largo.cumsum().shift(fill_value=0)
+    return anio.map(inicio) + semana
+
+
+def _historic_groups(df_hist: pd.DataFrame | None) -> dict:
+    """
+    Agrupa el histórico una sola vez para toda la matriz:
+    {"id": {establecimiento_id: df}, "nombre": {nombre: df}}.
+    El cruce por establecimiento_id es el normal (histórico de la BD);
+    el de nombre queda para semanas sin id (preview de Excel, histórico Excel).
+    """
+    grupos = {"id": {}, "nombre": {}}
+    if df_hist is None or df_hist.empty:
+        return grupos
+    if "Establecimiento" not in df_hist.columns or "N° Semana" not in df_hist.columns:
+        return grupos
+
+    df = df_hist.assign(_orden=_week_ordinal(df_hist))
+    df = df[df["_orden"].notna()]
+
+    if "establecimiento_id" in df.columns:
+        ids = pd.to_numeric(df["establecimiento_id"], errors="coerce")
+        for est_id, df_est in df[ids.notna()].groupby(ids[ids.notna()].astype(int)):
+            grupos["id"][int(est_id)] = df_est
+
+    nombres = df["Establecimiento"].astype(str).str.strip()
+    for nombre, df_est in df.groupby(nombres):
+        grupos["nombre"][nombre] = df_est
+    return grupos
+
+
+def _window_mean(df_window: pd.DataFrame, col: str) -> float:
+    """Promedio de los registros con dato (cantidad REAL, no 4 o 52 fijos)."""
+    if df_window.empty or col not in df_window.columns:
+        return np.nan
+    values = df_window[col].dropna()
+    return float(values.mean()) if len(values) > 0 else np.nan
+
+
 def _get_historic_metrics(
     est: str,
     current_week: int | None,
-    df_hist: pd.DataFrame | None = None
+    df_hist: pd.DataFrame | None = None,
+    est_id: int | None = None,
+    grupos: dict | None = None,
 ) -> tuple[float, float, float, float]:
     """
     Calcula MDAT y Vacas promedio 4 sem y 52 sem.
@@ -132,97 +203,51 @@ def _get_historic_metrics(
     
     IMPORTANTE: Usa la semana más alta del histórico para cada establecimiento,
     NO la semana de datos_semanales (que puede tener numeración diferente).
-    """
-    # Si no se pasa histórico, cargarlo desde la BD
-    if df_hist is None or df_hist.empty:
-        df_hist = _load_historico_from_db(current_week if current_week else 999)
-    
-    if df_hist.empty:
-        return np.nan, np.nan, np.nan, np.nan
-    
-    # Check if required columns exist
-    if "Establecimiento" not in df_hist.columns or "N° Semana" not in df_hist.columns:
-        return np.nan, np.nan, np.nan, np.nan
+    Las ventanas se cuentan en semanas continuas (Año + N° Semana), así que
+    cruzan el cambio de año.
     
-    # Filtrar por establecimiento (match exacto)
-    mask_est = df_hist["Establecimiento"].astype(str).str.strip() == str(est).strip()
-    df_est = df_hist[mask_est].copy()
-    
-    if df_est.empty:
+    Con `grupos` (de _historic_groups) no vuelve a recorrer el histórico;
+    con `est_id` cruza por establecimiento_id en vez del nombre.
+    """
+    if grupos is None:
+        # Si no se pasa histórico, cargarlo desde la BD
+        if df_hist is None or df_hist.empty:
+            df_hist = _load_historico_from_db()
+        grupos = _historic_groups(df_hist)
+
+    df_est = grupos["id"].get(int(est_id)) if est_id is not None and not pd.isna(est_id) else None
+    if df_est is None:
+        df_est = grupos["nombre"].get(str(est).strip())
+    if df_est is None or df_est.empty:
         return np.nan, np.nan, np.nan, np.nan
 
-    # Obtener la semana MÁXIMA del histórico para ESTE establecimiento
-    # Esta es la "semana actual" desde la perspectiva del histórico
-    max_week_est = int(df_est["N° Semana"].max())
-    
-    # Asegurar orden descendente por semana
-    df_est = df_est.sort_values("N° Semana", ascending=False)
-    
     # Lógica: Usar las últimas 4 y 52 semanas DESDE la semana máxima del establecimiento
-    # Rango 4 semanas: [max_week - 3, max_week] (las últimas 4 incluyendo la más reciente)
-    start_4w = max_week_est - 3
-    end_4w = max_week_est
-    df_4w = df_est[(df_est["N° Semana"] >= start_4w) & (df_est["N° Semana"] <= end_4w)]
-    
-    # Rango 52 semanas: [max_week - 51, max_week] (las últimas 52 incluyendo la más reciente)
-    start_52w = max_week_est - 51
-    end_52w = max_week_est
-    df_52w = df_est[(df_est["N° Semana"] >= start_52w) & (df_est["N° Semana"] <= end_52w)]
-    
-    # Calcular MDAT promedio (dividir por cantidad REAL de registros, no por 4 o 52 fijos)
-    if not df_4w.empty and "MDAT" in df_4w.columns:
-        mdat_values_4w = df_4w["MDAT"].dropna()
-        if len(mdat_values_4w) > 0:
-            val_4w = float(mdat_values_4w.mean())
-        else:
-            val_4w = np.nan
-    else:
-        val_4w = np.nan
-        
-    if not df_52w.empty and "MDAT" in df_52w.columns:
-        mdat_values_52w = df_52w["MDAT"].dropna()
-        if len(mdat_values_52w) > 0:
-            val_52w = float(mdat_values_52w.mean())
-        else:
-            val_52w = np.nan
-    else:
-        val_52w = np.nan
-    
-    # Calcular Vacas promedio
+    # (las últimas N incluyendo la más reciente)
+    max_week_est = df_est["_orden"].max()
+    df_4w = df_est[df_est["_orden"] >= max_week_est - 3]
+    df_52w = df_est[df_est["_orden"] >= max_week_est - 51]
+
     vacas_col = "Vacas en ordeña"
-    if vacas_col in df_est.columns:
-        if not df_4w.empty:
-            vacas_values_4w = df_4w[vacas_col].dropna()
-            if len(vacas_values_4w) > 0:
-                vacas_4w = float(vacas_values_4w.mean())
-            else:
-                vacas_4w = np.nan
-        else:
-            vacas_4w = np.nan
-            
-        if not df_52w.empty:
-            vacas_values_52w = df_52w[vacas_col].dropna()
-            if len(vacas_values_52w) > 0:
-                vacas_52w = float(vacas_values_52w.mean())
-            else:
-                vacas_52w = np.nan
-        else:
-            vacas_52w = np.nan
-    else:
-        vacas_4w = np.nan
-        vacas_52w = np.nan
-    
-    return val_4w, vacas_4w, val_52w, vacas_52w
+    return (
+        _window_mean(df_4w, "MDAT"),
+        _window_mean(df_4w, vacas_col),
+        _window_mean(df_52w, "MDAT"),
+        _window_mean(df_52w, vacas_col),
+    )
+
+
+def _num(df: pd.DataFrame, col: str) -> pd.Series:
+    """Columna como float64 (sin conversión si ya lo es; NaN si no existe)."""
+    if col not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return to_float(df[col])
 
 
 def _wavg(values: pd.Series, weights: pd.Series) -> float:
-    """Promedio ponderado seguro (ignora NaNs y pesos cero)."""
+    """Promedio ponderado seguro (ignora NaNs y pesos cero). Recibe series float (_num)."""
     if values is None or weights is None:
         return np.nan
 
-    values = pd.to_numeric(values, errors="coerce")
-    weights = pd.to_numeric(weights, errors="coerce")
-
     mask = (~pd.isna(values)) & (~pd.isna(weights)) & (weights != 0)
     if not mask.any():
         return np.nan
@@ -244,24 +269,20 @@ def _total_row(df_matrix: pd.DataFrame) -> dict:
     - MDAT y MDAT (L/vaca/día) coherentes con esos ponderados.
     """
     # Trabajamos solo con filas de establecimientos (sin el total)
-    est_rows = df_matrix.copy()
-    est_rows = est_rows[est_rows["Establecimiento"] != "Sumas y Promedios"]
+    est_rows = df_matrix[df_matrix["Establecimiento"] != "Sumas y Promedios"]
 
     totals: dict = {"Establecimiento": "Sumas y Promedios"}
 
     # Sumas directas
     for col in ["Vacas en ordeña", "Vacas masa", "Superficie Praderas"]:
-        if col in est_rows.columns:
-            totals[col] = pd.to_numeric(est_rows[col], errors="coerce").sum()
-        else:
-            totals[col] = np.nan
+        totals[col] = _num(est_rows, col).sum() if col in est_rows.columns else np.nan
 
     # Series auxiliares
-    vacas = pd.to_numeric(est_rows.get("Vacas en ordeña"), errors="coerce")
-    prod = pd.to_numeric(est_rows.get("Producción promedio"), errors="coerce")
-    precio = pd.to_numeric(est_rows.get("Precio de la leche"), errors="coerce")
-    costo_racion = pd.to_numeric(est_rows.get("Costo ración vaca"), errors="coerce")
-    costo_concentrado = pd.to_numeric(est_rows.get("Costo promedio concentrado"), errors="coerce")
+    vacas = _num(est_rows, "Vacas en ordeña")
+    prod = _num(est_rows, "Producción promedio")
+    precio = _num(est_rows, "Precio de la leche")
+    costo_racion = _num(est_rows, "Costo ración vaca")
+    costo_concentrado = _num(est_rows, "Costo promedio concentrado")
     
     # Componentes de MS (ya no están en MATRIX_COLUMNS, pero los necesitamos para el total?)
     # Si no están en la matriz, no podemos leerlos de est_rows.
@@ -271,16 +292,16 @@ def _total_row(df_matrix: pd.DataFrame) -> dict:
     # El promedio ponderado de una suma es la suma de los promedios ponderados.
     # Así que podemos ponderar "Praderas y otros verdes" directamente.
     
-    praderas_otros = pd.to_numeric(est_rows.get("Praderas y otros verdes"), errors="coerce")
-    total_ms = pd.to_numeric(est_rows.get("Total MS"), errors="coerce")
+    praderas_otros = _num(est_rows, "Praderas y otros verdes")
+    total_ms = _num(est_rows, "Total MS")
     
-    ms_concentrado = pd.to_numeric(est_rows.get("Kg MS Concentrado / vaca"), errors="coerce")
-    ms_conservado = pd.to_numeric(est_rows.get("Kg MS Conservado / vaca"), errors="coerce")
+    ms_concentrado = _num(est_rows, "Kg MS Concentrado / vaca")
+    ms_conservado = _num(est_rows, "Kg MS Conservado / vaca")
     
-    gramos_litro = pd.to_numeric(est_rows.get("Grms concentrado / ltr leche"), errors="coerce")
-    grasa = pd.to_numeric(est_rows.get("Porcentaje de grasa"), errors="coerce")
-    prote = pd.to_numeric(est_rows.get("Proteinas"), errors="coerce")
-    mdat = pd.to_numeric(est_rows.get("MDAT"), errors="coerce")
+    gramos_litro = _num(est_rows, "Grms concentrado / ltr leche")
+    grasa = _num(est_rows, "Porcentaje de grasa")
+    prote = _num(est_rows, "Proteinas")
+    mdat = _num(est_rows, "MDAT")
 
     # Pesos
     peso_vacas = vacas
@@ -323,10 +344,10 @@ def _total_row(df_matrix: pd.DataFrame) -> dict:
     totals["MDAT"] = _wavg(mdat, peso_vacas)
 
     # MDAT 4 sem y 52 sem (Promedios ponderados por vacas actuales)
-    mdat_4w = pd.to_numeric(est_rows.get("MDAT 4 sem"), errors="coerce")
-    mdat_52w = pd.to_numeric(est_rows.get("MDAT 52 sem"), errors="coerce")
-    vacas_4w = pd.to_numeric(est_rows.get("Vacas 4 sem"), errors="coerce")
-    vacas_52w = pd.to_numeric(est_rows.get("Vacas 52 sem"), errors="coerce")
+    mdat_4w = _num(est_rows, "MDAT 4 sem")
+    mdat_52w = _num(est_rows, "MDAT 52 sem")
+    vacas_4w = _num(est_rows, "Vacas 4 sem")
+    vacas_52w = _num(est_rows, "Vacas 52 sem")
     
     totals["MDAT 4 sem"] = _wavg(mdat_4w, peso_vacas)
     totals["MDAT 52 sem"] = _wavg(mdat_52w, peso_vacas)
@@ -367,19 +388,29 @@ def _total_row(df_matrix: pd.DataFrame) -> dict:
     return totals
 
 
-def build_matrix(
+def _establishment_rows(
     df: pd.DataFrame,
     df_hist: pd.DataFrame | None = None,
     current_week: int | None = None
 ) -> pd.DataFrame:
     """
-    Construye la matriz semanal estilo Power BI.
-    Si df_hist y current_week están presentes, calcula métricas históricas.
+    Filas por establecimiento de la matriz (MATRIX_COLUMNS, sin rankings
+    ni Sumas y Promedios). Cada fila depende sólo de los datos de su
+    establecimiento, no de qué otros establecimientos estén en df.
     """
     # Normalizar conceptos a claves internas
     df_norm = attach_normalized_concepts(df)
     ests = sorted(df_norm["Establecimiento"].unique())
 
+    # Histórico agrupado una vez; cruce por establecimiento_id si la semana lo trae
+    if df_hist is None or df_hist.empty:
+        df_hist = _load_historico_from_db()
+    grupos_hist = _historic_groups(df_hist)
+    est_ids = (
+        df_norm.groupby("Establecimiento", observed=True)["establecimiento_id"].first().to_dict()
+        if "establecimiento_id" in df_norm.columns else {}
+    )
+
     rows: list[dict] = []
 
     for est in ests:
@@ -414,7 +445,9 @@ def build_matrix(
         row["Porcentaje costo alimentos"] = pct_costo
 
         # Históricos
-        m4, v4, m52, v52 = _get_historic_metrics(est, current_week, df_hist)
+        m4, v4, m52, v52 = _get_historic_metrics(
+            est, current_week, est_id=est_ids.get(est), grupos=grupos_hist
+        )
         row["MDAT 4 sem"] = m4
         row["Vacas 4 sem"] = v4
         row["MDAT 52 sem"] = m52
@@ -434,7 +467,12 @@ def build_matrix(
         if col not in df_matrix.columns:
             df_matrix[col] = np.nan
 
-    df_matrix = df_matrix[MATRIX_COLUMNS]
+    return df_matrix[MATRIX_COLUMNS]
+
+
+def _finish_matrix(df_matrix: pd.DataFrame) -> pd.DataFrame:
+    """Rankings 4/52 sem + fila Sumas y Promedios + tipos fijos sobre las filas de establecimientos."""
+    df_matrix = df_matrix.reset_index(drop=True)
 
     # Calcular Rankings Históricos (1 = Mayor MDAT)
     # Solo sobre filas que tengan dato
@@ -463,4 +501,35 @@ def build_matrix(
     # Concatenación segura
     df_matrix = pd.concat([df_matrix, totals_df], ignore_index=True)
 
+    # Tipos fijos: la fila de totales (None / NaN) no deja columnas object
+    df_matrix = compact_frame(df_matrix, floats=MATRIX_FLOAT_COLUMNS)
+    for col in RANKING_COLUMNS:
+        df_matrix[col] = df_matrix[col].astype("Int64")
     return df_matrix
+
+
+def build_matrix(
+    df: pd.DataFrame,
+    df_hist: pd.DataFrame | None = None,
+    current_week: int | None = None
+) -> pd.DataFrame:
+    """
+    Construye la matriz semanal estilo Power BI.
+    Si df_hist y current_week están presentes, calcula métricas históricas.
+    """
+    return _finish_matrix(_establishment_rows(df, df_hist, current_week))
+
+
+def subset_matrix(df_matrix: pd.DataFrame, establecimientos) -> pd.DataFrame:
+    """
+    Matriz de un subconjunto de establecimientos a partir de la matriz
+    completa (build_matrix de todos): toma sus filas y recalcula sólo los
+    rankings y Sumas y Promedios. Mismo resultado que build_matrix sobre
+    los datos filtrados, sin volver a normalizar conceptos ni recorrer el
+    histórico.
+    """
+    body = df_matrix[
+        df_matrix["Establecimiento"].ne("Sumas y Promedios")
+        & df_matrix["Establecimiento"].isin(establecimientos)
+    ]
+    return _finish_matrix(body)
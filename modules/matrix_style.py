@@ -0,0 +1,180 @@
+# =====================================================
+# ESTILOS DE LA MATRIZ SEMANAL (Styler vectorizado)
+# =====================================================
+"""
+Formato y colores condicionales de la matriz semanal.
+
+En vez de una función Python por columna que recorre cada celda con
+float()/try, el color azul/rojo (mejor/peor que "Sumas y Promedios")
+se calcula para toda la matriz con una sola comparación NumPy contra
+el vector de promedios, y se aplica con un único Styler.apply(axis=None).
+
+Los formatos numéricos se calculan una vez por columna sobre los valores
+únicos (format_utils.value_formatter); el Styler sólo hace una búsqueda
+en diccionario por celda.
+El HTML generado se cachea por (hash de la matriz, orden).
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.io.formats.style import Styler
+
+from format_utils import NumberFormat, MILES, PESOS, PCT, ENTERO, value_formatter
+from export_cache import export_key, get_or_build_export
+
+# Definición de columnas por tipo
+MONEY_COLS = [
+    "Costo promedio concentrado", "Costo ración vaca", "Precio de la leche",
+    "MDAT", "MDAT 4 sem", "MDAT 52 sem"
+]
+PCT_COLS = ["Porcentaje de grasa", "Proteinas", "Porcentaje costo alimentos"]
+INT_COLS = [
+    "Ranking MDAT", "Ranking 4 sem", "Ranking 52 sem",
+    "Vacas masa", "Vacas en ordeña", "Vacas 4 sem", "Vacas 52 sem",
+    "Grms concentrado / ltr leche"
+]
+FLOAT_COLS = [
+    "Superficie Praderas", "Carga animal", "Kg MS Concentrado / vaca",
+    "Kg MS Conservado / vaca", "Praderas y otros verdes", "Total MS",
+    "Producción promedio", "MDAT (L/vaca/día)"
+]
+
+# Reglas de negocio para colores (azul = mejor que el promedio, rojo = peor)
+HIGH_IS_GOOD = [
+    "Porcentaje de grasa", "Proteinas",
+    "Producción promedio", "Precio de la leche",
+    "MDAT", "MDAT (L/vaca/día)",
+    "MDAT 4 sem", "MDAT 52 sem"
+]
+LOW_IS_GOOD = [
+    "Costo promedio concentrado",
+    "Grms concentrado / ltr leche",
+    "Costo ración vaca",
+    "Porcentaje costo alimentos",
+    "Ranking MDAT", "Ranking 4 sem", "Ranking 52 sem"
+]
+
+CSS_GOOD = "color: #0000FF; font-weight: bold;"
+CSS_BAD = "color: #FF0000; font-weight: bold;"
+
+DEFAULT_BORDER = '2px solid #70AD47'
+
+
+def column_format(col: str) -> Optional[NumberFormat]:
+    """Formato numérico de una columna interna (None = sin formato)."""
+    if col in MONEY_COLS:
+        return PESOS
+    if col in PCT_COLS:
+        return PCT
+    if col in INT_COLS:
+        return ENTERO
+    if col in FLOAT_COLS:
+        return MILES
+    return None
+
+
+def column_direction(col: str) -> int:
+    """+1 si más alto es mejor, -1 si más bajo es mejor, 0 sin color."""
+    if col in HIGH_IS_GOOD:
+        return 1
+    if col in LOW_IS_GOOD:
+        return -1
+    return 0
+
+
+def _float_column(col: pd.Series) -> np.ndarray:
+    # La matriz llega tipada (float64 / Int64): pd.to_numeric sólo para texto
+    if not pd.api.types.is_numeric_dtype(col):
+        col = pd.to_numeric(col, errors='coerce')
+    return col.to_numpy(dtype=float, na_value=np.nan)
+
+
+def numeric_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Valores del DataFrame como matriz float (no numéricos → NaN)."""
+    return np.column_stack([
+        _float_column(df.iloc[:, j]) for j in range(df.shape[1])
+    ]) if df.shape[1] else np.empty((len(df), 0))
+
+
+def row_averages(df_total: pd.DataFrame) -> Dict[str, float]:
+    """Valores de la fila "Sumas y Promedios" por columna (NaN si no es numérico)."""
+    if df_total is None or df_total.empty:
+        return {}
+    values = numeric_matrix(df_total.iloc[[0]])[0]
+    return dict(zip(df_total.columns, values))
+
+
+def comparison_css(values: np.ndarray, averages: np.ndarray, directions: np.ndarray) -> np.ndarray:
+    """
+    Matriz de CSS (n filas × m columnas) comparando cada celda con el
+    promedio de su columna. directions: +1 / -1 / 0 por columna.
+    Celdas NaN, promedios NaN o columnas sin regla quedan sin estilo.
+    """
+    with np.errstate(invalid='ignore'):
+        diff = (values - averages) * directions
+    css = np.full(values.shape, "", dtype=object)
+    css[diff > 0] = CSS_GOOD
+    css[diff < 0] = CSS_BAD
+    return css
+
+
+def build_styler(df_mi: pd.DataFrame, internal_cols: List[str],
+                 averages: Dict[str, float], border: str = DEFAULT_BORDER) -> Styler:
+    """
+    Construye el Styler de la matriz.
+
+    Args:
+        df_mi: Matriz con columnas MultiIndex (visuales)
+        internal_cols: Nombre interno de cada columna de df_mi, en el mismo orden
+        averages: Promedios por columna interna (fila "Sumas y Promedios")
+        border: Borde de celdas y encabezados
+    """
+    styler = df_mi.style
+    # Estilos globales
+    styler.set_table_styles([
+        {'selector': 'th', 'props': [
+            ('background-color', '#E2EFDA'),
+            ('color', 'black'),
+            ('font-weight', 'bold'),
+            ('text-align', 'center'),
+            ('border', border)
+        ]},
+        {'selector': 'td', 'props': [
+            ('text-align', 'center'),
+            ('border', border)
+        ]},
+    ])
+
+    values = numeric_matrix(df_mi)
+
+    # 1. Formatos numéricos: una tabla de textos por columna, en un solo format()
+    formatters = {}
+    for j, (col, mi_tuple) in enumerate(zip(internal_cols, df_mi.columns)):
+        spec = column_format(col)
+        if spec is not None:
+            formatters[mi_tuple] = value_formatter(values[:, j], spec)
+    if formatters:
+        styler.format(formatters)
+
+    # 2. Bordes verdes en todo el cuerpo (compatibilidad Streamlit) + lógica
+    #    condicional (azul vs rojo) en una sola comparación y un solo apply
+    directions = np.array([column_direction(c) for c in internal_cols], dtype=float)
+    avg = np.array([averages.get(c, np.nan) for c in internal_cols], dtype=float)
+    border_css = f"border: {border};"
+    css = np.full(values.shape, border_css, dtype=object)
+    if directions.any():
+        colors = comparison_css(values, avg, directions)
+        colored = colors != ""
+        css[colored] = border_css + " " + colors[colored]
+    css_df = pd.DataFrame(css, index=df_mi.index, columns=df_mi.columns)
+    styler.apply(lambda _df: css_df, axis=None)
+
+    return styler
+
+
+def styled_html(styler: Styler, matrix_hash: str, sort_key=None) -> str:
+    """HTML del Styler, cacheado por (hash de la matriz, orden)."""
+    key = export_key(f"{matrix_hash}:{sort_key!r}", "styled-html")
+    return get_or_build_export(key, lambda: styler.to_html().encode('utf-8')).decode('utf-8')
@@ -0,0 +1,156 @@
+# =====================================================
+# PARTICIONES DE datos_diarios
+# =====================================================
+"""
+Administración de las particiones por fecha de datos_diarios
+(ver db/migrations/partition_datos_diarios.sql).
+
+- ensure_partitions / ensure_for_range: crean por adelantado las
+  particiones que falten (función SQL crear_particiones_datos_diarios,
+  que también rescata las filas que hayan caído en datos_diarios_default).
+- list_partitions: rango, filas estimadas y tamaño de cada partición.
+- detach_partitions: desacopla las particiones anteriores a una fecha y
+  opcionalmente las archiva (esquema aparte) o las elimina.
+
+Si datos_diarios no está particionada todas las operaciones son no-op,
+así que process_semanal puede llamar a ensure_for_range siempre.
+"""
+import re
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+from psycopg2 import sql
+
+from config import PARTITION_CONFIG
+from db_connection import execute_query, get_connection
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'datos_diarios'
+DEFAULT_PARTITION = 'datos_diarios_default'
+GRANULARITIES = ('mensual', 'anual')
+
+RE_BOUNDS = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+PARTITIONS_SQL = """
+    SELECT c.relname AS nombre,
+           pg_get_expr(c.relpartbound, c.oid) AS limites,
+           c.reltuples::bigint AS filas_estimadas,
+           pg_total_relation_size(c.oid) AS bytes
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = %s::regclass
+    ORDER BY c.relname
+"""
+
+
+def is_partitioned() -> bool:
+    """True si datos_diarios ya es una tabla particionada."""
+    row = execute_query(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+        (PARENT_TABLE,), fetch_one=True
+    )
+    return bool(row) and row['relkind'] == 'p'
+
+
+def _add_periods(fecha: date, periods: int, granularity: str) -> date:
+    if granularity == 'anual':
+        return date(fecha.year + periods, 1, 1)
+    month = fecha.month - 1 + periods
+    return date(fecha.year + month // 12, month % 12 + 1, 1)
+
+
+def ensure_for_range(desde: date, hasta: date, granularity: Optional[str] = None) -> int:
+    """
+    Crea las particiones que cubren [desde, hasta]. Devuelve cuántas creó
+    (0 si ya existían o si la tabla no está particionada).
+    """
+    granularity = granularity or PARTITION_CONFIG['granularity']
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidad inválida: {granularity} ({' | '.join(GRANULARITIES)})")
+    if not is_partitioned():
+        return 0
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT crear_particiones_datos_diarios(%s, %s, %s)",
+                        (desde, hasta, granularity))
+            creadas = cur.fetchone()[0]
+        conn.commit()
+
+    if creadas:
+        logger.info(f"Particiones de {PARENT_TABLE} creadas: {creadas} ({desde} → {hasta})")
+    return creadas
+
+
+def ensure_partitions(ahead: Optional[int] = None, desde: Optional[date] = None,
+                      granularity: Optional[str] = None) -> int:
+    """Crea las particiones desde hoy (o `desde`) hasta `ahead` períodos adelante."""
+    granularity = granularity or PARTITION_CONFIG['granularity']
+    ahead = PARTITION_CONFIG['ahead'] if ahead is None else ahead
+    desde = desde or date.today()
+    return ensure_for_range(desde, _add_periods(desde, ahead, granularity), granularity)
+
+
+def list_partitions() -> List[Dict]:
+    """Particiones de datos_diarios con su rango (desde/hasta = None para DEFAULT)."""
+    if not is_partitioned():
+        return []
+    particiones = []
+    for row in execute_query(PARTITIONS_SQL, (PARENT_TABLE,)) or []:
+        match = RE_BOUNDS.search(row['limites'])
+        particiones.append({
+            'nombre': row['nombre'],
+            'desde': date.fromisoformat(match.group(1)) if match else None,
+            'hasta': date.fromisoformat(match.group(2)) if match else None,
+            'filas_estimadas': max(row['filas_estimadas'], 0),
+            'bytes': row['bytes'],
+        })
+    return particiones
+
+
+def default_partition_rows() -> int:
+    """Filas en datos_diarios_default (deberían ser 0 si ensure_* corre a tiempo)."""
+    if not is_partitioned():
+        return 0
+    row = execute_query(f"SELECT COUNT(*) AS c FROM {DEFAULT_PARTITION}", fetch_one=True)
+    return row['c'] if row else 0
+
+
+def detach_partitions(before: date, mode: str = 'detach') -> List[str]:
+    """
+    Desacopla las particiones cuyo rango termina en o antes de `before`.
+
+    Args:
+        before: Fecha límite (exclusiva para los datos que quedan)
+        mode: 'detach' deja la tabla suelta en public, 'archive' la mueve
+              al esquema PARTITION_CONFIG['archive_schema'], 'drop' la elimina
+
+    Returns:
+        Nombres de las particiones procesadas
+    """
+    if mode not in ('detach', 'archive', 'drop'):
+        raise ValueError(f"Modo inválido: {mode} (detach | archive | drop)")
+
+    viejas = [p['nombre'] for p in list_partitions() if p['hasta'] and p['hasta'] <= before]
+    if not viejas:
+        return []
+
+    schema = PARTITION_CONFIG['archive_schema']
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if mode == 'archive':
+                cur.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(schema)))
+            for nombre in viejas:
+                cur.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                    sql.Identifier(PARENT_TABLE), sql.Identifier(nombre)))
+                if mode == 'archive':
+                    cur.execute(sql.SQL("ALTER TABLE {} SET SCHEMA {}").format(
+                        sql.Identifier(nombre), sql.Identifier(schema)))
+                elif mode == 'drop':
+                    cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(nombre)))
+        conn.commit()
+
+    logger.info(f"Particiones de {PARENT_TABLE} ({mode}): {', '.join(viejas)}")
+    return viejas
@@ -0,0 +1,205 @@
+"""
+Servicio de renderizado PDF (wkhtmltopdf) con concurrencia acotada.
+
+Cada PDF es un proceso wkhtmltopdf pesado. Para que un pico de
+exportaciones (cierre de semana) no agote la memoria del VPS:
+
+- Un pool de PDF_RENDER_CONFIG['workers'] hilos ejecuta los renders;
+  como máximo 'queue_size' pedidos más esperan en cola. Si la cola está
+  llena se rechaza con PdfRenderBusy en vez de lanzar otro proceso.
+- Cada render tiene un timeout: el proceso wkhtmltopdf se mata si lo excede.
+- El resultado se cachea por hash del HTML (cache de exportaciones), y
+  pedidos simultáneos del mismo HTML esperan un único render.
+- Se registra el tiempo de cada render (get_render_stats()).
+
+Se construye sobre pdf_config.get_pdfkit_config(); para probarlo en local
+basta con tener el binario wkhtmltopdf (ver scripts/benchmark_pdf_render.py).
+"""
+
+import time
+import hashlib
+import logging
+import threading
+import subprocess
+import statistics
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict
+
+try:
+    import pdfkit
+    PDFKIT_AVAILABLE = True
+except Exception:
+    pdfkit = None
+    PDFKIT_AVAILABLE = False
+
+from config import PDF_RENDER_CONFIG
+from pdf_config import get_pdfkit_config
+from export_cache import export_key, export_cache_get, export_cache_put
+
+logger = logging.getLogger(__name__)
+
+# Opciones usadas por la matriz semanal
+MATRIX_PDF_OPTIONS = {
+    'page-size': 'A4',
+    'orientation': 'Landscape',
+    'margin-top': '0.75in',
+    'margin-right': '0.75in',
+    'margin-bottom': '0.75in',
+    'margin-left': '0.75in',
+    'encoding': "UTF-8",
+    'no-outline': None,
+    'enable-local-file-access': None,
+}
+
+
+class PdfRenderError(Exception):
+    """Error al generar un PDF."""
+
+
+class PdfRenderBusy(PdfRenderError):
+    """La cola de renders está llena."""
+
+
+class PdfRenderTimeout(PdfRenderError):
+    """El render (o la espera en cola) superó el timeout."""
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=PDF_RENDER_CONFIG['workers'], thread_name_prefix="pdf-render"
+)
+# Renders en ejecución + en cola
+_slots = threading.BoundedSemaphore(PDF_RENDER_CONFIG['workers'] + PDF_RENDER_CONFIG['queue_size'])
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.RLock()
+
+_render_ms = deque(maxlen=500)
+_counters = {'renders': 0, 'cache_hits': 0, 'shared': 0, 'busy': 0, 'timeouts': 0, 'errors': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def html_hash(html: str, options: Optional[dict] = None) -> str:
+    """Hash del HTML + opciones de wkhtmltopdf (clave del cache)."""
+    h = hashlib.sha1(html.encode("utf-8"))
+    h.update(repr(sorted((options or {}).items())).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _run_wkhtmltopdf(html: str, options: dict, timeout: float) -> bytes:
+    """Ejecuta wkhtmltopdf leyendo el HTML por stdin; mata el proceso si excede timeout."""
+    config = get_pdfkit_config()
+    if config is None:
+        raise PdfRenderError("wkhtmltopdf no está disponible")
+
+    kit = pdfkit.PDFKit(html, 'string', options=dict(options), configuration=config)
+    args = kit.command()
+
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(
+            args,
+            input=html.encode('utf-8'),
+            capture_output=True,
+            timeout=timeout,
+            env=kit.environ,
+        )
+    except subprocess.TimeoutExpired:
+        _count('timeouts')
+        raise PdfRenderTimeout(f"wkhtmltopdf excedió {timeout:g}s")
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    # wkhtmltopdf puede terminar con código 1 por advertencias y aun así generar el PDF
+    if not result.stdout.startswith(b'%PDF'):
+        _count('errors')
+        stderr = result.stderr.decode('utf-8', errors='replace').strip()
+        raise PdfRenderError(f"wkhtmltopdf terminó con código {result.returncode}: {stderr[-500:]}")
+
+    _render_ms.append(elapsed_ms)
+    _count('renders')
+    logger.info(f"PDF renderizado en {elapsed_ms:.0f} ms ({len(result.stdout) / 1024:.0f} KB)")
+    return result.stdout
+
+
+def _render_job(key: str, html: str, options: dict, timeout: float) -> bytes:
+    pdf_bytes = _run_wkhtmltopdf(html, options, timeout)
+    export_cache_put(key, pdf_bytes)
+    return pdf_bytes
+
+
+def _release(key: str):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    _slots.release()
+
+
+def render_pdf(html: str, options: Optional[dict] = None, timeout: Optional[float] = None) -> bytes:
+    """
+    Renderiza HTML a PDF a través del pool.
+
+    Args:
+        html: Documento HTML completo
+        options: Opciones de wkhtmltopdf (por defecto MATRIX_PDF_OPTIONS)
+        timeout: Segundos máximos del render (por defecto PDF_RENDER_CONFIG['timeout'])
+
+    Returns:
+        Bytes del PDF
+
+    Raises:
+        PdfRenderBusy: si la cola está llena
+        PdfRenderTimeout: si el render o la espera en cola exceden el límite
+        PdfRenderError: si wkhtmltopdf falla o no está disponible
+    """
+    if not PDFKIT_AVAILABLE:
+        raise PdfRenderError("pdfkit no está instalado")
+
+    options = MATRIX_PDF_OPTIONS if options is None else options
+    timeout = timeout or PDF_RENDER_CONFIG['timeout']
+    key = export_key(html_hash(html, options), "pdf-html")
+
+    cached = export_cache_get(key)
+    if cached is not None:
+        _count('cache_hits')
+        return cached
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            _count('shared')
+        else:
+            if not _slots.acquire(blocking=False):
+                _count('busy')
+                raise PdfRenderBusy("Hay demasiadas exportaciones PDF en curso")
+            future = _executor.submit(_render_job, key, html, options, timeout)
+            _inflight[key] = future
+            future.add_done_callback(lambda _f, k=key: _release(k))
+
+    try:
+        return future.result(timeout=timeout + PDF_RENDER_CONFIG['queue_timeout'])
+    except FutureTimeoutError:
+        # Sólo deja de esperar: el future es compartido con las otras
+        # solicitudes del mismo HTML, y el render tiene su propio timeout
+        # (al terminar queda en caché para el próximo intento)
+        _count('timeouts')
+        raise PdfRenderTimeout("Tiempo de espera agotado en la cola de PDF")
+
+
+def get_render_stats() -> dict:
+    """Tiempos y contadores del servicio de renderizado."""
+    tiempos = list(_render_ms)
+    with _counters_lock:
+        stats = dict(_counters)
+    with _inflight_lock:
+        stats['in_progress'] = len(_inflight)
+    stats['workers'] = PDF_RENDER_CONFIG['workers']
+    stats['queue_size'] = PDF_RENDER_CONFIG['queue_size']
+    if tiempos:
+        tiempos_ordenados = sorted(tiempos)
+        stats['mean_ms'] = statistics.mean(tiempos)
+        stats['p95_ms'] = tiempos_ordenados[int(0.95 * (len(tiempos_ordenados) - 1))]
+        stats['max_ms'] = tiempos_ordenados[-1]
+    return stats
@@ -0,0 +1,204 @@
+# ============================================
+# MÓDULO DE ESTADÍSTICAS DE QUERIES
+# Log de queries lentas con captura de EXPLAIN
+# ============================================
+"""
+Registro de queries lentas para execute_query / execute_update.
+
+Las queries que superan QUERY_STATS_CONFIG['slow_query_ms'] se registran
+en el log con su SQL normalizado, huella de parámetros, filas y duración,
+y se acumulan en la tabla query_stats (ver db/migrations/create_query_stats_table.sql).
+Una fracción de las SELECT lentas se re-ejecuta con EXPLAIN (ANALYZE, BUFFERS)
+para guardar el plan real. No requiere ningún APM externo.
+"""
+import re
+import json
+import random
+import hashlib
+import logging
+from typing import Optional, Any, List, Dict
+
+from config import QUERY_STATS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Expresiones para normalizar SQL (agrupar queries iguales con distintos literales)
+_RE_LINE_COMMENT = re.compile(r"--[^\n]*")
+_RE_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_RE_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_SPACES = re.compile(r"\s+")
+
+# Solo se re-ejecutan con EXPLAIN ANALYZE las lecturas puras
+_RE_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_RE_WRITE = re.compile(r"\b(INSERT|UPDATE|DELETE|RETURNING|CREATE|ALTER|DROP|TRUNCATE)\b", re.IGNORECASE)
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normaliza un SQL para agrupar ejecuciones de la misma sentencia:
+    quita comentarios, reemplaza literales y placeholders por '?',
+    colapsa listas IN (?, ?, ?) y espacios.
+    """
+    if not query:
+        return ""
+    txt = _RE_BLOCK_COMMENT.sub(" ", query)
+    txt = _RE_LINE_COMMENT.sub(" ", txt)
+    txt = _RE_STRING.sub("?", txt)
+    txt = _RE_PLACEHOLDER.sub("?", txt)
+    txt = _RE_NUMBER.sub("?", txt)
+    txt = _RE_IN_LIST.sub("(?...)", txt)
+    txt = _RE_SPACES.sub(" ", txt)
+    return txt.strip()
+
+
+def query_hash(normalized: str) -> str:
+    """Identificador estable de una sentencia normalizada."""
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()
+
+
+def params_fingerprint(params: Optional[Any]) -> Optional[str]:
+    """
+    Huella corta de los parámetros (no guarda los valores, que pueden
+    contener usernames u otros datos sensibles).
+    """
+    if not params:
+        return None
+    data = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:12]
+
+
+def is_slow(elapsed_ms: float) -> bool:
+    """Indica si una duración supera el umbral configurado."""
+    if not QUERY_STATS_CONFIG['enabled']:
+        return False
+    return elapsed_ms >= QUERY_STATS_CONFIG['slow_query_ms']
+
+
+def should_explain(query: str) -> bool:
+    """Decide (muestreado) si se captura EXPLAIN ANALYZE de una query lenta."""
+    rate = QUERY_STATS_CONFIG['explain_sample_rate']
+    if rate <= 0:
+        return False
+    if not _RE_READ_ONLY.match(query) or _RE_WRITE.search(query):
+        return False
+    return random.random() < rate
+
+
+def explain_analyze(conn, query: str, params: Optional[tuple]) -> Optional[str]:
+    """
+    Re-ejecuta la query con EXPLAIN (ANALYZE, BUFFERS) en la misma conexión
+    (mismo contexto RLS) y devuelve el plan como texto.
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params or ())
+            return "\n".join(row[0] for row in cursor.fetchall())
+    except Exception as e:
+        logger.debug(f"No se pudo capturar EXPLAIN: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return None
+
+
+def record_slow_query(
+    conn,
+    query: str,
+    params: Optional[tuple],
+    elapsed_ms: float,
+    row_count: int,
+    plan: Optional[str] = None
+):
+    """
+    Registra una query lenta en el log y la acumula en query_stats.
+
+    Args:
+        conn: Conexión dedicada para escribir la estadística (se hace commit)
+        query: SQL original
+        params: Parámetros del query
+        elapsed_ms: Duración en milisegundos
+        row_count: Filas devueltas o afectadas
+        plan: Plan de EXPLAIN ANALYZE (opcional)
+    """
+    normalized = normalize_sql(query)
+    qhash = query_hash(normalized)
+    fingerprint = params_fingerprint(params)
+
+    logger.warning(
+        f"Query lenta ({elapsed_ms:.1f} ms, {row_count} filas, params={fingerprint}): "
+        f"{normalized[:300]}"
+    )
+
+    if conn is None or not QUERY_STATS_CONFIG['persist']:
+        return
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO query_stats (
+                    query_hash, query_text, llamadas, total_ms, max_ms, filas,
+                    params_fingerprint, plan, plan_at
+                )
+                VALUES (%s, %s, 1, %s, %s, %s, %s, %s,
+                        CASE WHEN %s IS NULL THEN NULL ELSE CURRENT_TIMESTAMP END)
+                ON CONFLICT (query_hash) DO UPDATE SET
+                    llamadas = query_stats.llamadas + 1,
+                    total_ms = query_stats.total_ms + EXCLUDED.total_ms,
+                    max_ms = GREATEST(query_stats.max_ms, EXCLUDED.max_ms),
+                    filas = query_stats.filas + EXCLUDED.filas,
+                    params_fingerprint = EXCLUDED.params_fingerprint,
+                    plan = COALESCE(EXCLUDED.plan, query_stats.plan),
+                    plan_at = COALESCE(EXCLUDED.plan_at, query_stats.plan_at),
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (qhash, normalized, elapsed_ms, elapsed_ms, max(row_count, 0),
+                 fingerprint, plan, plan)
+            )
+            conn.commit()
+    except Exception as e:
+        # Nunca romper la query original por culpa de las estadísticas
+        logger.debug(f"No se pudo guardar query_stats: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+
+def get_top_statements(limit: int = 50) -> List[Dict[str, Any]]:
+    """Devuelve las sentencias lentas ordenadas por tiempo total acumulado."""
+    from db_connection import execute_query
+
+    return execute_query(
+        """
+        SELECT query_hash, query_text, llamadas, total_ms,
+               total_ms / NULLIF(llamadas, 0) AS media_ms, max_ms, filas,
+               params_fingerprint, plan IS NOT NULL AS tiene_plan, updated_at
+        FROM query_stats
+        ORDER BY total_ms DESC
+        LIMIT %s
+        """,
+        (limit,)
+    ) or []
+
+
+def get_statement_plan(qhash: str) -> Optional[Dict[str, Any]]:
+    """Devuelve el último plan EXPLAIN capturado para una sentencia."""
+    from db_connection import execute_query
+
+    return execute_query(
+        "SELECT query_text, plan, plan_at FROM query_stats WHERE query_hash = %s",
+        (qhash,),
+        fetch_one=True
+    )
+
+
+def reset_stats() -> int:
+    """Elimina todas las estadísticas acumuladas."""
+    from db_connection import execute_update
+
+    return execute_update("DELETE FROM query_stats")
@@ -3,11 +3,16 @@ Módulo de gestión de temas - Integra SpA
 Aplica estilos visuales profesionales compatibles con el tema nativo de Streamlit.
 NO sobrescribe el tema - deja que Streamlit Settings maneje dark/light mode.
 """
+import time
+import threading
+from functools import lru_cache
+
 import streamlit as st
 from typing import Optional, Dict, Any
 
 from db_connection import execute_query, execute_update
 from config_manager import get_config, set_config
+from config import CONFIG_CACHE_CONFIG
 
 
 # ============================================
@@ -20,19 +25,60 @@ ACCENT_HOVER = '#00B548'
 # ============================================
 # CONFIGURACIÓN DE EMPRESA
 # ============================================
+EMPRESA_THEME_SQL = "SELECT color_primario, logo_url FROM empresas WHERE id = %s"
+
+
+def theme_config_from_row(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convierte la fila de empresas en el dict de configuración de tema."""
+    if result:
+        return {
+            'color_primario': result.get('color_primario'),
+            'logo_url': result.get('logo_url')
+        }
+    return {'color_primario': None, 'logo_url': None}
+
+
+# Cache por empresa: empresa_id → (config, instante de carga).
+# Se invalida al editar la empresa; el TTL cubre ediciones hechas
+# desde otro proceso (admin panel).
+_theme_cache: Dict[int, tuple] = {}
+_theme_cache_lock = threading.Lock()
+
+
+def get_cached_theme_config(empresa_id: int) -> Optional[Dict[str, Any]]:
+    """Devuelve la config de tema cacheada (o None si no está o expiró)."""
+    with _theme_cache_lock:
+        entry = _theme_cache.get(empresa_id)
+    if entry and time.monotonic() - entry[1] < CONFIG_CACHE_CONFIG['theme_ttl_seconds']:
+        return dict(entry[0])
+    return None
+
+
+def cache_theme_config(empresa_id: int, config: Dict[str, Any]):
+    """Guarda la config de tema de una empresa en el cache."""
+    with _theme_cache_lock:
+        _theme_cache[empresa_id] = (dict(config), time.monotonic())
+
+
+def invalidate_theme_cache(empresa_id: Optional[int] = None):
+    """Invalida el tema cacheado de una empresa (o de todas)."""
+    with _theme_cache_lock:
+        if empresa_id is None:
+            _theme_cache.clear()
+        else:
+            _theme_cache.pop(empresa_id, None)
+
+
 def get_empresa_theme_config(empresa_id: int) -> Dict[str, Any]:
     """Obtiene la configuración de tema de una empresa."""
+    config = get_cached_theme_config(empresa_id)
+    if config is not None:
+        return config
     try:
-        result = execute_query(
-            "SELECT color_primario, logo_url FROM empresas WHERE id = %s",
-            (empresa_id,),
-            fetch_one=True
-        )
-        if result:
-            return {
-                'color_primario': result.get('color_primario'),
-                'logo_url': result.get('logo_url')
-            }
+        result = execute_query(EMPRESA_THEME_SQL, (empresa_id,), fetch_one=True)
+        config = theme_config_from_row(result)
+        cache_theme_config(empresa_id, config)
+        return config
     except Exception:
         pass
     return {'color_primario': None, 'logo_url': None}
@@ -49,6 +95,7 @@ def set_empresa_theme_config(empresa_id: int, color_primario: str = None, logo_u
             """,
             (color_primario, logo_url, empresa_id)
         )
+        invalidate_theme_cache(empresa_id)
         return True
     except Exception as e:
         print(f"Error actualizando tema de empresa: {e}")
@@ -73,11 +120,14 @@ def get_current_user_empresa_config() -> Dict[str, Any]:
 # ============================================
 # CSS VISUAL POLISH (Compatible con tema nativo)
 # ============================================
+@lru_cache(maxsize=64)
 def generate_visual_polish_css(empresa_color: str = None) -> str:
     """
     Genera CSS que mejora la apariencia visual SIN sobrescribir
     los colores del tema nativo de Streamlit.
     Solo agrega: transiciones, bordes redondeados, efectos hover, etc.
+    
+    El resultado depende sólo del color, así que se memoiza por color.
     """
     accent = empresa_color if empresa_color else ACCENT_COLOR
     
@@ -266,19 +316,25 @@ def generate_visual_polish_css(empresa_color: str = None) -> str:
 # ============================================
 # COMPONENTES DE UI
 # ============================================
-def apply_visual_polish():
+def apply_visual_polish(empresa_config: Optional[Dict[str, Any]] = None):
     """
     Aplica estilos visuales profesionales.
     Compatible con el tema nativo de Streamlit (Settings → Theme).
+    
+    Args:
+        empresa_config: Config de tema ya cargada (ej. por async_db.load_page_data).
+                        Si es None se consulta a la base de datos.
     """
-    empresa_config = get_current_user_empresa_config()
+    if empresa_config is None:
+        empresa_config = get_current_user_empresa_config()
     css = generate_visual_polish_css(empresa_color=empresa_config.get('color_primario'))
     st.markdown(css, unsafe_allow_html=True)
 
 
-def render_company_logo():
+def render_company_logo(empresa_config: Optional[Dict[str, Any]] = None):
     """Renderiza el logo de la empresa si está configurado."""
-    empresa_config = get_current_user_empresa_config()
+    if empresa_config is None:
+        empresa_config = get_current_user_empresa_config()
     logo_url = empresa_config.get('logo_url')
     
     if logo_url:
@@ -0,0 +1,31 @@
+"""Completa datos_historicos.establecimiento_id a partir del nombre.
+
+Correr después de db/migrations/historico_establecimiento_id.sql (y cada
+vez que se creen establecimientos que ya figuraban en el histórico).
+Resuelve con historico_processor.resolve_establecimiento_ids: nombre
+exacto y, si no, etl.normalize_est_name.
+
+Uso:
+    python scripts/backfill_historico.py
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+from historico_processor import backfill_establecimiento_ids
+
+
+def main():
+    resultado = backfill_establecimiento_ids()
+    print(f"Filas actualizadas: {resultado['filas_actualizadas']}")
+    if resultado['sin_resolver']:
+        print(f"\nNombres sin establecimiento ({len(resultado['sin_resolver'])}):")
+        for nombre in resultado['sin_resolver']:
+            print(f"  - {nombre}")
+        print("\nCrear el establecimiento o corregir el nombre y volver a ejecutar.")
+
+
+if __name__ == '__main__':
+    main()
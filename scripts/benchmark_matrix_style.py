@@ -0,0 +1,166 @@
+"""Compara el Styler de la matriz semanal: implementación por celda vs vectorizada.
+
+Genera una matriz sintética (300 establecimientos × 26 columnas por defecto),
+aplica los formatos y colores condicionales con ambas implementaciones,
+verifica que el HTML resultante sea idéntico y mide el tiempo de render.
+También compara el formateo de columnas completas (Series.apply vs
+format_utils.format_numbers_spanish).
+
+Uso:
+    python scripts/benchmark_matrix_style.py [filas] [repeticiones]
+"""
+import os
+import sys
+import time
+import statistics
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+from format_utils import (
+    fmt_miles, fmt_pesos, fmt_pct, format_numbers_spanish, MILES, PESOS, PCT
+)
+from matrix_style import (
+    MONEY_COLS, PCT_COLS, INT_COLS, FLOAT_COLS, HIGH_IS_GOOD, LOW_IS_GOOD,
+    build_styler, row_averages, DEFAULT_BORDER
+)
+
+COLUMNS = [
+    "Superficie Praderas", "Vacas masa", "Vacas en ordeña", "Carga animal",
+    "Porcentaje de grasa", "Proteinas", "Costo promedio concentrado",
+    "Grms concentrado / ltr leche", "Kg MS Concentrado / vaca", "Kg MS Conservado / vaca",
+    "Praderas y otros verdes", "Total MS", "Producción promedio", "Costo ración vaca",
+    "Precio de la leche", "MDAT (L/vaca/día)", "Porcentaje costo alimentos", "MDAT",
+    "Ranking MDAT", "MDAT 4 sem", "Vacas 4 sem", "Ranking 4 sem",
+    "MDAT 52 sem", "Vacas 52 sem", "Ranking 52 sem",
+]
+
+
+def synthetic_matrix(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {"Establecimiento": [f"Establecimiento {i:03d}" for i in range(rows)]}
+    for col in COLUMNS:
+        if col in INT_COLS:
+            values = rng.integers(1, 900, rows).astype(float)
+        elif col in MONEY_COLS:
+            values = rng.uniform(100, 9000, rows).round(2)
+        else:
+            values = rng.uniform(0, 60, rows).round(2)
+        values[rng.random(rows) < 0.03] = np.nan
+        data[col] = values
+    body = pd.DataFrame(data)
+    total = body[COLUMNS].mean().to_frame().T
+    total.insert(0, "Establecimiento", "Sumas y Promedios")
+    return pd.concat([body, total], ignore_index=True)
+
+
+def legacy_styler(df_mi, internal_cols, avg_values):
+    """Implementación anterior: formato y color por celda con closures."""
+    styler = df_mi.style
+    styler.set_table_styles([
+        {'selector': 'th', 'props': [
+            ('background-color', '#E2EFDA'), ('color', 'black'), ('font-weight', 'bold'),
+            ('text-align', 'center'), ('border', DEFAULT_BORDER)
+        ]},
+        {'selector': 'td', 'props': [('text-align', 'center'), ('border', DEFAULT_BORDER)]},
+    ])
+    styler.set_properties(**{'border': DEFAULT_BORDER})
+
+    def safe_fmt_int(x):
+        return f"{int(x)}" if pd.notna(x) else ""
+
+    for internal_col, mi_tuple in zip(internal_cols, df_mi.columns):
+        if internal_col in MONEY_COLS:
+            styler.format(fmt_pesos, subset=[mi_tuple])
+        elif internal_col in PCT_COLS:
+            styler.format(fmt_pct, subset=[mi_tuple])
+        elif internal_col in INT_COLS:
+            styler.format(safe_fmt_int, subset=[mi_tuple])
+        elif internal_col in FLOAT_COLS:
+            styler.format(fmt_miles, subset=[mi_tuple])
+
+        if internal_col in HIGH_IS_GOOD or internal_col in LOW_IS_GOOD:
+            def color_logic(s, col_name=internal_col):
+                avg = avg_values.get(col_name, np.nan)
+                if pd.isna(avg):
+                    return ["" for _ in s]
+                styles = []
+                is_high = col_name in HIGH_IS_GOOD
+                for val in s:
+                    try:
+                        v = float(val)
+                        if pd.isna(v):
+                            styles.append("")
+                            continue
+                        c = ""
+                        if is_high:
+                            if v > avg: c = "#0000FF"
+                            elif v < avg: c = "#FF0000"
+                        else:
+                            if v < avg: c = "#0000FF"
+                            elif v > avg: c = "#FF0000"
+                        styles.append(f"color: {c}; font-weight: bold;" if c else "")
+                    except Exception:
+                        styles.append("")
+                return styles
+            styler.apply(color_logic, subset=[mi_tuple], axis=0)
+    return styler
+
+
+def _time(fn, reps):
+    tiempos = []
+    for _ in range(reps):
+        start = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - start) * 1000)
+    return tiempos
+
+
+def main(rows: int = 300, reps: int = 5):
+    df_full = synthetic_matrix(rows)
+    internal_cols = ["Establecimiento"] + COLUMNS
+    df_mi = df_full.copy()
+    df_mi.columns = pd.MultiIndex.from_tuples([("", c) for c in internal_cols])
+    avg = row_averages(df_full.iloc[[-1]])
+
+    def render_legacy():
+        return legacy_styler(df_mi, internal_cols, avg).set_uuid("bench").to_html()
+
+    def render_vector():
+        return build_styler(df_mi, internal_cols, avg).set_uuid("bench").to_html()
+
+    same = render_legacy() == render_vector()
+    print(f"Matriz {df_mi.shape[0]} filas × {df_mi.shape[1]} columnas · {reps} repeticiones")
+    print(f"HTML idéntico: {'sí' if same else 'NO'}\n")
+
+    for label, fn in (("Por celda (anterior)", render_legacy), ("Vectorizado", render_vector)):
+        t = _time(fn, reps)
+        print(f"  {label:<22} mediana={statistics.median(t):8.1f} ms  min={min(t):8.1f} ms")
+
+    # Sólo la parte de estilos (sin to_html): _compute aplica formatos y colores
+    print("\nSólo formatos + colores (Styler._compute):")
+    for label, builder in (("Por celda (anterior)", legacy_styler), ("Vectorizado", build_styler)):
+        t = _time(lambda: builder(df_mi, internal_cols, avg)._compute(), reps)
+        print(f"  {label:<22} mediana={statistics.median(t):8.1f} ms  min={min(t):8.1f} ms")
+
+    # Formateo de columnas completas (todas las celdas numéricas de la matriz)
+    values = df_full[COLUMNS].to_numpy(dtype=float).ravel()
+    serie = pd.Series(values)
+    print(f"\nFormato español de {values.size} celdas:")
+    for spec, fmt in ((MILES, fmt_miles), (PESOS, fmt_pesos), (PCT, fmt_pct)):
+        same = (format_numbers_spanish(values, spec).tolist() == serie.apply(fmt).tolist())
+        t_apply = _time(lambda: serie.apply(fmt), reps)
+        t_col = _time(lambda: format_numbers_spanish(values, spec), reps)
+        print(f"  {fmt.__name__:<10} idéntico={'sí' if same else 'NO'}  "
+              f"Series.apply={statistics.median(t_apply):7.1f} ms  "
+              f"columnar={statistics.median(t_col):7.1f} ms")
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 300,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
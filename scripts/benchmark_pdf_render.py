@@ -0,0 +1,75 @@
+"""Prueba local del servicio de renderizado PDF (modules/pdf_renderer.py).
+
+Lanza varios pedidos concurrentes de PDF con una matriz de ejemplo y
+muestra cuántos se renderizaron, cuántos salieron del cache o se
+rechazaron por cola llena, y los tiempos por render.
+Requiere el binario wkhtmltopdf (o WKHTMLTOPDF_PATH en el entorno).
+
+Uso:
+    python scripts/benchmark_pdf_render.py [usuarios] [matrices_distintas]
+"""
+import os
+import sys
+import time
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+from pdf_config import get_wkhtmltopdf_path, get_wkhtmltopdf_version
+from pdf_renderer import render_pdf, get_render_stats, PdfRenderError
+
+
+def sample_html(variant: int, rows: int = 40, cols: int = 26) -> str:
+    header = "".join(f"<th>Col {c}</th>" for c in range(cols))
+    body = "".join(
+        "<tr>" + "".join(f"<td>{(r * cols + c + variant) * 1.5:,.2f}</td>" for c in range(cols)) + "</tr>"
+        for r in range(rows)
+    )
+    return (
+        "<html><head><meta charset='utf-8'/></head><body>"
+        f"<h3>Matriz de prueba {variant}</h3>"
+        f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"
+        "</body></html>"
+    )
+
+
+def main(usuarios: int = 10, distintas: int = 3):
+    path = get_wkhtmltopdf_path()
+    if not path:
+        print("wkhtmltopdf no encontrado (instálalo o define WKHTMLTOPDF_PATH).")
+        return
+    print(f"wkhtmltopdf: {path} ({get_wkhtmltopdf_version()})")
+    print(f"{usuarios} pedidos concurrentes, {distintas} matrices distintas\n")
+
+    resultados = []
+
+    def pedido(i):
+        try:
+            start = time.perf_counter()
+            pdf = render_pdf(sample_html(i % distintas))
+            resultados.append(("ok", (time.perf_counter() - start) * 1000, len(pdf)))
+        except PdfRenderError as e:
+            resultados.append((type(e).__name__, 0, 0))
+
+    start = time.perf_counter()
+    hilos = [threading.Thread(target=pedido, args=(i,)) for i in range(usuarios)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total = (time.perf_counter() - start) * 1000
+
+    for estado in sorted({r[0] for r in resultados}):
+        print(f"  {estado:<18} {sum(1 for r in resultados if r[0] == estado)}")
+    print(f"\nTiempo total: {total:.0f} ms")
+    print("Estadísticas del servicio:")
+    for k, v in get_render_stats().items():
+        print(f"  {k:<12} {v:.1f}" if isinstance(v, float) else f"  {k:<12} {v}")
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
@@ -0,0 +1,90 @@
+"""Mide el costo de planificación de load_week_from_db con y sin PREPARE.
+
+Compara:
+  - Planning Time reportado por EXPLAIN (ANALYZE) para el SQL plano
+    vs. EXPLAIN (ANALYZE) EXECUTE de la sentencia preparada.
+  - Tiempo de pared de execute_query vs execute_prepared.
+
+Uso:
+    python scripts/benchmark_prepared.py [repeticiones]
+"""
+import os
+import re
+import sys
+import time
+import statistics
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+from db_connection import (
+    get_connection, execute_query, execute_prepared, HOT_STATEMENTS, _to_prepare_sql
+)
+from etl import load_week_from_db, WEEK_MAX_SQL
+
+RE_PLANNING = re.compile(r"Planning Time: ([\d.]+) ms")
+RE_EXECUTION = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+def _explain_times(cursor, sql, params=None):
+    cursor.execute("EXPLAIN (ANALYZE, SUMMARY) " + sql, params)
+    plan = "\n".join(r[0] for r in cursor.fetchall())
+    planning = float(RE_PLANNING.search(plan).group(1))
+    execution = float(RE_EXECUTION.search(plan).group(1))
+    return planning, execution
+
+
+def _summary(label, values):
+    print(f"  {label:<28} media={statistics.mean(values):8.3f} ms  "
+          f"mediana={statistics.median(values):8.3f} ms  min={min(values):8.3f} ms")
+
+
+def main(reps: int = 20):
+    # Registra las sentencias y obtiene la semana más reciente
+    df = load_week_from_db(user_id=None, is_admin=True)
+    if df.empty:
+        print("No hay datos en datos_semanales; nada que medir.")
+        return
+    row = execute_query(WEEK_MAX_SQL, fetch_one=True)
+    params = tuple([row['semana'], row['anio']] * 18)
+    sql = HOT_STATEMENTS["etl_week_unpivot"]
+    print(f"Semana {row['semana']}/{row['anio']} · {len(df)} filas · {reps} repeticiones\n")
+
+    # 1) Planning time según EXPLAIN
+    plain_plan, prep_plan = [], []
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            for _ in range(reps):
+                p, _e = _explain_times(cur, sql, params)
+                plain_plan.append(p)
+
+            cur.execute("PREPARE bench_week AS " + _to_prepare_sql(sql))
+            placeholders = ", ".join(["%s"] * len(params))
+            for _ in range(reps):
+                p, _e = _explain_times(cur, f"EXECUTE bench_week ({placeholders})", params)
+                prep_plan.append(p)
+            cur.execute("DEALLOCATE bench_week")
+        conn.rollback()
+
+    print("Planning Time (EXPLAIN ANALYZE):")
+    _summary("SQL plano", plain_plan)
+    _summary("EXECUTE preparado", prep_plan)
+
+    # 2) Tiempo de pared por llamada
+    plain_wall, prep_wall = [], []
+    for _ in range(reps):
+        start = time.perf_counter()
+        execute_query(sql, params, is_admin=True)
+        plain_wall.append((time.perf_counter() - start) * 1000)
+    for _ in range(reps):
+        start = time.perf_counter()
+        execute_prepared("etl_week_unpivot", params, is_admin=True)
+        prep_wall.append((time.perf_counter() - start) * 1000)
+
+    print("\nTiempo total por llamada:")
+    _summary("execute_query", plain_wall)
+    _summary("execute_prepared", prep_wall)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
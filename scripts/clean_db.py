@@ -12,6 +12,7 @@ Uso:
 
 TABLES_TO_TRUNCATE = [
     'datos_diarios',
+    'datos_diarios_semana',
     'datos_semanales',
     'historico_mdat'
 ]
@@ -25,7 +26,10 @@ def truncate_tables():
             execute_update(f"TRUNCATE TABLE {tbl} RESTART IDENTITY CASCADE")
             print(f"OK: {tbl} truncada")
         except Exception as e:
-            print(f"ERROR truncando {tbl}: {e}")
+            if 'does not exist' in str(e) or 'no existe' in str(e):
+                print(f"(skip) Tabla {tbl} no existe")
+            else:
+                print(f"ERROR truncando {tbl}: {e}")
     # logs si existe
     try:
         execute_update(f"TRUNCATE TABLE {LOG_TABLE} RESTART IDENTITY CASCADE")
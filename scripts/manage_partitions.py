@@ -0,0 +1,74 @@
+"""Administra las particiones por fecha de datos_diarios.
+
+Requiere haber aplicado db/migrations/partition_datos_diarios.sql.
+
+Uso:
+    python scripts/manage_partitions.py list
+    python scripts/manage_partitions.py ensure [--ahead 3] [--desde 2025-01-01]
+    python scripts/manage_partitions.py detach --before 2023-01-01 [--archive | --drop]
+
+Pensado para correr mensualmente por cron (ver scripts/crontab.txt).
+"""
+import os
+import sys
+import argparse
+from datetime import date
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+import partition_manager
+from config import PARTITION_CONFIG
+
+
+def _cmd_list(args):
+    particiones = partition_manager.list_partitions()
+    if not particiones:
+        print("datos_diarios no está particionada (o no tiene particiones)")
+        return
+    print(f"{'Partición':<28}{'Desde':>12}{'Hasta':>12}{'Filas':>12}{'Tamaño':>12}")
+    for p in particiones:
+        print(f"{p['nombre']:<28}{str(p['desde'] or 'DEFAULT'):>12}{str(p['hasta'] or ''):>12}"
+              f"{p['filas_estimadas']:>12,}{p['bytes'] / 1024 / 1024:>10.1f}MB")
+    default_rows = partition_manager.default_partition_rows()
+    if default_rows:
+        print(f"\nAtención: {default_rows} filas en {partition_manager.DEFAULT_PARTITION}; "
+              "ejecuta 'ensure --desde <fecha>' para moverlas a su partición.")
+
+
+def _cmd_ensure(args):
+    desde = date.fromisoformat(args.desde) if args.desde else None
+    creadas = partition_manager.ensure_partitions(ahead=args.ahead, desde=desde)
+    print(f"Particiones creadas: {creadas}")
+
+
+def _cmd_detach(args):
+    mode = 'archive' if args.archive else 'drop' if args.drop else 'detach'
+    procesadas = partition_manager.detach_partitions(date.fromisoformat(args.before), mode=mode)
+    print(f"Particiones procesadas ({mode}): {', '.join(procesadas) or 'ninguna'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiones de datos_diarios")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("list", help="Lista las particiones")
+
+    p_ensure = sub.add_parser("ensure", help="Crea las particiones que falten")
+    p_ensure.add_argument("--ahead", type=int, default=PARTITION_CONFIG['ahead'],
+                          help="Períodos futuros a crear")
+    p_ensure.add_argument("--desde", help="Fecha inicial (YYYY-MM-DD, por defecto hoy)")
+
+    p_detach = sub.add_parser("detach", help="Desacopla particiones antiguas")
+    p_detach.add_argument("--before", required=True, help="Particiones que terminan en o antes de YYYY-MM-DD")
+    grupo = p_detach.add_mutually_exclusive_group()
+    grupo.add_argument("--archive", action="store_true",
+                       help=f"Mover al esquema '{PARTITION_CONFIG['archive_schema']}'")
+    grupo.add_argument("--drop", action="store_true", help="Eliminar las particiones")
+
+    args = parser.parse_args()
+    {'list': _cmd_list, 'ensure': _cmd_ensure, 'detach': _cmd_detach}[args.cmd](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Verifica que las consultas calientes de etl.py usen índices.
+
+Corre EXPLAIN (FORMAT JSON) de las lecturas de Detalle diario y semanal
+con parámetros reales (última semana, un establecimiento con datos y
+los últimos 7 días) y revisa cada scan sobre datos_diarios (o sus
+particiones) y datos_semanales: pasa con Index Only Scan, Index Scan o
+Bitmap Heap Scan; falla con Seq Scan.
+
+Las lecturas completas (HISTORIC_SQL, Detalle de todos los
+establecimientos sin fechas) no se verifican: leen la tabla entera.
+En tablas o particiones chicas (p. ej. las futuras, aún vacías) el
+planificador elige Seq Scan con razón; se informa como aviso, no como
+falla.
+
+Índices esperados: db/migrations/index_hot_paths.sql
+
+Uso:
+    python scripts/verify_index_plans.py
+    python scripts/verify_index_plans.py --user-id 3    # plan con RLS de ese usuario
+Sale con código 1 si alguna consulta no usa índice.
+"""
+import os
+import sys
+import argparse
+from collections import Counter
+from datetime import timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'modules'))
+
+from db_connection import get_connection, execute_query
+from etl import (
+    WEEK_MAX_SQL, WEEK_UNPIVOT_SQL, DAILY_FECHAS_SQL, DAILY_DETAIL_SQL,
+    week_params, daily_filters,
+)
+
+TABLES = ('datos_diarios', 'datos_semanales')
+INDEX_SCANS = ('Index Only Scan', 'Index Scan', 'Bitmap Heap Scan')
+SMALL_TABLE_ROWS = 10000
+
+
+def _scans(plan: dict) -> list:
+    """(tabla, tipo de nodo, índice) de los scans sobre TABLES."""
+    found = []
+    relation = plan.get('Relation Name', '')
+    if relation.startswith(TABLES):
+        found.append((relation, plan['Node Type'], plan.get('Index Name')))
+    for child in plan.get('Plans', []):
+        found.extend(_scans(child))
+    return found
+
+
+def _table_rows() -> dict:
+    """Filas estimadas de TABLES y de cada partición (las vacías quedan en 0)."""
+    rows = execute_query("""
+        SELECT relname, reltuples::bigint AS filas
+        FROM pg_class
+        WHERE relkind IN ('r', 'p')
+          AND relname ~ '^datos_(diarios|semanales)'
+    """, is_admin=True, fetch_all=True) or []
+    return {r['relname']: max(r['filas'], 0) for r in rows}
+
+
+def hot_queries() -> list:
+    """(nombre, sql, params) con parámetros tomados de los datos cargados."""
+    queries = [("semana más reciente", WEEK_MAX_SQL, None)]
+
+    semana = execute_query(WEEK_MAX_SQL, is_admin=True, fetch_one=True)
+    if semana:
+        queries.append(("unpivot semanal", WEEK_UNPIVOT_SQL, week_params(semana['semana'], semana['anio'])))
+
+    muestra = execute_query("""
+        SELECT est.nombre, MAX(dd.fecha) AS hasta
+        FROM datos_diarios dd
+        JOIN establecimientos est ON dd.establecimiento_id = est.id
+        WHERE dd.fecha = (SELECT MAX(fecha) FROM datos_diarios)
+        GROUP BY est.nombre
+        ORDER BY est.nombre
+        LIMIT 1
+    """, is_admin=True, fetch_one=True)
+    if muestra:
+        hasta = muestra['hasta']
+        desde = hasta - timedelta(days=6)
+        for nombre, filtros in (
+            ("un establecimiento", {'establecimiento': muestra['nombre']}),
+            ("últimos 7 días", {'fecha_desde': desde, 'fecha_hasta': hasta}),
+            ("establecimiento + 7 días", {'establecimiento': muestra['nombre'],
+                                          'fecha_desde': desde, 'fecha_hasta': hasta}),
+        ):
+            where_clause, params = daily_filters(**filtros)
+            queries.append((f"fechas diarias ({nombre})",
+                            DAILY_FECHAS_SQL.format(where_clause=where_clause), params))
+            queries.append((f"detalle diario ({nombre})",
+                            DAILY_DETAIL_SQL.format(where_clause=where_clause), params))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica el uso de índices de las consultas de etl.py")
+    parser.add_argument("--user-id", type=int, help="Usuario para el contexto RLS (por defecto admin)")
+    args = parser.parse_args()
+
+    filas = _table_rows()
+    print("Filas estimadas: " + ", ".join(f"{t}={filas.get(t, 0):,}" for t in TABLES) + "\n")
+
+    fallas = 0
+    is_admin = args.user_id is None
+    with get_connection(user_id=args.user_id, is_admin=is_admin) as conn:
+        with conn.cursor() as cur:
+            for nombre, sql, params in hot_queries():
+                cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                scans = _scans(cur.fetchone()[0][0]['Plan'])
+                # El unpivot repite el mismo scan por cada UNION: uno por línea
+                for (tabla, nodo, indice), veces in Counter(scans).items():
+                    if nodo in INDEX_SCANS:
+                        estado = "OK"
+                    elif filas.get(tabla, 0) < SMALL_TABLE_ROWS:
+                        estado = "AVISO (tabla chica)"
+                    else:
+                        estado = "FALLA"
+                        fallas += veces
+                    print(f"  {estado:<20} {nombre:<42} {tabla:<24} {nodo}"
+                          f"{f' ({indice})' if indice else ''}{f' x{veces}' if veces > 1 else ''}")
+                if not scans:
+                    print(f"  {'-':<20} {nombre:<42} (sin scans sobre {', '.join(TABLES)})")
+        conn.rollback()
+
+    if fallas:
+        print(f"\n{fallas} scan(s) sin índice. Revisar db/migrations/index_hot_paths.sql y ANALYZE.")
+        sys.exit(1)
+    print("\nTodas las consultas calientes usan índice.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos se importan por nombre (como en la app y los benchmarks)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modules'))
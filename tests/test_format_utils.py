@@ -0,0 +1,41 @@
+"""format_numbers_spanish debe dar el mismo texto que fmt_miles / fmt_pesos / fmt_pct."""
+import random
+
+import numpy as np
+import pytest
+
+from format_utils import MILES, PESOS, PCT, format_numbers_spanish, fmt_miles, fmt_pesos, fmt_pct
+
+CASOS = [
+    (MILES, fmt_miles),
+    (PESOS, fmt_pesos),
+    (PCT, fmt_pct),
+]
+
+BORDES = [
+    0.0, -0.0, 0.004, 0.005, -0.005, 0.015, 0.125, 1.005, 2.675, 999.995, 999.999, 1000.0,
+    -1234.5, 1234.567, 999999.995, 1e6, -1e9, 123456789.123, 4.5e13, 1e16, 1e20, -1e300,
+    0.1 + 0.2, 1 / 3, np.nan,
+]
+
+
+@pytest.mark.parametrize("spec, escalar", CASOS)
+def test_bordes(spec, escalar):
+    obtenido = format_numbers_spanish(BORDES, spec)
+    assert list(obtenido) == [escalar(x) for x in BORDES]
+
+
+@pytest.mark.parametrize("spec, escalar", CASOS)
+@pytest.mark.parametrize("seed", range(5))
+def test_aleatorios(spec, escalar, seed):
+    rng = random.Random(seed)
+    values = [rng.choice([-1, 1]) * round(rng.uniform(0, 10 ** rng.randint(0, 12)), rng.randint(0, 4))
+              for _ in range(2000)]
+    obtenido = format_numbers_spanish(values, spec)
+    assert list(obtenido) == [escalar(x) for x in values]
+
+
+def test_infinitos_y_forma():
+    obtenido = format_numbers_spanish(np.array([[1.5, np.inf], [-np.inf, 2.0]]), MILES, na="-")
+    assert obtenido.shape == (2, 2)
+    assert obtenido.tolist() == [["1,50", "-"], ["-", "2,00"]]
@@ -0,0 +1,65 @@
+"""etl._normalize_number_series debe dar lo mismo que _normalize_number celda a celda."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import _normalize_number, _normalize_number_series
+
+ADVERSARIOS = [
+    "1.234,56", "869,43", "869.43", "200022", "-1.234.567,8", "1,234.56", "1.234.567",
+    "$ 1.234,56", "12,5 %", "$", "%", "$%", " ", "", "  869,43  ", "1 234,5", "\t7\t",
+    "inf", "-inf", "Infinity", "nan", "NaN", "1_000", "1__0", "_1", "1e3", "1,5e3", "1.5E-2",
+    ".5", "5.", ",5", "5,", "+3", "--3", "1,2,3", "1.2.3", "abc", "0x10", "١٢٣",
+    None, np.nan, 3, 2.5, -0.0,
+]
+
+ALFABETO = "0123456789.,$% -+eE_inf\t"
+
+
+def _esperado(values):
+    return np.array([np.nan if r is None else r for r in map(_normalize_number, values)], dtype=float)
+
+
+def _assert_igual(values, dtype):
+    serie = pd.Series(values, dtype=dtype)
+    obtenido = _normalize_number_series(serie)
+    assert obtenido.dtype == np.float64
+    assert obtenido.index.equals(serie.index)
+    np.testing.assert_array_equal(obtenido.to_numpy(), _esperado(serie))
+
+
+@pytest.mark.parametrize("dtype", [object, "str"])
+def test_adversarios(dtype):
+    values = ADVERSARIOS if dtype is object else [v if v is None or isinstance(v, str) else str(v)
+                                                  for v in ADVERSARIOS]
+    _assert_igual(values, dtype)
+    for v in values:
+        _assert_igual([v], dtype)
+
+
+@pytest.mark.parametrize("dtype", [object, "str"])
+@pytest.mark.parametrize("seed", range(20))
+def test_aleatorios(dtype, seed):
+    rng = random.Random(seed)
+    values = []
+    for _ in range(500):
+        r = rng.random()
+        if r < 0.05:
+            values.append(None)
+        elif r < 0.5:
+            # Números con formato chileno / inglés y símbolos
+            n = rng.uniform(-1e7, 1e7)
+            txt = f"{n:,.{rng.randint(0, 3)}f}"
+            if rng.random() < 0.5:
+                txt = txt.replace(",", "#").replace(".", ",").replace("#", ".")
+            values.append(rng.choice(["", "$", "$ ", " "]) + txt + rng.choice(["", "%", " ", " %"]))
+        else:
+            values.append("".join(rng.choice(ALFABETO) for _ in range(rng.randint(0, 8))))
+    _assert_igual(values, dtype)
+
+
+def test_vacio_y_solo_nulos():
+    _assert_igual([], object)
+    _assert_igual([None, np.nan, "", "  "], object)